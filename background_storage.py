@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Zapis kontaktów w wątku w tle z łączeniem zmian.
+
+BackgroundStorage opakowuje backend zapisu (JournalStorage, SqliteStorage)
+i przejmuje od wątku interfejsu całą pracę na dysku:
+- record() tylko dopisuje operację do kolejki - seria edycji nie czeka
+  na fsync po każdej zmianie
+- wątek zapisujący utrwala kolejkę najwyżej raz na `interval` sekund:
+  wszystkie operacje z tego okresu trafiają na dysk jednym zapisem
+  (dziennik: jedna porcja linii i jeden fsync, SQLite: jedna transakcja)
+- save() i kompaktowanie dziennika zlecają zapis migawki kontaktów; migawka
+  zastępuje wszystkie wcześniejsze operacje w kolejce, więc kilka pełnych
+  zapisów w jednym okresie to jeden zapis pliku (przez plik tymczasowy
+  i os.replace - przerwany zapis nie obcina contacts.csv)
+- close() zapisuje wszystko, co czeka w kolejce, i czeka na koniec zapisu
+
+Po błędzie zapisu kolejna zmiana (lub close) zleca migawkę całej książki,
+więc nieudana porcja nie zostaje pominięta. Stan zapisu (status, last_error)
+może być odczytywany przez interfejs, np. jako napis "Zapisywanie..." / "Zapisano".
+
+Wykorzystane biblioteki:
+- threading: wątek zapisujący i synchronizacja kolejki
+- time: odstęp między zapisami
+"""
+
+import threading
+import time
+
+# Stany zapisu
+IDLE = 'idle'
+PENDING = 'pending'
+SAVING = 'saving'
+SAVED = 'saved'
+FAILED = 'error'
+
+# Domyślny minimalny odstęp między zapisami (s)
+DEFAULT_INTERVAL = 1.0
+
+
+class BackgroundStorage:
+    """
+    Backend zapisu wykonujący zapisy innego backendu w wątku w tle.
+    """
+    def __init__(self, storage, interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            storage: Opakowywany backend (musi mieć metody load, load_lazy,
+                     append, save, close)
+            interval: Minimalny odstęp między kolejnymi zapisami (s); zmiany
+                      z tego okresu są łączone w jeden zapis
+        """
+        self.storage = storage
+        self.path = storage.path
+        self.interval = interval
+        # Stan zapisu (IDLE, PENDING, SAVING, SAVED, FAILED) i ostatni błąd
+        self.status = IDLE
+        self.last_error = None
+        # Liczba operacji, po której dziennik jest zastępowany migawką
+        # (None - backend bez dziennika)
+        self.snapshot_threshold = getattr(storage, 'compact_threshold', None)
+        self._condition = threading.Condition()
+        # Kolejka: opcjonalna migawka na początku i operacje po niej
+        self._snapshot = None
+        self._operations = []
+        self._since_snapshot = 0
+        self._resync = False
+        self._writing = False
+        self._closing = False
+        self._last_write = 0.0
+        self._contacts = None
+        self._thread = None
+
+    def load(self, on_batch=None, on_operation=None, batch_size=5000, container=None):
+        """
+        Wczytuje kontakty przez opakowywany backend (synchronicznie).
+        Args:
+            on_batch, on_operation, batch_size, container: Jak w backendzie
+        Returns:
+            list: Lista kontaktów lub container
+        """
+        self.flush()
+        contacts = self.storage.load(on_batch, on_operation, batch_size, container)
+        self._contacts = contacts
+        self._since_snapshot = getattr(self.storage, 'entries', 0)
+        return contacts
+
+    def load_lazy(self):
+        """
+        Otwiera plik CSV do odczytu na żądanie przez opakowywany backend.
+        Returns:
+            LazyCsvRows: Wiersze pliku lub None (jak w backendzie)
+        """
+        self.flush()
+        rows = self.storage.load_lazy()
+        if rows is not None:
+            # Migawka po błędzie zapisu wymaga wczytanych kontaktów (po pierwszej edycji)
+            self._contacts = None
+            self._since_snapshot = 0
+        return rows
+
+    def resume(self, contacts, entries):
+        """
+        Otwiera opakowywany backend dla kontaktów wczytanych z migawki
+        startowej (startup.py) zamiast z pliku.
+        Args:
+            contacts: Kontakty z migawki
+            entries: Liczba operacji w dzienniku w chwili zapisu migawki
+        Returns:
+            bool: Wynik backendu (False - wymagane pełne load)
+        """
+        self.flush()
+        if not self.storage.resume(contacts, entries):
+            return False
+        self._contacts = contacts
+        self._since_snapshot = entries
+        return True
+
+    @property
+    def entries(self):
+        """Liczba operacji w dzienniku opakowywanego backendu (0 - backend bez dziennika)"""
+        return getattr(self.storage, 'entries', 0)
+
+    def record(self, contacts, operation):
+        """
+        Dopisuje operację do kolejki zapisu (bez czekania na dysk).
+        Args:
+            contacts: Kontakty po wykonaniu operacji
+            operation: Krotka (operacja, indeks, kontakt)
+        """
+        with self._condition:
+            self._contacts = contacts
+            self._since_snapshot += 1
+            if self._resync or (self.snapshot_threshold is not None
+                                and self._since_snapshot >= self.snapshot_threshold):
+                # Migawka zawiera już tę operację
+                self._queue_snapshot(contacts)
+            else:
+                self._operations.append(operation)
+                self._wake()
+
+    def save(self, contacts):
+        """
+        Zleca zapis wszystkich kontaktów (migawka zastępuje operacje w kolejce).
+        Args:
+            contacts: Kontakty
+        """
+        with self._condition:
+            self._contacts = contacts
+            self._queue_snapshot(contacts)
+
+    def flush(self, timeout=None):
+        """
+        Czeka, aż kolejka zostanie zapisana.
+        Args:
+            timeout: Maksymalny czas oczekiwania (s); None - bez limitu
+        Returns:
+            bool: True, jeśli wszystko zostało zapisane bez błędu
+        """
+        with self._condition:
+            if self._resync and self._contacts is not None:
+                self._queue_snapshot(self._contacts)
+            # Zapis kolejki bez czekania na upływ odstępu
+            self._last_write = 0.0
+            self._condition.notify_all()
+            done = self._condition.wait_for(
+                lambda: not self._has_work() and not self._writing, timeout)
+            return done and self.status != FAILED
+
+    def close(self):
+        """
+        Zapisuje zaległe zmiany, kończy wątek zapisujący i zamyka backend.
+        Raises:
+            Exception: Błąd ostatniego zapisu, jeśli zmiany nie zostały utrwalone
+        """
+        self.flush()
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.storage.close()
+        if self.status == FAILED:
+            raise self.last_error
+
+    def _queue_snapshot(self, contacts):
+        """Zastępuje kolejkę migawką kontaktów (wywoływane pod blokadą)"""
+        self._snapshot = contacts.copy()
+        self._operations = []
+        self._since_snapshot = 0
+        self._resync = False
+        self._wake()
+
+    def _has_work(self):
+        return self._snapshot is not None or bool(self._operations)
+
+    def _wake(self):
+        """Oznacza kolejkę jako oczekującą i budzi wątek zapisujący (pod blokadą)"""
+        if self.status != SAVING:
+            self.status = PENDING
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="contacts-writer",
+                                            daemon=True)
+            self._thread.start()
+        self._condition.notify_all()
+
+    def _run(self):
+        """Pętla wątku zapisującego"""
+        while True:
+            with self._condition:
+                while True:
+                    if self._has_work():
+                        delay = self._last_write + self.interval - time.monotonic()
+                        if delay <= 0 or self._closing:
+                            break
+                        # Zmiany z pozostałej części okresu trafią do tego samego zapisu
+                        self._condition.wait(delay)
+                    elif self._closing:
+                        return
+                    else:
+                        self._condition.wait()
+                snapshot, operations = self._snapshot, self._operations
+                self._snapshot, self._operations = None, []
+                self._writing = True
+                self.status = SAVING
+            error = None
+            try:
+                if snapshot is not None:
+                    self.storage.save(snapshot)
+                if operations:
+                    self.storage.append(operations)
+            except Exception as e:
+                error = e
+            with self._condition:
+                self._writing = False
+                self._last_write = time.monotonic()
+                if error is not None:
+                    self.last_error = error
+                    self.status = FAILED
+                    # Utracona porcja zostanie zastąpiona migawką całej książki
+                    self._resync = True
+                elif self._has_work():
+                    self.status = PENDING
+                else:
+                    self.last_error = None
+                    self.status = SAVED
+                self._condition.notify_all()
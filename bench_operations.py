@@ -0,0 +1,598 @@
+# -*- coding: utf-8 -*-
+"""
+Testy wydajności operacji menedżera kontaktów.
+
+Mierzy czas typowych operacji na syntetycznych książkach (dataset.py,
+domyślnie 10 000 i 100 000 kontaktów; 1 000 000 na żądanie):
+- bez okna (headless) - model ContactStore z dziennikiem zmian, tak jak
+  w wierszu poleceń: load, load_lazy (z gotowym i bez indeksu wierszy),
+  sort, search, add, update, delete, save
+- z oknem Tk (--gui) - metody ContactManager: load (utworzenie okna
+  i wczytanie), sort_column, search, add_contact, update_contact,
+  delete_contact, save_contacts (z oczekiwaniem na zapis w tle);
+  po każdej operacji wykonywane jest root.update(), więc czas obejmuje
+  odświeżenie tabeli. Bez ekranu (zmienna DISPLAY) okno jest tworzone
+  na wirtualnym ekranie Xvfb (opcjonalny pakiet xvfbwrapper)
+
+Dla każdej operacji raportowane są percentyle p50/p95 (oraz średnia,
+minimum i maksimum) i szczytowy przyrost pamięci Pythona (tracemalloc,
+osobny przebieg - śledzenie spowalnia pomiar czasu). Każdy tryb i rozmiar
+jest mierzony w osobnym procesie, więc szczytowe zużycie pamięci procesu
+(peak RSS) dotyczy tylko tego pomiaru. Okna dialogowe (messagebox) są
+w trybie --gui automatycznie potwierdzane.
+
+Wyniki można zapisać w pliku JSON (--json) razem z identyfikatorem
+commita i porównać z wcześniejszym przebiegiem (--compare).
+
+Przykłady:
+    python bench_operations.py
+    python bench_operations.py --rows 10000 100000 1000000 --json wyniki.json
+    python bench_operations.py --gui --json po_zmianie.json --compare przed_zmiana.json
+
+Wykorzystane biblioteki:
+- argparse: parametry wiersza poleceń
+- json: zapis i odczyt wyników
+- subprocess: osobny proces dla każdego pomiaru, identyfikator commita
+- tracemalloc, resource: pomiar pamięci
+- tempfile, shutil: kopia zbioru danych (pomiar nie zmienia zbioru)
+- time, random: pomiar czasu i losowanie kontaktów do edycji
+- xvfbwrapper (opcjonalnie): wirtualny ekran dla trybu --gui
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Windows - szczytowe zużycie pamięci procesu nie jest raportowane
+    resource = None
+
+from dataset import ensure_dataset, generate_contacts
+from validation import validate_contact
+
+# Domyślne rozmiary zbiorów (1 000 000 - tylko na żądanie, pomiar trwa kilka minut)
+DEFAULT_SIZES = (10000, 100000)
+# Wersja formatu pliku wyników
+RESULTS_VERSION = 1
+# Różnica p50 względem poprzedniego przebiegu uznawana za istotną
+COMPARE_THRESHOLD = 0.10
+# Specyfikacja sortowania: nazwisko, potem imię (jak Shift+klik w oknie)
+SORT_SPEC = [(1, False), (0, False)]
+
+
+def percentile(values, fraction):
+    """
+    Zwraca percentyl z interpolacją liniową.
+    Args:
+        values: Posortowane wartości
+        fraction: Percentyl jako ułamek (np. 0.95)
+    Returns:
+        float: Wartość percentyla
+    """
+    if len(values) == 1:
+        return values[0]
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """
+    Podsumowuje czasy wykonania.
+    Args:
+        samples: Czasy w sekundach
+    Returns:
+        dict: Liczba próbek oraz p50, p95, średnia, minimum i maksimum w milisekundach
+    """
+    values = sorted(samples)
+    return {
+        'samples': len(values),
+        'p50_ms': round(percentile(values, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'min_ms': round(values[0] * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3),
+    }
+
+
+def measure(run, repeat, setup=None, teardown=None, memory=True):
+    """
+    Mierzy czas operacji i szczytowy przyrost pamięci.
+    Args:
+        run: Funkcja wykonująca jedną operację (argument: wynik setup lub brak)
+        repeat: Liczba pomiarów czasu
+        setup: Opcjonalna funkcja przygotowująca pomiar (poza pomiarem czasu)
+        teardown: Opcjonalna funkcja sprzątająca (argument: wynik run)
+        memory: Czy wykonać dodatkowy przebieg pod tracemalloc
+    Returns:
+        dict: Podsumowanie (summarize) z polem peak_memory_bytes
+    """
+    def once():
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        result = run(state) if setup is not None else run()
+        elapsed = time.perf_counter() - start
+        return elapsed, result
+
+    samples = []
+    for _ in range(repeat):
+        elapsed, result = once()
+        samples.append(elapsed)
+        if teardown is not None:
+            teardown(result)
+    summary = summarize(samples)
+    summary['peak_memory_bytes'] = None
+    if memory:
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            _, result = once()
+            summary['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+        if teardown is not None:
+            teardown(result)
+    return summary
+
+
+def edit_contacts(count, seed):
+    """
+    Przygotowuje poprawne kontakty do dodawania i aktualizacji.
+    Args:
+        count: Liczba kontaktów
+        seed: Ziarno generatora (inne niż zbioru danych)
+    Returns:
+        list: Kontakty przechodzące walidację
+    """
+    contacts = []
+    for contact in generate_contacts(count * 2, seed):
+        if not validate_contact(contact):
+            contacts.append(contact)
+            if len(contacts) == count:
+                break
+    return contacts
+
+
+def search_queries(contacts, count, rng):
+    """
+    Tworzy zapytania podobne do wpisywanych przez użytkownika.
+    Args:
+        contacts: Kontakty, z których pochodzą zapytania
+        count: Liczba zapytań
+        rng: Generator liczb losowych
+    Returns:
+        list: Zapytania (początek nazwiska, imię, fragment numeru, początek adresu email)
+    """
+    queries = []
+    for _ in range(count):
+        first_name, last_name, _, phone, email = contacts[rng.randrange(len(contacts))]
+        kind = len(queries) % 4
+        if kind == 0:
+            queries.append(last_name[:3])
+        elif kind == 1:
+            queries.append(first_name)
+        elif kind == 2:
+            digits = ''.join(c for c in phone if c.isdigit())
+            queries.append(digits[-4:])
+        else:
+            queries.append(email[:5])
+    return queries
+
+
+def bench_headless(path, args):
+    """
+    Mierzy operacje modelu ContactStore (bez okna).
+    Args:
+        path: Ścieżka do kopii zbioru danych (plik CSV)
+        args: Argumenty wiersza poleceń
+    Returns:
+        list: Słowniki z wynikami operacji
+    """
+    from contact_store import ContactStore
+    from lazy_csv import index_path
+
+    rng = random.Random(args.seed)
+    results = []
+
+    def record(operation, summary):
+        summary['operation'] = operation
+        results.append(summary)
+        print(f"  {operation}: p50 {summary['p50_ms']} ms", file=sys.stderr)
+
+    def load():
+        store = ContactStore(path)
+        store.load()
+        return store
+
+    def load_lazy():
+        store = ContactStore(path)
+        store.load(lazy=True)
+        return store
+
+    def remove_row_index():
+        if os.path.exists(index_path(path)):
+            os.remove(index_path(path))
+
+    close = ContactStore.close
+    record('load', measure(load, args.repeat, teardown=close, memory=args.memory))
+    record('load_lazy_cold', measure(lambda state: load_lazy(), args.repeat,
+                                     setup=remove_row_index, teardown=close, memory=args.memory))
+    record('load_lazy', measure(load_lazy, args.repeat, teardown=close, memory=args.memory))
+
+    store = load()
+    try:
+        record('sort', measure(lambda state: store.sorted_ids(SORT_SPEC), args.repeat,
+                               setup=store.sorter.reset, memory=args.memory))
+        queries = iter(search_queries(store.contacts, args.operations + 1, rng))
+        record('search', measure(lambda: store.search(next(queries)), args.operations,
+                                 memory=args.memory))
+
+        new_contacts = iter(edit_contacts(2 * args.operations + 2, args.seed + 1))
+        record('add', measure(lambda: store.add(next(new_contacts)), args.operations,
+                              memory=args.memory))
+
+        def random_id():
+            return store.contact_ids[rng.randrange(len(store))]
+
+        record('update', measure(lambda contact_id: store.update(contact_id, next(new_contacts)),
+                                 args.operations, setup=random_id, memory=args.memory))
+        record('delete', measure(store.delete, args.operations, setup=random_id,
+                                 memory=args.memory))
+        record('save', measure(store.save, args.repeat, memory=args.memory))
+    finally:
+        store.close()
+    return results
+
+
+class AutoDialogs:
+    """
+    Zastępuje tkinter.messagebox w trybie --gui: okna dialogowe nie są
+    wyświetlane, pytania są potwierdzane, a błędy zliczane.
+    """
+    def __init__(self):
+        self.errors = []
+
+    def showinfo(self, title, message, **options):
+        return 'ok'
+
+    def showwarning(self, title, message, **options):
+        return 'ok'
+
+    def showerror(self, title, message, **options):
+        self.errors.append(message)
+        return 'ok'
+
+    def askyesno(self, title, message, **options):
+        return True
+
+
+def start_display():
+    """
+    Uruchamia wirtualny ekran Xvfb, jeśli nie ma ekranu.
+    Returns:
+        Obiekt xvfbwrapper.Xvfb do zatrzymania lub None (ekran jest dostępny)
+    Raises:
+        RuntimeError: Gdy ekranu nie ma, a Xvfb nie jest dostępny
+    """
+    if os.name == 'nt' or sys.platform == 'darwin' or os.environ.get('DISPLAY'):
+        return None
+    try:
+        from xvfbwrapper import Xvfb
+    except ImportError:
+        raise RuntimeError("brak ekranu (DISPLAY) i pakietu xvfbwrapper "
+                           "(pip install xvfbwrapper; wymaga programu Xvfb)")
+    try:
+        display = Xvfb(width=1280, height=800)
+        display.start()
+    except (OSError, RuntimeError) as e:
+        raise RuntimeError(f"nie udało się uruchomić Xvfb: {e}")
+    return display
+
+
+def bench_gui(path, args):
+    """
+    Mierzy operacje okna ContactManager (prawdziwe okno Tk).
+    Args:
+        path: Ścieżka do kopii zbioru danych (plik CSV)
+        args: Argumenty wiersza poleceń
+    Returns:
+        list: Słowniki z wynikami operacji
+    Raises:
+        RuntimeError: Gdy nie można utworzyć okna
+    """
+    display = start_display()
+    try:
+        import tkinter as tk
+        import contact_manager
+        from contact_manager import ContactManager
+
+        dialogs = AutoDialogs()
+        contact_manager.messagebox = dialogs
+        rng = random.Random(args.seed)
+        results = []
+
+        def record(operation, summary):
+            summary['operation'] = operation
+            summary['dialog_errors'] = len(dialogs.errors)
+            dialogs.errors.clear()
+            results.append(summary)
+            print(f"  {operation}: p50 {summary['p50_ms']} ms", file=sys.stderr)
+
+        def open_window():
+            root = tk.Tk()
+            app = ContactManager(root, async_load=False, path=path)
+            root.update()
+            return app
+
+        def close_window(app):
+            app.on_close()
+
+        record('load', measure(open_window, args.repeat, teardown=close_window,
+                               memory=args.memory))
+
+        app = open_window()
+        root = app.root
+        try:
+            columns = ("Nazwisko", "Imię")
+
+            def sort(state):
+                app.sort_column(columns[state % 2])
+                root.update()
+
+            counter = iter(range(args.repeat * 2 + 2))
+            record('sort', measure(sort, args.repeat, setup=lambda: next(counter),
+                                   memory=args.memory))
+            app.sort_columns = []
+            app.refresh_view()
+
+            queries = iter(search_queries(app.contacts, args.operations + 1, rng))
+
+            def search(query):
+                app.search_var.set(query)
+                # Wyszukiwanie od razu, bez czekania SEARCH_DELAY_MS na zaplanowane zadanie
+                root.after_cancel(app._search_job)
+                app.apply_search()
+                root.update()
+
+            def clear_search(result):
+                app.search_var.set("")
+                app.apply_search()
+
+            record('search', measure(search, args.operations, setup=lambda: next(queries),
+                                     teardown=clear_search, memory=args.memory))
+
+            new_contacts = iter(edit_contacts(2 * args.operations + 2, args.seed + 1))
+
+            def fill_fields():
+                first_name, last_name, nickname, phone, email = next(new_contacts)
+                app.first_name_var.set(first_name)
+                app.last_name_var.set(last_name)
+                app.nickname_var.set(nickname)
+                app.phone_var.set(phone)
+                app.email_var.set(email)
+
+            def add(state):
+                app.add_contact()
+                root.update()
+
+            record('add', measure(add, args.operations, setup=fill_fields, memory=args.memory))
+
+            def select_random():
+                app.selected_index = rng.randrange(len(app.contacts))
+
+            def select_and_fill():
+                select_random()
+                fill_fields()
+
+            def update(state):
+                app.update_contact()
+                root.update()
+
+            record('update', measure(update, args.operations, setup=select_and_fill,
+                                     memory=args.memory))
+
+            def delete(state):
+                app.delete_contact()
+                root.update()
+
+            record('delete', measure(delete, args.operations, setup=select_random,
+                                     memory=args.memory))
+
+            def save():
+                app.save_contacts()
+                app.store.storage.flush()
+                root.update()
+
+            record('save', measure(save, args.repeat, memory=args.memory))
+        finally:
+            app.on_close()
+        return results
+    finally:
+        if display is not None:
+            display.stop()
+
+
+def peak_rss_bytes():
+    """Zwraca szczytowe zużycie pamięci procesu w bajtach (None w Windows)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje kilobajty, macOS - bajty
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_child(args):
+    """
+    Wykonuje jeden pomiar (tryb i rozmiar) i wypisuje wynik jako JSON.
+    Zbiór danych jest kopiowany do katalogu tymczasowego, więc dziennik,
+    indeks wierszy i zmiany z pomiaru nie trafiają do zbioru.
+    """
+    mode, rows = args.child
+    rows = int(rows)
+    source = ensure_dataset(args.data_dir, rows, args.seed)
+    with tempfile.TemporaryDirectory(prefix='contacts-bench-') as directory:
+        path = os.path.join(directory, 'contacts.csv')
+        shutil.copyfile(source, path)
+        try:
+            results = (bench_gui if mode == 'gui' else bench_headless)(path, args)
+        except RuntimeError as e:
+            json.dump({'skipped': str(e)}, sys.stdout)
+            return 0
+    for result in results:
+        result['mode'] = mode
+        result['rows'] = rows
+    json.dump({'results': results, 'peak_rss_bytes': peak_rss_bytes()}, sys.stdout)
+    return 0
+
+
+def git_commit():
+    """Zwraca identyfikator bieżącego commita (None poza repozytorium git)"""
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() + ('-dirty' if dirty.stdout.strip() else '')
+
+
+def child_command(mode, rows, args):
+    """Buduje wywołanie procesu wykonującego jeden pomiar"""
+    command = [sys.executable, os.path.abspath(__file__), '--child', mode, str(rows),
+               '--seed', str(args.seed), '--repeat', str(args.repeat),
+               '--operations', str(args.operations), '--data-dir', args.data_dir]
+    if not args.memory:
+        command.append('--no-memory')
+    return command
+
+
+def print_results(results, out=None):
+    """Wypisuje wyniki jako tabelę"""
+    out = out or sys.stdout
+    out.write(f"{'tryb':<9}{'wiersze':>9}  {'operacja':<15}{'n':>5}{'p50 ms':>11}"
+              f"{'p95 ms':>11}{'pamięć MB':>11}\n")
+    for result in results:
+        memory = result.get('peak_memory_bytes')
+        memory = '-' if memory is None else f"{memory / 1e6:.1f}"
+        out.write(f"{result['mode']:<9}{result['rows']:>9}  {result['operation']:<15}"
+                  f"{result['samples']:>5}{result['p50_ms']:>11.3f}{result['p95_ms']:>11.3f}"
+                  f"{memory:>11}\n")
+
+
+def compare_results(baseline, results, out=None):
+    """
+    Porównuje p50 z wynikami poprzedniego przebiegu.
+    Args:
+        baseline: Zawartość wcześniejszego pliku wyników
+        results: Bieżące wyniki
+        out: Strumień wyjściowy (domyślnie sys.stdout)
+    """
+    out = out or sys.stdout
+    previous = {(r['mode'], r['rows'], r['operation']): r for r in baseline.get('results', [])}
+    out.write(f"\nPorównanie z {baseline.get('meta', {}).get('commit') or 'poprzednim przebiegiem'}:\n")
+    for result in results:
+        old = previous.get((result['mode'], result['rows'], result['operation']))
+        if old is None or not old['p50_ms']:
+            continue
+        ratio = result['p50_ms'] / old['p50_ms']
+        if ratio > 1 + COMPARE_THRESHOLD:
+            verdict = "wolniej"
+        elif ratio < 1 - COMPARE_THRESHOLD:
+            verdict = "szybciej"
+        else:
+            verdict = "bez zmian"
+        out.write(f"{result['mode']:<9}{result['rows']:>9}  {result['operation']:<15}"
+                  f"{old['p50_ms']:>11.3f} -> {result['p50_ms']:>11.3f} ms  x{ratio:.2f}  {verdict}\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Testy wydajności operacji menedżera kontaktów")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="rozmiary książek (domyślnie 10000 100000)")
+    parser.add_argument('--gui', action='store_true',
+                        help="mierz także operacje okna Tk (pod Xvfb, jeśli brak ekranu)")
+    parser.add_argument('--gui-only', action='store_true', help="mierz tylko operacje okna Tk")
+    parser.add_argument('--seed', type=int, default=1, help="ziarno generatora danych")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="liczba pomiarów operacji na całej książce (load, sort, save)")
+    parser.add_argument('--operations', type=int, default=50,
+                        help="liczba pomiarów pojedynczych operacji (search, add, update, delete)")
+    parser.add_argument('--data-dir', default='bench_data',
+                        help="katalog z wygenerowanymi zbiorami (domyślnie bench_data)")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="pomiń przebiegi pod tracemalloc")
+    parser.add_argument('--json', help="zapisz wyniki do pliku JSON")
+    parser.add_argument('--compare', help="porównaj z wcześniejszym plikiem wyników JSON")
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'ROWS'), help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.child:
+        return run_child(args)
+
+    modes = ['gui'] if args.gui_only else ['headless'] + (['gui'] if args.gui else [])
+    results = []
+    peak_rss = {}
+    skipped = {}
+    for rows in args.rows:
+        # Zbiór generowany raz, przed pomiarami
+        ensure_dataset(args.data_dir, rows, args.seed)
+        for mode in modes:
+            print(f"{mode}, {rows} kontaktów...", file=sys.stderr)
+            child = subprocess.run(child_command(mode, rows, args), stdout=subprocess.PIPE,
+                                   text=True)
+            if child.returncode != 0:
+                print(f"Pomiar {mode}/{rows} zakończył się błędem ({child.returncode})",
+                      file=sys.stderr)
+                return 1
+            output = json.loads(child.stdout)
+            if 'skipped' in output:
+                skipped[mode] = output['skipped']
+                print(f"Pominięto tryb {mode}: {output['skipped']}", file=sys.stderr)
+                continue
+            results.extend(output['results'])
+            peak_rss[f"{mode}/{rows}"] = output['peak_rss_bytes']
+
+    print_results(results)
+    report = {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'commit': git_commit(),
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'operations': args.operations,
+            'peak_rss_bytes': peak_rss,
+            'skipped': skipped,
+        },
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare_results(json.load(file), results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Mikrobenchmark walidacji kontaktów.
+
+Porównuje cztery sposoby sprawdzenia tych samych danych:
+1. dawne metody validate_name/validate_phone/validate_email okna programu
+   (ta sama logika, bez okien dialogowych): wzorzec email kompilowany przez
+   re.match w każdym wywołaniu, numer telefonu filtrowany znak po znaku
+2. funkcje check_* modułu validation wywoływane dla każdego wiersza
+   (do pierwszego błędu)
+3. validate_contact dla każdego wiersza (wszystkie błędy wiersza)
+4. wsadowe validate_rows - całe kolumny naraz (wszystkie błędy wiersza)
+
+Dane są generowane deterministycznie (ziarno), z częścią błędnych wierszy.
+Przed pomiarem sprawdzana jest zgodność wyników wszystkich metod.
+
+Przykład:
+    python bench_validation.py --rows 100000 --repeat 5
+
+Wykorzystane biblioteki:
+- argparse: parametry wiersza poleceń
+- random: generowanie danych testowych
+- re: dawna walidacja email (dla porównania)
+- time: pomiar czasu
+"""
+
+import argparse
+import random
+import re
+import time
+
+from validation import check_email, check_name, check_phone, validate_contact, validate_rows
+
+_FIRST_NAMES = ('Anna', 'Jan', 'Ewa', 'Piotr', 'Zofia', 'Łukasz', 'Maria Anna')
+_LAST_NAMES = ('Nowak', 'Kowalski', 'Wiśniewska', 'Zając', 'Lewandowski', 'Dąbrowska')
+_DOMAINS = ('example.com', 'poczta.pl', 'firma.com.pl', 'mail.org')
+
+
+def legacy_validate_name(name, field_name):
+    """Dawna walidacja imienia lub nazwiska (bez okna dialogowego)"""
+    if not name:
+        return f"{field_name} nie może być pusty"
+    if not name.replace(" ", "").isalpha():
+        return f"{field_name} może zawierać tylko litery"
+    return None
+
+
+def legacy_validate_phone(phone):
+    """Dawna walidacja numeru telefonu (bez okna dialogowego)"""
+    if not phone:
+        return "Numer telefonu nie może być pusty"
+    phone = phone.replace(" ", "").replace("-", "")
+    if phone.startswith("+"):
+        phone_digits = ''.join(filter(str.isdigit, phone[1:]))
+        if len(phone_digits) < 9:
+            return "Numer telefonu musi zawierać co najmniej 9 cyfr po kodzie kraju"
+    else:
+        phone_digits = ''.join(filter(str.isdigit, phone))
+        if len(phone_digits) != 9:
+            return "Lokalny numer telefonu musi zawierać dokładnie 9 cyfr"
+    if not phone_digits.isdigit():
+        return "Numer telefonu może zawierać tylko cyfry (oraz + na początku dla kodu kraju)"
+    return None
+
+
+def legacy_validate_email(email):
+    """Dawna walidacja adresu email (bez okna dialogowego)"""
+    if not email:
+        return "Email nie może być pusty"
+    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if not re.match(email_pattern, email):
+        return "Niepoprawny format email"
+    return None
+
+
+def generate_contacts(count, seed=1, invalid_ratio=0.05):
+    """
+    Generuje kontakty testowe.
+    Args:
+        count: Liczba kontaktów
+        seed: Ziarno generatora liczb losowych
+        invalid_ratio: Udział wierszy z błędem w jednym polu
+    Returns:
+        list: Lista kontaktów (list pól)
+    """
+    rng = random.Random(seed)
+    contacts = []
+    for i in range(count):
+        first_name = rng.choice(_FIRST_NAMES)
+        last_name = rng.choice(_LAST_NAMES)
+        phone = rng.choice((f"{500000000 + i}", f"+48 {500000000 + i}",
+                            f"{500 + i % 400}-{i % 1000:03d}-{i % 997:03d}"))
+        email = f"user{i}@{rng.choice(_DOMAINS)}"
+        if rng.random() < invalid_ratio:
+            broken = rng.randrange(4)
+            if broken == 0:
+                first_name = first_name + '1'
+            elif broken == 1:
+                last_name = ''
+            elif broken == 2:
+                phone = phone[:-2]
+            else:
+                email = email.replace('@', '')
+        contacts.append([first_name, last_name, '', phone, email])
+    return contacts
+
+
+def run_legacy(contacts):
+    """Zwraca dla każdego wiersza, czy kontakt jest poprawny (dawne metody)"""
+    return [legacy_validate_name(first_name, "Imię") is None
+            and legacy_validate_name(last_name, "Nazwisko") is None
+            and legacy_validate_phone(phone) is None
+            and legacy_validate_email(email) is None
+            for first_name, last_name, _, phone, email in contacts]
+
+
+def run_per_row(contacts):
+    """Zwraca dla każdego wiersza, czy kontakt jest poprawny (check_* po wierszu)"""
+    return [check_name(first_name, "Imię", 'first_name') is None
+            and check_name(last_name, "Nazwisko", 'last_name') is None
+            and check_phone(phone) is None
+            and check_email(email) is None
+            for first_name, last_name, _, phone, email in contacts]
+
+
+def run_contact(contacts):
+    """Zwraca dla każdego wiersza, czy kontakt jest poprawny (validate_contact)"""
+    return [not validate_contact(contact) for contact in contacts]
+
+
+def run_batch(contacts):
+    """Zwraca dla każdego wiersza, czy kontakt jest poprawny (validate_rows)"""
+    return [not errors for errors in validate_rows(contacts)]
+
+
+def measure(function, contacts, repeat):
+    """
+    Mierzy najkrótszy czas wykonania funkcji.
+    Args:
+        function: Funkcja walidująca listę kontaktów
+        contacts: Lista kontaktów
+        repeat: Liczba powtórzeń
+    Returns:
+        float: Najkrótszy czas w sekundach
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(contacts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mikrobenchmark walidacji kontaktów")
+    parser.add_argument('--rows', type=int, default=100000, help="liczba kontaktów")
+    parser.add_argument('--repeat', type=int, default=5, help="liczba powtórzeń pomiaru")
+    parser.add_argument('--seed', type=int, default=1, help="ziarno generatora danych")
+    args = parser.parse_args(argv)
+
+    contacts = generate_contacts(args.rows, args.seed)
+    expected = run_legacy(contacts)
+    for function in (run_per_row, run_contact, run_batch):
+        if function(contacts) != expected:
+            raise SystemExit(f"{function.__name__}: wynik różni się od dawnej walidacji")
+    print(f"Kontaktów: {args.rows}, niepoprawnych: {expected.count(False)}")
+
+    baseline = None
+    for label, function in (("dawne validate_*", run_legacy),
+                            ("check_* po wierszu", run_per_row),
+                            ("validate_contact po wierszu", run_contact),
+                            ("validate_rows (kolumny)", run_batch)):
+        seconds = measure(function, contacts, args.repeat)
+        baseline = baseline or seconds
+        print(f"{label:<28} {seconds * 1000:9.1f} ms  "
+              f"{seconds * 1e9 / args.rows:7.0f} ns/wiersz  x{baseline / seconds:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Kilka książek kontaktów otwieranych na żądanie z pamięcią podręczną LRU.
+
+BookLibrary przechowuje listę książek (plików CSV lub baz SQLite), ale
+wczytuje tylko te, które są otwierane. Ostatnio używane książki zostają
+w pamięci (ContactStore z indeksem wyszukiwania i kluczami sortowania),
+więc powrót do nich to tylko zamiana modelu w oknie. Gdy szacowana pamięć
+wczytanych książek przekracza budżet, najdawniej używane są usuwane
+z pamięci podręcznej: ich zmiany są zapisywane (close() backendu zapisu),
+a model jest zwalniany. Aktywna (ostatnio otwarta) książka nigdy nie jest
+usuwana.
+
+Wyszukiwanie we wszystkich książkach:
+- książki w pamięci - przez ich indeks wyszukiwania (search)
+- pozostałe - scan_book przegląda plik otwarty w trybie leniwym
+  (lazy_csv, gotowy indeks przesunięć wierszy) lub odczytany razem
+  z dziennikiem, bez budowy indeksu, bez zmian na dysku i bez dodawania
+  książki do pamięci podręcznej; dopasowanie jest takie samo jak
+  w indeksie (search_index.matches_query)
+
+Książką może być też adres serwera (sync_server.py), np.
+'http://127.0.0.1:8765' - jest na liście pod tym adresem, bez zamiany
+na ścieżkę bezwzględną.
+
+Wykorzystane biblioteki:
+- collections: OrderedDict jako lista LRU
+- glob, os: wyszukiwanie książek w katalogu
+- urllib.parse: nazwa książki na serwerze (host:port; importowany tylko dla
+  książek na serwerze)
+- contact_store, lazy_csv, search_index, sqlite_storage, storage, sync_client: moduły projektu
+"""
+
+import glob
+import os
+from collections import OrderedDict
+
+from contact_store import ContactStore
+from lazy_csv import LazyCsvRows
+from search_index import matches_query, parse_query
+from sqlite_storage import SqliteStorage, is_sqlite_path
+from storage import JournalStorage
+from sync_client import RemoteStorage, is_server_url
+
+# Domyślny budżet pamięci wczytanych książek (bajty)
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Szacunkowa pamięć wczytanego kontaktu: tabela kolumnowa, identyfikator,
+# indeks wyszukiwania i klucze sortowania (zmierzone tracemalloc dla danych
+# z dataset.py: ok. 400-430 B)
+BYTES_PER_CONTACT = 450
+# Dodatkowa pamięć kontaktu po zbudowaniu indeksu duplikatów (ok. 180 B)
+BYTES_PER_DUPLICATE_ENTRY = 180
+# Dodatkowa pamięć kontaktu po zbudowaniu słownika wyszukiwania przybliżonego
+# (listy wystąpień słów; ok. 37 B dla 100k kontaktów)
+BYTES_PER_FUZZY_ENTRY = 40
+# Pamięć wiersza książki otwartej w trybie leniwym (przesunięcie w array('q'))
+BYTES_PER_LAZY_ROW = 8
+# Rozszerzenia plików uznawanych za książki kontaktów
+BOOK_PATTERNS = ('*.csv', '*.db', '*.sqlite', '*.sqlite3')
+
+
+def discover_books(directory):
+    """
+    Wyszukuje książki kontaktów w katalogu.
+    Args:
+        directory: Ścieżka do katalogu
+    Returns:
+        list: Posortowane ścieżki plików CSV i baz SQLite
+    """
+    paths = set()
+    for pattern in BOOK_PATTERNS:
+        paths.update(glob.glob(os.path.join(directory, pattern)))
+    return sorted(paths)
+
+
+def book_key(path):
+    """Zwraca ścieżkę książki na liście: bezwzględną dla plików, adres serwera bez zmian"""
+    return path if is_server_url(path) else os.path.abspath(path)
+
+
+def book_name(path):
+    """Zwraca nazwę książki wyświetlaną w interfejsie (nazwa pliku bez rozszerzenia, dla serwera host:port)"""
+    if is_server_url(path):
+        from urllib.parse import urlsplit
+        return urlsplit(path).netloc
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def estimate_memory(store):
+    """
+    Szacuje pamięć zajmowaną przez wczytaną książkę.
+    Args:
+        store: ContactStore
+    Returns:
+        int: Liczba bajtów
+    """
+    if store.lazy:
+        return len(store) * BYTES_PER_LAZY_ROW
+    size = len(store) * BYTES_PER_CONTACT
+    if store.duplicate_index is not None:
+        size += len(store) * BYTES_PER_DUPLICATE_ENTRY
+    if store.fuzzy_index is not None:
+        size += len(store) * BYTES_PER_FUZZY_ENTRY
+    return size
+
+
+def scan_book(path, query, limit=None):
+    """
+    Przegląda książkę spoza pamięci podręcznej w poszukiwaniu kontaktów.
+    Plik CSV z pustym dziennikiem jest otwierany w trybie leniwym (bez
+    indeksu wyszukiwania), a dziennik, baza SQLite i książka na serwerze
+    są tylko odczytywane, więc funkcja nie zmienia niczego na dysku i może
+    działać w wątku w tle.
+    Args:
+        path: Ścieżka do książki
+        query: Tekst zapytania (jak w ContactStore.search)
+        limit: Maksymalna liczba wyników (None - bez limitu)
+    Returns:
+        list: Pasujące kontakty (krotki pól) w kolejności pliku
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+    if is_server_url(path):
+        storage = RemoteStorage(path)
+        try:
+            contacts = storage.load()
+        finally:
+            storage.close()
+    elif is_sqlite_path(path):
+        storage = SqliteStorage(path)
+        try:
+            contacts = storage.load()
+        finally:
+            storage.close()
+    else:
+        contacts = JournalStorage(path).read()
+    try:
+        found = []
+        for contact in contacts:
+            if matches_query(contact, terms):
+                found.append(tuple(contact))
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+    finally:
+        if isinstance(contacts, LazyCsvRows):
+            contacts.close()
+
+
+class BookLibrary:
+    """
+    Lista książek kontaktów z pamięcią podręczną LRU wczytanych modeli.
+    """
+    def __init__(self, paths=(), memory_budget=DEFAULT_MEMORY_BUDGET, store_factory=ContactStore):
+        """
+        Args:
+            paths: Ścieżki książek
+            memory_budget: Budżet pamięci wczytanych książek (bajty)
+            store_factory: Funkcja tworząca niewczytany model dla ścieżki
+                           (np. z BackgroundStorage); domyślnie ContactStore
+        """
+        # Ścieżki bezwzględne w kolejności dodania
+        self.paths = []
+        self.memory_budget = memory_budget
+        self.store_factory = store_factory
+        # Ścieżka -> ContactStore, od najdawniej do ostatnio używanej
+        self._stores = OrderedDict()
+        for path in paths:
+            self.add_book(path)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return book_key(path) in self.paths
+
+    def add_book(self, path):
+        """
+        Dodaje książkę do listy (bez wczytywania).
+        Args:
+            path: Ścieżka do książki
+        Returns:
+            str: Ścieżka bezwzględna, pod którą książka jest na liście
+        """
+        path = book_key(path)
+        if path not in self.paths:
+            self.paths.append(path)
+        return path
+
+    def cached(self, path):
+        """Czy książka jest wczytana (w pamięci podręcznej)"""
+        return book_key(path) in self._stores
+
+    def cached_paths(self):
+        """Zwraca ścieżki wczytanych książek od ostatnio używanej"""
+        return list(reversed(self._stores))
+
+    def get(self, path):
+        """
+        Zwraca wczytany model książki i oznacza ją jako ostatnio używaną.
+        Args:
+            path: Ścieżka do książki
+        Returns:
+            ContactStore lub None, gdy książka nie jest w pamięci podręcznej
+        """
+        path = book_key(path)
+        store = self._stores.get(path)
+        if store is not None:
+            self._stores.move_to_end(path)
+        return store
+
+    def create(self, path):
+        """
+        Tworzy niewczytany model książki i dodaje go do pamięci podręcznej
+        jako ostatnio używany (wczytuje wywołujący, np. w wątku w tle,
+        a po wczytaniu wywołuje trim).
+        Args:
+            path: Ścieżka do książki
+        Returns:
+            ContactStore: Nowy model
+        """
+        path = self.add_book(path)
+        store = self.store_factory(path)
+        self._stores[path] = store
+        return store
+
+    def open(self, path, lazy=False):
+        """
+        Zwraca model książki, wczytując go, jeśli nie ma go w pamięci podręcznej.
+        Args:
+            path: Ścieżka do książki
+            lazy: Czy otworzyć plik CSV w trybie odczytu na żądanie
+        Returns:
+            ContactStore: Wczytany model
+        """
+        store = self.get(path)
+        if store is None:
+            store = self.create(path)
+            try:
+                store.load(lazy=lazy)
+            except Exception:
+                self.discard(path)
+                raise
+            self.trim()
+        return store
+
+    def memory_usage(self):
+        """Zwraca szacowaną pamięć wszystkich wczytanych książek (bajty)"""
+        return sum(map(estimate_memory, self._stores.values()))
+
+    def trim(self):
+        """
+        Usuwa najdawniej używane książki, dopóki pamięć przekracza budżet
+        (ostatnio używana książka zostaje zawsze).
+        Returns:
+            list: Ścieżki usuniętych książek
+        Raises:
+            Exception: Błąd zapisu zmian usuwanej książki (książka jest usunięta)
+        """
+        evicted = []
+        usage = self.memory_usage()
+        error = None
+        while usage > self.memory_budget and len(self._stores) > 1:
+            path = next(iter(self._stores))
+            usage -= estimate_memory(self._stores[path])
+            evicted.append(path)
+            try:
+                self.evict(path)
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return evicted
+
+    def evict(self, path):
+        """
+        Zapisuje zmiany książki i usuwa ją z pamięci podręcznej.
+        Args:
+            path: Ścieżka do książki
+        """
+        store = self._stores.pop(book_key(path), None)
+        if store is not None:
+            store.close()
+
+    def discard(self, path):
+        """Usuwa z pamięci podręcznej model, którego nie udało się wczytać"""
+        store = self._stores.pop(book_key(path), None)
+        if store is not None:
+            try:
+                store.close()
+            except Exception:
+                # Model bez wczytanych danych - nie ma zmian do zapisania
+                pass
+
+    def search(self, query, limit=None):
+        """
+        Wyszukuje kontakty w książkach wczytanych do pamięci (przez indeks).
+        Args:
+            query: Tekst zapytania
+            limit: Maksymalna liczba wyników z jednej książki (None - bez limitu)
+        Returns:
+            list: Pary (ścieżka, kontakt) w kolejności listy książek
+        """
+        results = []
+        for path in self.paths:
+            store = self._stores.get(path)
+            if store is None:
+                continue
+            ids = store.search(query) or []
+            if limit is not None:
+                ids = ids[:limit]
+            results.extend((path, tuple(store.get(contact_id))) for contact_id in ids)
+        return results
+
+    def uncached_paths(self):
+        """Zwraca ścieżki książek spoza pamięci podręcznej (do przejrzenia przez scan_book)"""
+        return [path for path in self.paths if path not in self._stores]
+
+    def close(self):
+        """
+        Zapisuje zmiany i zamyka wszystkie wczytane książki.
+        Raises:
+            Exception: Pierwszy błąd zamykania (pozostałe książki są zamykane mimo to)
+        """
+        error = None
+        while self._stores:
+            _, store = self._stores.popitem(last=False)
+            try:
+                store.close()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Wiersz poleceń menedżera kontaktów - działa bez ekranu i bez tkinter.
+
+Przykłady:
+    python cli.py add Jan Kowalski 501234567 jan@example.com --nick Janek
+    python cli.py add Jan Kowalski 501234567 jan2@example.com --allow-duplicate
+    python cli.py list --sort=last_name,-first_name --limit 20
+    python cli.py search kowal
+    python cli.py search --fuzzy wojcik
+    python cli.py import nowe_kontakty.csv
+    python cli.py import telefon.vcf --workers 4 --report bledy.csv
+    python cli.py export kopia.csv
+    python cli.py export kopia.vcf.gz --sort=last_name
+    python cli.py export kontakty.jsonl.zst
+    python cli.py --file /srv/kontakty.csv list --format csv
+    python cli.py duplicates --limit 10
+    python cli.py duplicates --merge
+    python cli.py migrate contacts.csv contacts.db
+    python cli.py --file contacts.db search kowal
+    python cli.py serve --port 8765
+    python cli.py --file http://127.0.0.1:8765 add Anna Nowak 601234567 anna@example.com
+
+Kod wyjścia: 0 - sukces, 1 - błędy walidacji lub zapisu, 2 - niepoprawne argumenty.
+
+Wykorzystane biblioteki:
+- argparse: obsługa poleceń i opcji
+- asyncio: uruchomienie serwera książki (serve)
+- csv: wypisywanie kontaktów w formacie CSV (--format csv)
+- sqlite3: obsługa błędów bazy kontaktów
+- sys: standardowe wyjście i wyjście błędów
+"""
+
+import argparse
+import asyncio
+import csv
+import sqlite3
+import sys
+
+from contact_store import ContactStore, DuplicateContactError, StorageError
+from duplicates import MAX_NAME_BLOCK, describe_reasons
+from exporter import COMPRESSIONS, EXPORT_FORMATS, detect_export_format, export_file, write_contacts
+from importer import BATCH_SIZE, import_into
+from sqlite_storage import SqliteStorage, is_sqlite_path
+from sync_client import SyncError
+from sync_server import DEFAULT_HOST, DEFAULT_PORT, serve
+from validation import FIELDS, ValidationError
+
+# Nagłówki kolumn przy wypisywaniu tabeli (jak w oknie aplikacji)
+COLUMN_TITLES = ("Imię", "Nazwisko", "Nick", "Telefon", "Email")
+
+
+def parse_sort(text):
+    """
+    Zamienia opis sortowania na specyfikację dla ContactStore.sorted_ids().
+    Args:
+        text: Nazwy pól oddzielone przecinkami; '-' przed nazwą oznacza
+              kolejność malejącą (np. 'last_name,-first_name')
+    Returns:
+        list: Pary (numer pola, malejąco)
+    Raises:
+        argparse.ArgumentTypeError: Gdy nazwa pola jest nieznana
+    """
+    spec = []
+    for name in text.split(','):
+        name = name.strip()
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        if name not in FIELDS:
+            raise argparse.ArgumentTypeError(
+                f"nieznane pole '{name}' (dostępne: {', '.join(FIELDS)})")
+        spec.append((FIELDS.index(name), descending))
+    return spec
+
+
+def print_contacts(contacts, output_format, out=None):
+    """
+    Wypisuje kontakty jako wyrównaną tabelę lub CSV.
+    Args:
+        contacts: Lista kontaktów
+        output_format: 'table' lub 'csv'
+        out: Strumień wyjściowy (domyślnie sys.stdout)
+    """
+    out = out or sys.stdout
+    if output_format == 'csv':
+        csv.writer(out).writerows(contacts)
+        return
+    widths = [len(title) for title in COLUMN_TITLES]
+    for contact in contacts:
+        for column, value in enumerate(contact):
+            widths[column] = max(widths[column], len(value))
+    rows = [COLUMN_TITLES] + list(contacts)
+    for row in rows:
+        out.write("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() + "\n")
+
+
+def print_errors(errors, prefix=""):
+    """
+    Wypisuje błędy walidacji na standardowe wyjście błędów.
+    Args:
+        errors: Lista błędów (FieldError)
+        prefix: Tekst poprzedzający każdy komunikat (np. numer wiersza)
+    """
+    for error in errors:
+        print(f"{prefix}{error.field}: {error.message}", file=sys.stderr)
+
+
+def select_ids(store, ids, args):
+    """
+    Sortuje i przycina wynik zgodnie z opcjami --sort i --limit.
+    Args:
+        store: Model kontaktów
+        ids: Identyfikatory kontaktów (None - wszystkie)
+        args: Argumenty polecenia
+    Returns:
+        list: Identyfikatory kontaktów lub None (wszystkie w kolejności dodawania)
+    """
+    if args.sort:
+        ids = store.sorted_ids(args.sort, subset=ids)
+    if args.limit is not None:
+        ids = (store.contact_ids if ids is None else ids)[:args.limit]
+    return ids
+
+
+def select_contacts(store, ids, args):
+    """
+    Zwraca kontakty do wypisania (po sortowaniu i przycięciu, jak select_ids).
+    Returns:
+        list: Kontakty do wypisania
+    """
+    ids = select_ids(store, ids, args)
+    if ids is None:
+        ids = store.contact_ids
+    return [store.get(contact_id) for contact_id in ids]
+
+
+def command_add(store, args):
+    """Dodaje jeden kontakt"""
+    try:
+        store.add([args.first_name, args.last_name, args.nick, args.phone, args.email],
+                  check_duplicates=not args.allow_duplicate)
+    except ValidationError as e:
+        print_errors(e.errors)
+        return 1
+    except DuplicateContactError as e:
+        for contact_id, reasons in e.duplicates:
+            print(f"Możliwy duplikat: {', '.join(store.get(contact_id))} "
+                  f"({describe_reasons(reasons)})", file=sys.stderr)
+        print("Kontakt nie został dodany (użyj --allow-duplicate, aby dodać mimo to)",
+              file=sys.stderr)
+        return 1
+    print("Kontakt został dodany")
+    return 0
+
+
+def command_list(store, args):
+    """Wypisuje wszystkie kontakty"""
+    print_contacts(select_contacts(store, None, args), args.format)
+    return 0
+
+
+def command_search(store, args):
+    """Wypisuje kontakty pasujące do zapytania (z --fuzzy - od najtrafniejszego)"""
+    if args.fuzzy:
+        ranked = store.fuzzy_search(args.query)
+        ids = None if ranked is None else [contact_id for contact_id, _ in ranked]
+    else:
+        ids = store.search(args.query)
+    print_contacts(select_contacts(store, ids, args), args.format)
+    return 0
+
+
+def command_duplicates(store, args):
+    """Wypisuje grupy możliwych duplikatów lub scala każdą grupę w jej pierwszy kontakt"""
+    groups = store.find_duplicates(max_name_block=args.max_name_block)
+    if args.limit is not None:
+        groups = groups[:args.limit]
+    if not args.merge:
+        for number, group in enumerate(groups, 1):
+            print(f"Grupa {number} ({len(group.contact_ids)} kontaktów): "
+                  f"{describe_reasons(group.reasons)}")
+            for contact_id in group.contact_ids:
+                print("  " + ", ".join(store.get(contact_id)))
+        print(f"Grup możliwych duplikatów: {len(groups)}")
+        return 0
+    merged = 0
+    for group in groups:
+        try:
+            store.merge(group.contact_ids)
+        except ValidationError as e:
+            print_errors(e.errors, prefix=f"{', '.join(store.get(group.contact_ids[0]))}: ")
+            continue
+        merged += len(group.contact_ids) - 1
+    print(f"Scalono grup: {len(groups)}, usunięto kontaktów: {merged}")
+    return 0
+
+
+def command_import(store, args):
+    """Importuje kontakty z pliku CSV lub vCard (jeden zapis pliku na koniec)"""
+    report = import_into(store, args.source, file_format=args.format,
+                         batch_size=args.batch_size, workers=args.workers)
+    if args.report:
+        report.write(args.report)
+    else:
+        for line, errors in report.rejected:
+            print_errors(errors, prefix=f"{args.source}:{line}: ")
+    print(report.summary())
+    return 1 if report.rejected else 0
+
+
+def command_export(store, args):
+    """
+    Eksportuje kontakty strumieniowo do pliku (CSV, vCard, JSON Lines,
+    opcjonalnie .gz/.zst) lub na standardowe wyjście ('-')
+    """
+    contacts = store.iter_contacts(select_ids(store, None, args))
+    if args.target == '-':
+        sys.stdout.flush()
+        write_contacts(contacts, sys.stdout.buffer, args.export_format or 'csv')
+        sys.stdout.buffer.flush()
+        return 0
+    file_format, compression = args.export_format, args.compress
+    try:
+        if file_format is None:
+            file_format, detected = detect_export_format(args.target)
+            compression = compression or detected
+        count = export_file(contacts, args.target, file_format, compression)
+    except (ValueError, RuntimeError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 2
+    print(f"Wyeksportowano kontaktów: {count}")
+    return 0
+
+
+def command_migrate(args):
+    """Jednorazowo przenosi kontakty z pliku CSV do bazy SQLite"""
+    if not is_sqlite_path(args.target):
+        print("Błąd: plik bazy musi mieć rozszerzenie .db, .sqlite lub .sqlite3", file=sys.stderr)
+        return 1
+    storage = SqliteStorage(args.target, migrate_from=args.source)
+    try:
+        contacts = storage.load()
+    finally:
+        storage.close()
+    if storage.migrated or not contacts:
+        print(f"Przeniesiono kontaktów: {storage.migrated}")
+    else:
+        print(f"Baza {args.target} była już wypełniona ({len(contacts)} kontaktów) - migracja pominięta")
+    return 0
+
+
+def command_serve(args):
+    """Udostępnia książkę kontaktów innym użytkownikom (sync_server.py) do Ctrl+C"""
+    def on_ready(server):
+        print(f"Książka {args.file} dostępna pod adresem http://{server.host}:{server.port} "
+              f"(Ctrl+C kończy)", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(args.file, args.host, args.port, on_ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser():
+    """
+    Tworzy parser argumentów wiersza poleceń.
+    Returns:
+        argparse.ArgumentParser: Parser z poleceniami add, list, search, export,
+                                 duplicates, import, migrate i serve
+    """
+    parser = argparse.ArgumentParser(description="Menedżer kontaktów - wiersz poleceń")
+    parser.add_argument('--file', default='contacts.csv',
+                        help="plik CSV lub baza SQLite (.db) z kontaktami albo adres serwera "
+                             "(http://host:port, polecenie serve; domyślnie contacts.csv)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="dodaj kontakt")
+    add.add_argument('first_name', help="imię")
+    add.add_argument('last_name', help="nazwisko")
+    add.add_argument('phone', help="telefon (9 cyfr lub +kod kraju)")
+    add.add_argument('email', help="adres email")
+    add.add_argument('--nick', default='', help="nick")
+    add.add_argument('--allow-duplicate', action='store_true',
+                     help="dodaj kontakt mimo tego samego telefonu lub adresu email")
+    add.set_defaults(handler=command_add)
+
+    listing = commands.add_parser('list', help="wypisz kontakty")
+    search = commands.add_parser('search', help="wyszukaj kontakty")
+    search.add_argument('query', help="szukany tekst (początki słów lub fragment numeru)")
+    search.add_argument('--fuzzy', action='store_true',
+                        help="wyszukiwanie przybliżone: literówki i brak polskich znaków")
+    export = commands.add_parser('export', help="eksportuj kontakty do CSV, vCard lub JSON Lines")
+    export.add_argument('target', help="plik docelowy (format według rozszerzenia: .csv, .vcf, "
+                                       ".jsonl, opcjonalnie z .gz lub .zst) lub '-' dla "
+                                       "standardowego wyjścia")
+    export.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS,
+                        help="format pliku (domyślnie według rozszerzenia)")
+    export.add_argument('--compress', choices=COMPRESSIONS,
+                        help="kompresja (domyślnie według rozszerzenia)")
+    for command in (listing, search, export):
+        command.add_argument('--sort', type=parse_sort,
+                             help=f"pola sortowania oddzielone przecinkami, '-' - malejąco ({', '.join(FIELDS)})")
+        command.add_argument('--limit', type=int, help="maksymalna liczba kontaktów")
+    for command in (listing, search):
+        command.add_argument('--format', choices=('table', 'csv'), default='table',
+                             help="format wyjścia (domyślnie table)")
+    listing.set_defaults(handler=command_list)
+    search.set_defaults(handler=command_search)
+    export.set_defaults(handler=command_export)
+
+    duplicates = commands.add_parser('duplicates', help="wyszukaj i scal możliwe duplikaty")
+    duplicates.add_argument('--merge', action='store_true',
+                            help="scal każdą grupę w jej pierwszy kontakt (puste pola są uzupełniane)")
+    duplicates.add_argument('--limit', type=int, help="maksymalna liczba grup")
+    duplicates.add_argument('--max-name-block', type=int, default=MAX_NAME_BLOCK,
+                            help="maksymalny rozmiar grupy łączonej tylko po podobnym imieniu "
+                                 f"i nazwisku (0 - bez łączenia po imieniu; domyślnie {MAX_NAME_BLOCK})")
+    duplicates.set_defaults(handler=command_duplicates)
+
+    import_ = commands.add_parser('import', help="importuj kontakty z pliku CSV lub vCard")
+    import_.add_argument('source', help="plik CSV (imię, nazwisko, nick, telefon, email) lub vCard")
+    import_.add_argument('--format', choices=('csv', 'vcard'),
+                         help="format pliku (domyślnie rozpoznawany automatycznie)")
+    import_.add_argument('--workers', type=int, default=0,
+                         help="liczba procesów walidujących (domyślnie 0 - bieżący proces)")
+    import_.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                         help=f"liczba rekordów w porcji walidacji (domyślnie {BATCH_SIZE})")
+    import_.add_argument('--report', help="zapisz odrzucone wiersze i duplikaty do pliku CSV")
+    import_.set_defaults(handler=command_import)
+
+    migrate = commands.add_parser('migrate', help="przenieś kontakty z pliku CSV do bazy SQLite")
+    migrate.add_argument('source', help="plik CSV z kontaktami (razem z jego dziennikiem)")
+    migrate.add_argument('target', help="plik bazy SQLite (.db)")
+
+    server = commands.add_parser('serve', help="udostępnij książkę innym użytkownikom (serwer HTTP)")
+    server.add_argument('--host', default=DEFAULT_HOST,
+                        help=f"adres nasłuchiwania (domyślnie {DEFAULT_HOST} - tylko ten komputer)")
+    server.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"port (domyślnie {DEFAULT_PORT})")
+    return parser
+
+
+def main(argv=None):
+    """
+    Uruchamia polecenie wiersza poleceń.
+    Args:
+        argv: Argumenty (domyślnie sys.argv[1:])
+    Returns:
+        int: Kod wyjścia
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == 'migrate':
+        try:
+            return command_migrate(args)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Błąd: {e}", file=sys.stderr)
+            return 1
+    if args.command == 'serve':
+        try:
+            return command_serve(args)
+        except (OSError, sqlite3.Error, StorageError) as e:
+            print(f"Błąd: {e}", file=sys.stderr)
+            return 1
+    store = ContactStore(args.file)
+    try:
+        # Plik CSV jest czytany na żądanie - list/export z --limit dekodują tylko
+        # potrzebne wiersze; pozostałe polecenia wczytują całą książkę
+        store.load(lazy=True)
+        return args.handler(store, args)
+    except (OSError, sqlite3.Error, StorageError, SyncError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
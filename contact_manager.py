@@ -4,17 +4,32 @@
 
 Детальний опис функцій:
 
-1. __init__(self, root):
+1. __init__(self, root, path='contacts.csv'):
    - Ініціалізує головне вікно програми
    - Встановлює розмір вікна та заголовок
    - Створює всі елементи інтерфейсу
-   - Ініціалізує змінні для зберігання контактів
+   - Створює модель контактів (contact_store.ContactStore) для вказаного файлу
+
+1a. ContactStore (contact_store.py):
+   - Зберігає контакти, ідентифікатори, ключі сортування та індекс пошуку
+   - Перевіряє та зберігає зміни без tkinter
+   - Вікно програми лише відображає модель; той самий клас використовує
+     командний рядок (cli.py: add, list, search, import, export)
+   - Контакти зберігаються в компактній стовпцевій таблиці
+     (contact_table.ContactTable): повторювані імена, прізвища та домени
+     email зберігаються один раз, телефони та email - байтами в одному буфері
 
 2. create_input_fields(self):
    - Створює поля введення для даних контакту
    - Включає поля: ім'я, прізвище, нік, телефон, email
    - Розміщує поля у сітці з відповідними мітками
 
+2a. create_search_bar(self), apply_search(self):
+   - Створює поле пошуку, яке фільтрує таблицю під час введення
+   - Пошук з затримкою (debounce), щоб не блокувати інтерфейс
+   - Використовує інвертований індекс (search_index.SearchIndex) за ім'ям,
+     прізвищем, ніком, цифрами телефону та email
+
 3. create_buttons(self):
    - Створює кнопки для основних дій
    - Додає кнопки: Додати, Оновити, Видалити
@@ -29,6 +44,16 @@
    - Додає можливість сортування за стовпцями
    - Додає прокрутку для великої кількості контактів
 
+5a. enable_virtual_table(self), refresh_virtual_rows(self):
+   - Віртуальний режим таблиці для дуже великих списків
+   - У таблиці існують лише рядки, видимі у вікні (плюс невеликий запас)
+   - Положення смуги прокрутки відображається на список self.contacts
+
+5b. contact_index(self, contact_id):
+   - Кожен контакт має постійний ідентифікатор (self.contact_ids)
+   - Ідентифікатор рядка таблиці дорівнює ідентифікатору контакту
+   - Повертає поточний індекс контакту в self.contacts (бінарний пошук)
+
 6. toggle_theme(self):
    - Перемикає між світлою та темною темою
    - Оновлює текст кнопки теми
@@ -37,15 +62,19 @@
    - Застосовує обрану тему до всіх елементів інтерфейсу
    - Встановлює кольори фону та тексту
 
-8. sort_column(self, column):
+8. sort_column(self, column, extend=False):
    - Сортує дані в таблиці за вибраним стовпцем
    - Змінює напрямок сортування при повторному кліку
    - Оновлює відображення стрілок сортування
+   - Сортування виконується в моделі (sorting.ContactSorter) з кешованими ключами
+   - Shift+клік додає стовпець до багатостовпцевого сортування
 
 9. validate_name(self, name, field_name):
    - Перевіряє коректність введеного імені/прізвища
    - Перевіряє наявність тільки літер
    - Виводить повідомлення про помилку при невалідних даних
+   - Самі перевірки знаходяться в модулі validation і повертають
+     опис помилки (поле, код, повідомлення) замість діалогового вікна
 
 10. validate_phone(self, phone):
     - Перевіряє правильність номера телефону
@@ -80,28 +109,181 @@
     - Завантажує контакти з CSV файлу
     - Створює записи в таблиці для кожного контакту
 
+16a. load_contacts_async(self):
+    - Завантажує контакти у фоновому потоці під час запуску
+    - Передає порції рядків до інтерфейсу через root.after
+    - Показує індикатор прогресу; перегляд і пошук доступні одразу
+
+16b. import_contacts(self):
+    - Імпортує контакти з файлів CSV або vCard у фоновому потоці
+    - Перевіряє записи пакетами, відкидає дублікати за телефоном та email
+    - Помилкові рядки збираються в один звіт замість окремих повідомлень
+    - Усі імпортовані контакти зберігаються одним записом файлу
+
+16c. load_contacts_lazy(self):
+    - Режим читання на вимогу (python contact_manager.py --lazy contacts.csv)
+    - Файл CSV відображається в пам'ять (mmap), зберігається лише масив
+      зміщень рядків; рядок декодується, коли таблиця його показує
+    - Масив зміщень записується поруч (contacts.csv.rows) з розміром і часом
+      зміни файлу - повторне відкриття незміненої книги майже миттєве
+    - Перше редагування, пошук, сортування або пошук дублікатів
+      завантажує всі контакти в пам'ять (ContactStore.materialize)
+
+16d. export_contacts(self), cancel_export(self):
+    - Експорт поточного вигляду (фільтр і сортування) або виділених
+      контактів у CSV, vCard 4.0 чи JSON Lines; розширення .gz або .zst
+      додає стиснення gzip або zstd (пакет zstandard)
+    - Контакти кодуються та записуються порціями у фоновому потоці
+      (exporter.export_file) - пам'ять не залежить від розміру книги
+    - Смуга прогресу та кнопка "Anuluj"; скасований експорт не залишає
+      неповного файлу
+
 17. save_contacts(self):
-    - Зберігає всі контакти у CSV файл
+    - Повний запис усіх контактів у CSV файл
+    - Окремі зміни модель дописує в журнал (contacts.csv.journal)
     - Використовує UTF-8 кодування для підтримки Unicode
 
+17a. SqliteStorage (sqlite_storage.py):
+   - Для файлу .db (python contact_manager.py contacts.db) контакти
+     зберігаються в базі SQLite замість CSV
+   - Кожна зміна - одна команда INSERT/UPDATE/DELETE в режимі WAL
+   - Індекси за нормалізованим телефоном, email та прізвищем
+   - При першому відкритті порожньої бази контакти переносяться з CSV
+
+17b. find_duplicates(self), show_duplicates(self, groups),
+     merge_selected_duplicates(self):
+   - Шукає можливі дублікати у фоновому потоці (duplicates.find_duplicates)
+   - Контакти групуються за ключами блокування (телефон E.164, email,
+     фонетичний ключ імені та прізвища) - майже лінійний час замість
+     порівняння кожної пари
+   - Окреме вікно показує групи; кнопка "Scal" об'єднує групу в один контакт
+   - add_contact перевіряє можливий дублікат за O(1) і питає, чи додати контакт
+
+17c. BackgroundStorage (background_storage.py), _poll_save_status(self):
+   - Зміни записуються на диск у фоновому потоці, а не в потоці інтерфейсу
+   - Серія редагувань за save_interval секунд - один запис (одна порція
+     журналу з одним fsync або одна транзакція SQLite)
+   - Кілька повних записів поспіль об'єднуються в один запис файлу
+   - Напис у нижній частині вікна: "Zapisywanie..." / "Zapisano" / помилка
+
+17d. Diagnostics (diagnostics.py), --diagnostics, --profile:
+   - Вмикається прапорцем або змінною середовища CONTACTS_DIAGNOSTICS=1;
+     без них програма не виконує жодних додаткових вимірювань
+   - Обгортає load_contacts, save_contacts, sort_column, item_selected,
+     валідатори та вставку рядків у таблицю вимірюванням часу
+     (гістограми з p50/p95 для кожного виклику)
+   - Вимірює затримку циклу подій Tk (наскільки пізніше виконується root.after)
+   - Вікно "Diagnostyka" (кнопка або F12) показує таблицю вимірювань
+   - --profile ШЛЯХ: при закритті зберігає ШЛЯХ.prof (cProfile/pstats)
+     та ШЛЯХ.folded (стеки для flamegraph.pl і speedscope)
+
+17e. BookLibrary (books.py), create_sidebar(self), switch_book(self, path),
+     search_all_books(self):
+   - Кілька книг контактів (файли CSV або бази SQLite) у списку зліва;
+     повністю завантажується лише активна книга
+   - Нещодавно використані книги залишаються в пам'яті (кеш LRU), тому
+     повернення до них - лише заміна моделі без читання файлу
+   - Книги понад бюджет пам'яті (--cache-mb) записуються на диск
+     і звільняються; активна книга ніколи не витісняється
+   - "We wszystkich książkach" шукає в усіх книгах: книги в пам'яті - через
+     індекс, інші переглядаються у фоновому потоці без змін на диску
+
+17f. FuzzyIndex (fuzzy_search.py), run_search(self, query, candidates=None):
+   - Прапорець "Przybliżone" біля поля пошуку вмикає пошук з помилками
+     друку та без польських літер ('wojcik' знаходить 'Wójcik',
+     'kowalsky' - 'Kowalski')
+   - Словник слів імен, прізвищ, email та адрес з індексом триграм:
+     кандидати з близькими триграмами перевіряються обмеженою відстанню
+     редагування (до 2 змін), тому час не залежить від кількості контактів
+   - Результати впорядковані від найкращого збігу (не більше 500);
+     сортування за стовпцем і вибір рядка (item_selected) працюють як завжди
+   - Словник будується при першому наближеному пошуку і далі оновлюється
+     при редагуванні
+
+17g. undo(self), redo(self), show_contact_history(self), History (history.py):
+   - "Cofnij" / "Ponów" (Ctrl+Z, Ctrl+Y або Ctrl+Shift+Z) скасовують
+     і повторюють додавання, редагування, видалення та об'єднання
+     дублікатів; змінені рядки таблиці оновлюються без перебудови
+   - Редагування зберігається як різниця змінених полів, стек обмежений
+     (1000 змін), тому пам'ять не росте з часом роботи
+   - Журнал змін (файл .history поруч з книгою) переживає перезапуск;
+     "Historia" показує зміни виділеного контакту
+
+17h. start_sync(self), apply_remote_changes(self, response),
+     ContactService/SyncServer (sync_server.py), RemoteStorage (sync_client.py):
+   - Книга може бути адресою сервера ('python cli.py serve', потім
+     'python contact_manager.py http://127.0.0.1:8765') - файл відкриває
+     лише сервер, тому користувачі не перезаписують зміни один одного
+   - Кожен контакт має номер версії: редагування і видалення чужого
+     зміненого контакту відхиляється сервером (оптимістичне блокування)
+   - Фоновий потік отримує лише зміни після відомої версії (long polling),
+     таблиця оновлює тільки змінені рядки
+
+17i. StartupTimer, load_snapshot, save_snapshot (startup.py), --fast-start,
+     load_contacts_snapshot(self), finish_startup(self):
+   - Режим швидкого старту (прапорець або CONTACTS_FAST_START=1)
+   - При закритті модель книги (таблиця контактів та індекс пошуку) і тема
+     вікна зберігаються в бінарний знімок (contacts.csv.snapshot, pickle);
+     наступний старт читає знімок замість розбору CSV, якщо розмір і час
+     зміни файлу та журналу не змінилися
+   - Список книг створюється після показу вікна; модулі для імпорту,
+     синхронізації (http.client) тощо імпортуються при першому використанні
+   - Час імпортів, побудови вікна та завантаження виводиться в stderr
+     з бюджетом часу імпортів ('python startup.py' перевіряє бюджет)
+
+18. on_close(self):
+    - Дописує зміни, що чекають на запис, завершує фонове ущільнення
+      журналу та закриває вікно
+    - У режимі швидкого старту зберігає знімки відкритих книг
+
 """
 """
 Menedżer kontaktów - aplikacja do zarządzania listą kontaktów
 Wykorzystane biblioteki:
 - tkinter: biblioteka do tworzenia interfejsu graficznego
-- csv: do obsługi plików CSV (zapis/odczyt kontaktów)
-- re: do walidacji adresów email za pomocą wyrażeń regularnych
-- os: do sprawdzania istnienia plików
+- argparse: argumenty wiersza poleceń (książki, --books-dir, --cache-mb, --lazy,
+  --diagnostics, --profile, --fast-start)
+- time, sys: pomiar czasu startu wypisywany na stderr
+- threading, queue: wczytywanie kontaktów w tle i przekazywanie porcji do interfejsu
+- background_storage: zapis zmian w wątku w tle (łączenie edycji w jeden zapis)
+- books: lista książek kontaktów z pamięcią podręczną LRU i wyszukiwaniem we wszystkich
+- lazy_csv (przez contact_store): odczyt pliku CSV na żądanie w trybie --lazy
+- contact_store: model kontaktów niezależny od interfejsu (zapis, sortowanie, wyszukiwanie)
+- validation: walidacja danych kontaktu zwracająca opisy błędów
+- search_index: przygotowanie danych indeksu wyszukiwania w wątku wczytującym
+- fuzzy_search (przez contact_store): wyszukiwanie przybliżone (literówki, bez polskich znaków)
+- startup: szybki start (migawka książki i motywu, pomiar czasu startu)
+Moduły poleceń są importowane dopiero w poleceniach, które ich używają (krótszy start okna):
+- importer: import wsadowy kontaktów z plików CSV i vCard
+- exporter: strumieniowy eksport do CSV, vCard, JSON Lines (gzip, zstd)
+- duplicates: wyszukiwanie i scalanie duplikatów
+- history: historia zmian z cofaniem i ponawianiem
+- sync_client: książka na serwerze (sync_server.py) - zmiany innych użytkowników w tle
+- diagnostics: opcjonalne pomiary czasu wywołań, opóźnienia pętli zdarzeń i profil
 """
 
-import tkinter as tk
-from tkinter import ttk, messagebox
-import csv
-import re
-import os
+import time
+
+# Początek importów - czas importów jest raportowany w trybie --fast-start
+IMPORT_STARTED = time.perf_counter()
 
-class ValidationError(Exception):
-    """Własna klasa wyjątków do obsługi błędów walidacji danych"""
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import argparse
+import queue
+import sys
+import threading
+
+from background_storage import FAILED, PENDING, SAVED, SAVING, BackgroundStorage
+from books import DEFAULT_MEMORY_BUDGET, BookLibrary, book_key, book_name, discover_books, scan_book
+from contact_store import ContactStore, DuplicateContactError, StorageError, create_storage
+from contact_table import ContactTable
+from search_index import prepare_entries
+from startup import StartupTimer, fast_start_from_environment, load_snapshot, read_settings, save_snapshot
+from validation import ValidationError, check_email, check_name, check_phone
+
+class LoadCancelled(Exception):
+    """Przerwanie wczytywania w tle (zamknięcie okna)"""
     pass
 
 class ContactManager:
@@ -109,34 +291,429 @@ class ContactManager:
     Główna klasa aplikacji do zarządzania kontaktami.
     Obsługuje dodawanie, edycję, usuwanie i wyświetlanie kontaktów.
     """
-    def __init__(self, root):
+    # Liczba kontaktów, od której tabela automatycznie przechodzi w tryb wirtualny
+    VIRTUAL_TABLE_THRESHOLD = 10000
+    # Liczba dodatkowych wierszy tworzonych poza widocznym obszarem tabeli
+    VIRTUAL_BUFFER_ROWS = 2
+    # Opóźnienie wyszukiwania po ostatnim naciśnięciu klawisza (ms)
+    SEARCH_DELAY_MS = 150
+    # Odstęp między przenoszeniem porcji wczytanych w tle (ms)
+    LOAD_POLL_MS = 30
+    # Maksymalny czas pracy wątku interfejsu w jednym kroku wczytywania (s)
+    LOAD_TIME_BUDGET = 0.02
+    # Maksymalna liczba grup pokazywanych w oknie duplikatów
+    MAX_DUPLICATE_GROUPS_SHOWN = 500
+    # Odstęp między odświeżeniami napisu o stanie zapisu (ms)
+    SAVE_STATUS_POLL_MS = 200
+    # Maksymalna liczba wyników z jednej książki w wyszukiwaniu we wszystkich książkach
+    MAX_BOOK_SEARCH_RESULTS = 200
+    # Czas oczekiwania serwera na zmiany w jednym żądaniu synchronizacji (s)
+    SYNC_WAIT = 25
+    # Odstęp przed ponownym połączeniem po błędzie synchronizacji (s)
+    SYNC_RETRY_DELAY = 5
+    # Odstęp między przenoszeniem zmian z serwera do tabeli (ms)
+    SYNC_POLL_MS = 200
+
+    def __init__(self, root, virtual_table=None, async_load=True, path='contacts.csv',
+                 save_interval=1.0, lazy=False, diagnostics=None, books=(),
+                 memory_budget=DEFAULT_MEMORY_BUDGET, startup=None):
         """
         Inicjalizacja aplikacji.
         Args:
             root: Główne okno aplikacji (instancja tk.Tk)
+            virtual_table: Czy używać wirtualnej tabeli (None - automatycznie
+                           dla list dłuższych niż VIRTUAL_TABLE_THRESHOLD)
+            async_load: Czy wczytywać kontakty w tle (okno pojawia się od razu)
+            path: Ścieżka do pliku CSV z kontaktami lub adres serwera
+                  (np. 'http://127.0.0.1:8765', sync_server.py)
+            save_interval: Minimalny odstęp między zapisami na dysk (s);
+                           zmiany z tego okresu są zapisywane razem
+            lazy: Czy otworzyć plik CSV w trybie odczytu na żądanie
+                  (wiersze dekodowane przy wyświetlaniu)
+            diagnostics: Obiekt diagnostics.Diagnostics mierzący czas wywołań
+                         (None - bez pomiarów)
+            books: Ścieżki pozostałych książek pokazywanych na liście po lewej
+                   (wczytywanych dopiero po wybraniu)
+            memory_budget: Budżet pamięci wczytanych książek (bajty); najdawniej
+                           używane książki ponad budżet są zapisywane i zwalniane
+            startup: Obiekt startup.StartupTimer włączający szybki start
+                     (książka i motyw z migawki, lista książek tworzona po
+                     pokazaniu okna, czasy startu na stderr); None - zwykły start
         """
         self.root = root
         self.root.title("Menedżer kontaktów")
         self.root.geometry("800x600")
         
-        # Inicjalizacja zmiennych dla motywu
-        self.is_dark_theme = True
+        # Inicjalizacja zmiennych dla motywu (przy szybkim starcie - motyw
+        # zapisany w migawce książki)
+        self.startup = startup
+        settings = read_settings(path) if startup is not None else {}
+        self.is_dark_theme = settings.get('dark_theme', True)
         self.style = ttk.Style()
         self.style.theme_use('clam')
         
         # Indeks aktualnie wybranego kontaktu
         self.selected_index = None
+
+        # Tryb wirtualnej tabeli (wybierany przy ładowaniu, jeśli None);
+        # wartość z konstruktora obowiązuje też po przełączeniu książki
+        self.virtual_table = virtual_table
+        self._virtual_table_option = virtual_table
+        self.async_load = async_load
+        self.lazy = lazy
+        self.save_interval = save_interval
+
+        # Pomiary czasu - metody są opakowywane przed utworzeniem widżetów,
+        # żeby przyciski i powiązania zdarzeń wywoływały wersje mierzone
+        self.diagnostics = diagnostics
+        if diagnostics is not None:
+            from diagnostics import APP_METHODS
+            diagnostics.instrument(self, APP_METHODS, 'okno')
+
+        # Książki kontaktów: wczytywana jest tylko aktywna, ostatnio używane
+        # zostają w pamięci podręcznej LRU (books.BookLibrary)
+        self.books = BookLibrary([path, *books], memory_budget, store_factory=self.create_store)
+        self.book_path = self.books.add_book(path)
+        # Model aktywnej książki - zmiany dopisywane do dziennika obok pliku CSV
+        # przez wątek zapisujący w tle
+        self.store = self.books.create(self.book_path)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
-        # Tworzenie elementów interfejsu
+        # Tworzenie elementów interfejsu; przy szybkim starcie lista książek
+        # powstaje dopiero po pokazaniu okna (finish_startup)
+        self.book_list = None
+        if startup is None:
+            self.create_sidebar()
         self.create_input_fields()
+        self.create_search_bar()
         self.create_buttons()
         self.create_contact_table()
         self.create_theme_toggle()
-        
-        # Lista przechowująca wszystkie kontakty
-        self.contacts = []
-        self.apply_theme(True)
+        self.create_status_bar()
+        self.apply_theme(self.is_dark_theme)
+        if diagnostics is not None:
+            diagnostics.start(self.root)
+        if startup is not None:
+            startup.mark('okno')
+
+        # Stan wczytywania w tle
+        self.loading = False
+        self._load_cancelled = False
+        self._load_thread = None
+        self._import_thread = None
+        self._duplicates_thread = None
+        self._export_thread = None
+        self.duplicates_window = None
+        self._book_search_thread = None
+        self.book_search_window = None
+        self._sync_thread = None
+        method = self.open_book()
+        if startup is not None:
+            startup.mark('kontakty', method)
+            self.root.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        """
+        Kończy szybki start po pierwszym wolnym przejściu pętli zdarzeń
+        (okno jest już pokazane): tworzy listę książek i wypisuje czasy startu.
+        """
+        self.create_sidebar()
+        self.apply_theme(self.is_dark_theme)
+        self.startup.mark('lista książek i pierwsze rysowanie')
+        print(self.startup.report(), file=sys.stderr)
+
+    def create_store(self, path):
+        """
+        Tworzy niewczytany model książki z zapisem w wątku w tle.
+        Książka na serwerze wysyła zmiany od razu (RemoteStorage) - odrzucenie
+        zmiany przez serwer musi być zgłoszone przy edycji.
+        Args:
+            path: Ścieżka do pliku kontaktów lub adres serwera
+        Returns:
+            ContactStore: Model książki
+        """
+        from sync_client import is_server_url
+
+        storage = create_storage(path)
+        if not is_server_url(path):
+            storage = BackgroundStorage(storage, interval=self.save_interval)
+        store = ContactStore(path, storage=storage)
+        if self.diagnostics is not None:
+            from diagnostics import STORE_METHODS
+            self.diagnostics.instrument(store, STORE_METHODS, 'model')
+        return store
+
+    def create_sidebar(self):
+        """Tworzy listę książek kontaktów po lewej stronie okna"""
+        self.sidebar = ttk.Frame(self.root)
+        # Lista tworzona po pokazaniu okna trafia przed pozostałe widżety,
+        # więc układ jest taki sam jak przy zwykłym starcie
+        packed = self.root.pack_slaves()
+        self.sidebar.pack(side="left", fill="y", padx=(10, 0), pady=5,
+                          before=packed[0] if packed else None)
+
+        ttk.Label(self.sidebar, text="Książki:").pack(anchor="w")
+        self.book_list = tk.Listbox(self.sidebar, width=22, exportselection=False,
+                                    activestyle="none")
+        self.book_list.pack(fill="y", expand=True, pady=5)
+        self.book_list.bind('<<ListboxSelect>>', self.on_book_selected)
+        ttk.Button(self.sidebar, text="Dodaj książkę...", command=self.add_book).pack(fill="x")
+        self.memory_label = ttk.Label(self.sidebar, text="")
+        self.memory_label.pack(anchor="w", pady=5)
+        self.refresh_sidebar()
+
+    def refresh_sidebar(self):
+        """
+        Odświeża listę książek: wczytane (w pamięci podręcznej) są oznaczone
+        kropką, aktywna jest zaznaczona.
+        """
+        if self.book_list is None:
+            # Szybki start - lista zostanie wypełniona po utworzeniu
+            return
+        self.book_list.delete(0, "end")
+        for path in self.books.paths:
+            mark = "● " if self.books.cached(path) else "   "
+            self.book_list.insert("end", mark + book_name(path))
+        position = self.books.paths.index(self.book_path)
+        self.book_list.selection_clear(0, "end")
+        self.book_list.selection_set(position)
+        self.book_list.see(position)
+        usage = self.books.memory_usage() / (1024 * 1024)
+        budget = self.books.memory_budget / (1024 * 1024)
+        self.memory_label.configure(text=f"Pamięć: {usage:.0f} / {budget:.0f} MB")
+
+    def on_book_selected(self, event):
+        """Przełącza okno na książkę wybraną z listy"""
+        selection = self.book_list.curselection()
+        if selection:
+            self.switch_book(self.books.paths[selection[0]])
+
+    def add_book(self):
+        """Dodaje książkę (istniejący lub nowy plik CSV albo bazę SQLite) i przełącza na nią"""
+        path = filedialog.asksaveasfilename(
+            title="Dodaj książkę kontaktów",
+            confirmoverwrite=False,
+            defaultextension=".csv",
+            filetypes=[("Książki kontaktów (CSV, SQLite)", "*.csv *.db *.sqlite *.sqlite3"),
+                       ("Wszystkie pliki", "*.*")]
+        )
+        if not path:
+            return
+        path = self.books.add_book(path)
+        self.refresh_sidebar()
+        self.switch_book(path)
+
+    def switch_book(self, path):
+        """
+        Przełącza okno na inną książkę kontaktów.
+        Książka z pamięci podręcznej jest pokazywana od razu (bez wczytywania
+        pliku); pozostałe są wczytywane jak przy starcie programu.
+        Args:
+            path: Ścieżka do książki z listy self.books
+        """
+        path = book_key(path)
+        if path == self.book_path:
+            return
+        if (self._import_thread is not None or self._duplicates_thread is not None
+                or self._export_thread is not None):
+            messagebox.showinfo("Książki", "Poczekaj na zakończenie importu, eksportu "
+                                           "lub wyszukiwania duplikatów")
+            self.refresh_sidebar()
+            return
+        if self._load_thread is not None:
+            # Przerwane wczytywanie - niepełny model nie zostaje w pamięci podręcznej
+            self.cancel_loading()
+            self.books.discard(self.book_path)
+        if self.duplicates_window is not None and self.duplicates_window.winfo_exists():
+            self.duplicates_window.destroy()
+        self.duplicates_window = None
+        self.stop_sync()
+
+        self.reset_table()
+        self.book_path = path
+        store = self.books.get(path)
+        if store is not None:
+            self.store = store
+            for button in self.action_buttons:
+                button.configure(state="normal")
+            self.show_contacts()
+            self.book_ready()
+        else:
+            self.store = self.books.create(path)
+            self.open_book()
+        if self.search_var.get():
+            self.apply_search()
+        self.root.title(f"Menedżer kontaktów - {book_name(path)}")
+
+    def open_book(self):
+        """
+        Wczytuje model aktywnej książki (self.store) wybraną metodą.
+        Returns:
+            str: Użyta metoda (opis do pomiaru czasu startu)
+        """
+        if self.startup is not None and self.load_contacts_snapshot():
+            return "migawka"
+        if self.lazy and self.load_contacts_lazy():
+            return "na żądanie"
+        if self.async_load:
+            self.load_contacts_async()
+            return "w tle"
         self.load_contacts()
+        return "plik"
+
+    def book_ready(self):
+        """
+        Wywoływane po wczytaniu aktywnej książki: zwalnia najdawniej używane
+        książki ponad budżet pamięci i odświeża listę książek.
+        """
+        try:
+            self.books.trim()
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Błąd podczas zapisywania zamykanej książki: {str(e)}")
+        self.refresh_sidebar()
+        self.start_sync()
+
+    def start_sync(self):
+        """
+        Zaczyna pobieranie zmian innych użytkowników, gdy aktywna książka
+        jest na serwerze. Wątek czeka na zmiany po stronie serwera (long
+        polling), a pętla Tk co SYNC_POLL_MS nakłada je na model i tabelę.
+        """
+        from sync_client import RemoteStorage
+
+        storage = self.store.storage
+        if not isinstance(storage, RemoteStorage) or self._sync_thread is not None:
+            return
+        self._sync_stop = threading.Event()
+        self._sync_queue = queue.Queue()
+        self._sync_thread = threading.Thread(
+            target=self._sync_worker, args=(storage, self._sync_stop, self._sync_queue),
+            name="contacts-sync", daemon=True)
+        self._sync_thread.start()
+        self._sync_job = self.root.after(self.SYNC_POLL_MS, self._poll_sync)
+
+    def stop_sync(self):
+        """
+        Kończy pobieranie zmian (wątek kończy się po bieżącym żądaniu;
+        książka z pamięci podręcznej pobierze zaległe zmiany po powrocie do niej).
+        """
+        if self._sync_thread is None:
+            return
+        self._sync_stop.set()
+        self._sync_thread = None
+        self.root.after_cancel(self._sync_job)
+
+    def _sync_worker(self, storage, stop, changes):
+        """
+        Wątek synchronizacji - nie korzysta z Tk ani z modelu, odpowiedzi
+        serwera trafiają do kolejki.
+        Args:
+            storage: RemoteStorage aktywnej książki (wersja początkowa)
+            stop: threading.Event kończący wątek
+            changes: Kolejka na odpowiedzi i błędy
+        """
+        from sync_client import DEFAULT_TIMEOUT, SyncClient, SyncError
+
+        # Osobne połączenie - RemoteStorage wysyła zmiany z wątku interfejsu
+        client = SyncClient(storage.path, timeout=self.SYNC_WAIT + DEFAULT_TIMEOUT)
+        since, epoch = storage.since, storage.epoch
+        failed = False
+        try:
+            while not stop.is_set():
+                try:
+                    response = client.changes(since, epoch, wait=self.SYNC_WAIT)
+                except SyncError as e:
+                    changes.put(('error', e))
+                    failed = True
+                    stop.wait(self.SYNC_RETRY_DELAY)
+                    continue
+                since, epoch = response['version'], response['epoch']
+                if failed or response['full'] or response['contacts'] or response['deleted']:
+                    # Pusta odpowiedź po błędzie - informacja o odzyskanym połączeniu
+                    changes.put(('changes', response))
+                    failed = False
+        finally:
+            client.close()
+
+    def _poll_sync(self):
+        """Nakłada zmiany pobrane z serwera, gdy edycja nie jest zablokowana"""
+        from sync_client import SyncError
+
+        if str(self.undo_button.cget("state")) != "disabled":
+            # Import, eksport i wyszukiwanie duplikatów czytają model w tle -
+            # zmiany czekają w kolejce do ich zakończenia
+            storage = self.store.storage
+            while True:
+                try:
+                    kind, data = self._sync_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'error':
+                    storage.status, storage.last_error = FAILED, data
+                else:
+                    if storage.status == FAILED and isinstance(storage.last_error, SyncError) \
+                            and storage.last_error.status is None:
+                        # Połączenie wróciło
+                        storage.status = SAVED
+                    self.apply_remote_changes(data)
+        self._sync_job = self.root.after(self.SYNC_POLL_MS, self._poll_sync)
+
+    def apply_remote_changes(self, response):
+        """
+        Nakłada zmiany innych użytkowników na model i odświeża zmienione wiersze.
+        Zaznaczenie zostaje, chyba że zmienił się zaznaczony kontakt - wtedy
+        jest usuwane, aby "Aktualizuj" nie nadpisał cudzej zmiany.
+        Args:
+            response: Odpowiedź serwera (sync_client.SyncClient.changes)
+        """
+        selected_id = None
+        if self.selected_index is not None:
+            selected_id = self.contact_ids[self.selected_index]
+        operations = self.store.storage.operations(self.contacts, response)
+        changes = [(operation[0], self.store.replay(operation)) for operation in operations]
+        if not changes:
+            return
+        touched = any(contact_id == selected_id for _, contact_id in changes)
+        self.apply_changes(changes, selected_id=None if touched else selected_id)
+        if touched:
+            messagebox.showwarning("Zmiana na serwerze",
+                                   "Wybrany kontakt został zmieniony lub usunięty przez "
+                                   "innego użytkownika - wybierz go ponownie")
+
+    def reset_table(self):
+        """
+        Czyści tabelę, pola i filtr przed pokazaniem innej książki
+        i przywraca tryb tabeli wybrany w konstruktorze.
+        """
+        self.tree.delete(*self.tree.get_children())
+        if self.virtual_table:
+            self.tree.configure(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.configure(command=self.tree.yview)
+            for sequence in ('<Configure>', '<MouseWheel>', '<Button-4>', '<Button-5>',
+                             '<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+                self.tree.unbind(sequence)
+        self.virtual_table = self._virtual_table_option
+        self._view = []
+        self._offset = 0
+        self._row_items = []
+        self.selected_index = None
+        self.search_results = None
+        self._search_query = ""
+        for var in (self.first_name_var, self.last_name_var, self.nickname_var,
+                    self.phone_var, self.email_var):
+            var.set("")
+
+    def show_contacts(self):
+        """Wypełnia tabelę kontaktami wczytanego modelu (self.store)"""
+        if self.virtual_table is None:
+            self.virtual_table = len(self.contacts) >= self.VIRTUAL_TABLE_THRESHOLD
+        if self.virtual_table:
+            self.enable_virtual_table()
+        else:
+            for contact_id, contact in zip(self.contact_ids, self.contacts):
+                self.tree.insert("", "end", iid=str(contact_id), values=contact)
+        if self.sort_columns:
+            self.refresh_view()
 
     def create_input_fields(self):
         """Tworzy pola wprowadzania danych kontaktu"""
@@ -170,14 +747,144 @@ class ContactManager:
         self.email_entry = ttk.Entry(input_frame, textvariable=self.email_var)
         self.email_entry.grid(row=1, column=3, sticky="w", padx=5, pady=2)
 
+    def create_search_bar(self):
+        """Tworzy pole wyszukiwania filtrujące tabelę podczas pisania"""
+        search_frame = ttk.Frame(self.root)
+        search_frame.pack(fill="x", padx=10, pady=5)
+
+        ttk.Label(search_frame, text="Szukaj:").pack(side="left", padx=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side="left", padx=5)
+        ttk.Button(
+            search_frame,
+            text="Wyczyść",
+            command=lambda: self.search_var.set("")
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            search_frame,
+            text="We wszystkich książkach",
+            command=self.search_all_books
+        ).pack(side="left", padx=5)
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            search_frame,
+            text="Przybliżone",
+            variable=self.fuzzy_var,
+            command=self.on_fuzzy_toggled
+        ).pack(side="left", padx=5)
+        self.search_status = ttk.Label(search_frame, text="")
+        self.search_status.pack(side="left", padx=5)
+
+        # Wynik bieżącego filtra (None - brak filtra)
+        self.search_results = None
+        self._search_query = ""
+        self._search_job = None
+        self.search_var.trace_add("write", self.on_search_changed)
+
+    def on_search_changed(self, *args):
+        """
+        Planuje wyszukiwanie po zmianie tekstu - kolejne naciśnięcia klawiszy
+        przesuwają termin, więc filtr liczony jest raz po przerwie w pisaniu.
+        """
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(self.SEARCH_DELAY_MS, self.apply_search)
+
+    def on_fuzzy_toggled(self):
+        """Przelicza filtr po włączeniu lub wyłączeniu wyszukiwania przybliżonego"""
+        # Wyniki drugiego trybu nie są podzbiorem poprzednich
+        self.search_results = None
+        self._search_query = ""
+        self.apply_search()
+
+    def run_search(self, query, candidates=None):
+        """
+        Wyszukuje kontakty w trybie wybranym w pasku wyszukiwania.
+        Args:
+            query: Tekst zapytania
+            candidates: Identyfikatory do sprawdzenia (tylko wyszukiwanie dokładne)
+        Returns:
+            list: Identyfikatory pasujących kontaktów - w kolejności tabeli lub,
+                  w trybie przybliżonym, od najtrafniejszego; None dla pustego zapytania
+        """
+        if self.fuzzy_var.get():
+            ranked = self.store.fuzzy_search(query)
+            return None if ranked is None else [contact_id for contact_id, _ in ranked]
+        return self.store.search(query, candidates)
+
+    def apply_search(self):
+        """
+        Filtruje tabelę według tekstu w polu wyszukiwania.
+        """
+        self._search_job = None
+        query = self.search_var.get()
+        fuzzy = self.fuzzy_var.get()
+        candidates = None
+        if (not fuzzy and self.search_results is not None and self._search_query
+                and query.startswith(self._search_query)):
+            # Dopisanie znaków tylko zawęża wynik - sprawdzane są poprzednie trafienia
+            candidates = self.search_results
+        self.search_results = self.run_search(query, candidates)
+        self._search_query = query if self.search_results is not None else ""
+        self._offset = 0
+        self.refresh_view()
+        if self.search_results is None:
+            self.search_status.configure(text="")
+        elif fuzzy:
+            self.search_status.configure(
+                text=f"Znaleziono: {len(self.search_results)} (przybliżone, od najtrafniejszego)")
+        else:
+            self.search_status.configure(text=f"Znaleziono: {len(self.search_results)}")
+
+    def current_order(self):
+        """
+        Zwraca identyfikatory kontaktów w kolejności wyświetlania
+        (z bieżącym sortowaniem i filtrem wyszukiwania).
+        """
+        if self.sort_columns:
+            columns = self.tree["columns"]
+            spec = [(columns.index(col), desc) for col, desc in self.sort_columns]
+            return self.store.sorted_ids(spec, subset=self.search_results)
+        if self.search_results is not None:
+            return self.search_results
+        return self.contact_ids
+
+    def refresh_view(self):
+        """
+        Wyświetla kontakty zgodnie z bieżącym sortowaniem i filtrem wyszukiwania.
+        """
+        order = self.current_order()
+        if self.virtual_table:
+            self._view = self._view_of(order)
+            self.refresh_virtual_rows()
+        else:
+            # Jedno wywołanie Tk ustala kolejność; pominięte wiersze są odłączane
+            self.tree.set_children('', *map(str, order))
+
     def create_buttons(self):
         """Tworzy przyciski akcji (dodaj, aktualizuj, usuń)"""
         button_frame = ttk.Frame(self.root)
         button_frame.pack(fill="x", padx=10, pady=5)
 
-        ttk.Button(button_frame, text="Dodaj", command=self.add_contact).pack(side="left", padx=5)
-        ttk.Button(button_frame, text="Aktualizuj", command=self.update_contact).pack(side="left", padx=5)
-        ttk.Button(button_frame, text="Usuń", command=self.delete_contact).pack(side="left", padx=5)
+        # Przyciski modyfikujące kontakty są blokowane podczas wczytywania
+        self.action_buttons = [
+            ttk.Button(button_frame, text="Dodaj", command=self.add_contact),
+            ttk.Button(button_frame, text="Aktualizuj", command=self.update_contact),
+            ttk.Button(button_frame, text="Usuń", command=self.delete_contact),
+            ttk.Button(button_frame, text="Cofnij", command=self.undo),
+            ttk.Button(button_frame, text="Ponów", command=self.redo),
+            ttk.Button(button_frame, text="Historia", command=self.show_contact_history),
+            ttk.Button(button_frame, text="Importuj", command=self.import_contacts),
+            ttk.Button(button_frame, text="Eksportuj", command=self.export_contacts),
+            ttk.Button(button_frame, text="Duplikaty", command=self.find_duplicates),
+        ]
+        for button in self.action_buttons:
+            button.pack(side="left", padx=5)
+        self.undo_button = self.action_buttons[3]
+        self.root.bind('<Control-z>', self.undo)
+        self.root.bind('<Control-y>', self.redo)
+        self.root.bind('<Control-Z>', self.redo)
 
     def create_theme_toggle(self):
         """Tworzy przycisk do zmiany motywu"""
@@ -186,11 +893,48 @@ class ContactManager:
         
         self.theme_button = ttk.Button(
             self.theme_frame, 
-            text="Zmień motyw (Ciemny)", 
+            text="Zmień motyw (Ciemny)" if self.is_dark_theme else "Zmień motyw (Jasny)",
             command=self.toggle_theme
         )
         self.theme_button.pack(side="right", padx=5)
 
+        # Stan zapisu zmian wykonywanego w tle
+        self.save_status = ttk.Label(self.theme_frame, text="")
+        self.save_status.pack(side="left", padx=5)
+        self._poll_save_status()
+
+        if self.diagnostics is not None:
+            ttk.Button(self.theme_frame, text="Diagnostyka",
+                       command=self.diagnostics.show_window).pack(side="right", padx=5)
+
+    def _poll_save_status(self):
+        """Odświeża napis o stanie zapisu wykonywanego przez wątek w tle"""
+        storage = self.store.storage
+        if storage.status in (PENDING, SAVING):
+            text = "Zapisywanie..."
+        elif storage.status == SAVED:
+            text = "Zapisano"
+        elif storage.status == FAILED:
+            text = f"Błąd zapisu: {storage.last_error}"
+        else:
+            text = ""
+        if self.save_status.cget("text") != text:
+            self.save_status.config(text=text)
+        self._save_status_job = self.root.after(self.SAVE_STATUS_POLL_MS,
+                                                self._poll_save_status)
+
+    def create_status_bar(self):
+        """Tworzy pasek postępu wyświetlany podczas wczytywania kontaktów"""
+        self.status_frame = ttk.Frame(self.root)
+        self.progress = ttk.Progressbar(self.status_frame, orient="horizontal",
+                                        mode="determinate", maximum=100)
+        self.progress.pack(side="left", fill="x", expand=True, padx=5)
+        self.status_label = ttk.Label(self.status_frame, text="")
+        self.status_label.pack(side="left", padx=5)
+        # Przycisk przerwania eksportu (widoczny tylko podczas eksportu)
+        self.cancel_button = ttk.Button(self.status_frame, text="Anuluj",
+                                        command=self.cancel_export)
+
     def create_contact_table(self):
         """Tworzy tabelę do wyświetlania kontaktów z możliwością sortowania"""
         columns = ("Imię", "Nazwisko", "Nick", "Telefon", "Email")
@@ -198,6 +942,8 @@ class ContactManager:
         
         # Słownik przechowujący kierunek sortowania dla każdej kolumny
         self.sort_order = {}
+        # Aktywne klucze sortowania: lista par (kolumna, malejąco)
+        self.sort_columns = []
         
         # Konfiguracja kolumn i ich nagłówków
         for col in columns:
@@ -206,14 +952,189 @@ class ContactManager:
             self.sort_order[col] = 'asc'
 
         # Dodanie paska przewijania
-        scrollbar = ttk.Scrollbar(self.root, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(self.root, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
 
         self.tree.pack(fill="both", expand=True, padx=10, pady=5)
-        scrollbar.pack(side="right", fill="y")
+        self.scrollbar.pack(side="right", fill="y")
 
         # Powiązanie zdarzenia wyboru wiersza z funkcją
         self.tree.bind('<<TreeviewSelect>>', self.item_selected)
+        self.tree.bind('<Shift-Button-1>', self.on_heading_shift_click)
+
+        # Stan wirtualnej tabeli: kolejność wyświetlania (identyfikatory kontaktów),
+        # indeks pierwszego widocznego wiersza i identyfikatory istniejących wierszy
+        self._view = []
+        self._offset = 0
+        self._page_size = 20
+        self._row_items = []
+
+    def enable_virtual_table(self):
+        """
+        Przełącza tabelę w tryb wirtualny.
+        Tabela zawiera tylko wiersze widoczne w oknie, a pasek przewijania
+        przesuwa okno po liście self.contacts zamiast po elementach tabeli.
+        """
+        self.virtual_table = True
+        self.tree.delete(*self.tree.get_children())
+        self._row_items = []
+        self._offset = 0
+        self._view = self._view_of(self.contact_ids)
+
+        self.tree.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self.on_virtual_scroll)
+        self.tree.bind('<Configure>', self.on_virtual_resize)
+        self.tree.bind('<MouseWheel>', self.on_virtual_wheel)
+        self.tree.bind('<Button-4>', self.on_virtual_wheel)
+        self.tree.bind('<Button-5>', self.on_virtual_wheel)
+        for key in ('<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+            self.tree.bind(key, self.on_virtual_key)
+        self.refresh_virtual_rows()
+
+    def _view_of(self, order):
+        """
+        Zwraca kopię kolejności wyświetlania dla wirtualnej tabeli.
+        Zakres numerów wierszy (tryb leniwy) nie jest zamieniany na listę,
+        aby pamięć nie rosła z liczbą kontaktów.
+        """
+        return order if isinstance(order, range) else list(order)
+
+    def _editable_view(self):
+        """Zwraca kolejność wyświetlania jako listę (przed dopisaniem lub usunięciem)"""
+        if isinstance(self._view, range):
+            self._view = list(self._view)
+        return self._view
+
+    def refresh_virtual_rows(self):
+        """
+        Wypełnia widoczne wiersze tabeli kontaktami z bieżącego okna
+        i aktualizuje pasek przewijania.
+        """
+        total = len(self._view)
+        self._offset = max(0, min(self._offset, total - self._page_size))
+        count = min(self._page_size + self.VIRTUAL_BUFFER_ROWS, total - self._offset)
+
+        # Dopasowanie liczby wierszy w tabeli do rozmiaru okna
+        while len(self._row_items) < count:
+            self._row_items.append(self.tree.insert("", "end"))
+        while len(self._row_items) > count:
+            self.tree.delete(self._row_items.pop())
+
+        selected_id = None
+        if self.selected_index is not None:
+            selected_id = self.contact_ids[self.selected_index]
+        selected_item = None
+        for position, item in enumerate(self._row_items):
+            contact_id = self._view[self._offset + position]
+            self.tree.item(item, values=self.contacts[self.contact_index(contact_id)])
+            if contact_id == selected_id:
+                selected_item = item
+
+        # Podświetlenie podąża za wybranym kontaktem, a nie za wierszem tabeli
+        if selected_item is not None:
+            self.tree.selection_set(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        self.tree.yview_moveto(0)
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + self._page_size) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_virtual_to(self, offset):
+        """
+        Przewija wirtualną tabelę.
+        Args:
+            offset: Pozycja (w kolejności wyświetlania) pierwszego widocznego wiersza
+        """
+        offset = max(0, min(offset, len(self._view) - self._page_size))
+        if offset != self._offset:
+            self._offset = offset
+            self.refresh_virtual_rows()
+
+    def on_virtual_scroll(self, *args):
+        """
+        Obsługuje polecenia paska przewijania ('moveto' lub 'scroll').
+        """
+        if args[0] == 'moveto':
+            self.scroll_virtual_to(int(float(args[1]) * len(self._view)))
+        elif args[0] == 'scroll':
+            step = int(args[1]) * (self._page_size if args[2] == 'pages' else 1)
+            self.scroll_virtual_to(self._offset + step)
+
+    def on_virtual_wheel(self, event):
+        """
+        Przewija wirtualną tabelę kółkiem myszy.
+        """
+        step = -3 if event.num == 4 or event.delta > 0 else 3
+        self.scroll_virtual_to(self._offset + step)
+        return "break"
+
+    def on_virtual_resize(self, event):
+        """
+        Przelicza liczbę widocznych wierszy po zmianie rozmiaru tabeli.
+        """
+        header_height, row_height = 25, 20
+        if self._row_items:
+            bbox = self.tree.bbox(self._row_items[0])
+            if bbox:
+                header_height, row_height = bbox[1], bbox[3]
+        page_size = max(1, (event.height - header_height) // row_height)
+        if page_size != self._page_size:
+            self._page_size = page_size
+            self.refresh_virtual_rows()
+
+    def on_virtual_key(self, event):
+        """
+        Nawigacja klawiaturą po wirtualnej tabeli - przewija okno,
+        gdy zaznaczenie wychodzi poza widoczne wiersze.
+        """
+        total = len(self._view)
+        if not total:
+            return "break"
+        selection = self.tree.selection()
+        if selection:
+            position = self._offset + self._row_items.index(selection[0])
+        else:
+            position = self._offset
+        steps = {'Up': -1, 'Down': 1, 'Prior': -self._page_size, 'Next': self._page_size}
+        if event.keysym == 'Home':
+            position = 0
+        elif event.keysym == 'End':
+            position = total - 1
+        else:
+            position = max(0, min(total - 1, position + steps[event.keysym]))
+
+        if position < self._offset:
+            self._offset = position
+        elif position >= self._offset + self._page_size:
+            self._offset = position - self._page_size + 1
+        self.refresh_virtual_rows()
+        item = self._row_items[position - self._offset]
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+        return "break"
+
+    @property
+    def contacts(self):
+        """Lista kontaktów z modelu (self.store)"""
+        return self.store.contacts
+
+    @property
+    def contact_ids(self):
+        """Stałe identyfikatory kontaktów (rosnące, równoległe do self.contacts)"""
+        return self.store.contact_ids
+
+    def contact_index(self, contact_id):
+        """
+        Zwraca indeks kontaktu o podanym identyfikatorze.
+        Args:
+            contact_id: Identyfikator kontaktu
+        Returns:
+            int: Indeks kontaktu w self.contacts
+        """
+        return self.store.index_of(contact_id)
 
     def toggle_theme(self):
         """Zmienia motyw aplikacji"""
@@ -256,39 +1177,57 @@ class ContactManager:
         self.style.map('Treeview',
                       background=[('selected', select_bg)],
                       foreground=[('selected', 'white')])
+        # Lista książek to widżet tk (bez stylów ttk)
+        if self.book_list is not None:
+            self.book_list.configure(background=input_bg, foreground=fg_color,
+                                     selectbackground=select_bg, selectforeground='white')
         self.style.map('TButton',
                       background=[('active', button_active)],
                       foreground=[('active', fg_color)])
 
-    def sort_column(self, column):
+    def sort_column(self, column, extend=False):
         """
         Sortuje tabelę według wybranej kolumny.
+        Kolejność jest liczona w modelu (self.store.sorter) i przekazywana do tabeli
+        jednym wywołaniem, bez odczytywania wartości komórek z Tk.
         Args:
             column: Nazwa kolumny do sortowania
+            extend: Czy dodać kolumnę jako kolejny klucz sortowania (Shift+klik)
         """
-        # Pobieranie wszystkich elementów z wybranej kolumny
-        items = [(self.tree.set(item, column), item) for item in self.tree.get_children('')]
-        
-        # Sortowanie elementów
-        if self.sort_order[column] == 'asc':
-            items.sort(key=lambda x: x[0].lower())  # Sortowanie rosnące
-            self.sort_order[column] = 'desc'
+        descending = self.sort_order[column] == 'desc'
+        self.sort_order[column] = 'asc' if descending else 'desc'
+        if extend and any(col == column for col, _ in self.sort_columns):
+            # Zmiana kierunku kolumny, która już jest kluczem sortowania
+            self.sort_columns = [(col, descending if col == column else desc)
+                                 for col, desc in self.sort_columns]
+        elif extend:
+            self.sort_columns.append((column, descending))
         else:
-            items.sort(key=lambda x: x[0].lower(), reverse=True)  # Sortowanie malejące
-            self.sort_order[column] = 'asc'
-        
-        # Aktualizacja pozycji elementów w tabeli
-        for index, (val, item) in enumerate(items):
-            self.tree.move(item, '', index)
-        
-        # Aktualizacja strzałek sortowania w nagłówkach
+            self.sort_columns = [(column, descending)]
+
+        self.refresh_view()
+
+        # Aktualizacja strzałek sortowania w nagłówkach (z numerem przy wielu kolumnach)
+        sorted_columns = [col for col, _ in self.sort_columns]
         for col in self.tree["columns"]:
-            if col == column:
+            if col in sorted_columns:
                 arrow = "▼" if self.sort_order[col] == 'desc' else "▲"
+                if len(sorted_columns) > 1:
+                    arrow += str(sorted_columns.index(col) + 1)
                 self.tree.heading(col, text=f"{col} {arrow}")
             else:
                 self.tree.heading(col, text=col)
 
+    def on_heading_shift_click(self, event):
+        """
+        Shift+klik w nagłówek dodaje kolumnę do sortowania wielokolumnowego.
+        """
+        if self.tree.identify_region(event.x, event.y) != 'heading':
+            return None
+        column = self.tree.column(self.tree.identify_column(event.x), 'id')
+        self.sort_column(column, extend=True)
+        return "break"
+
     def validate_name(self, name, field_name):
         """
         Walidacja imienia lub nazwiska.
@@ -298,53 +1237,17 @@ class ContactManager:
         Returns:
             bool: True jeśli dane są poprawne
         """
-        try:
-            if not name:
-                raise ValidationError(f"{field_name} nie może być pusty")
-            if not name.replace(" ", "").isalpha():
-                raise ValidationError(f"{field_name} może zawierać tylko litery")
-            return True
-        except ValidationError as e:
-            messagebox.showerror("Błąd", str(e))
-            return False
+        return self.show_validation_errors([check_name(name, field_name)])
 
     def validate_phone(self, phone):
         """
-        Walidacja numeru telefonu.
-        Akceptuje dwa formaty:
-        1. Lokalny: dokładnie 9 cyfr
-        2. Międzynarodowy: znak '+' i co najmniej 9 cyfr po kodzie kraju
-        
+        Walidacja numeru telefonu (lokalny: 9 cyfr, międzynarodowy: '+' i co najmniej 9 cyfr).
         Args:
             phone: Numer telefonu do sprawdzenia
         Returns:
             bool: True jeśli numer jest poprawny
         """
-        try:
-            if not phone:
-                raise ValidationError("Numer telefonu nie może być pusty")
-            
-            # Usunięcie spacji i myślników
-            phone = phone.replace(" ", "").replace("-", "")
-            
-            # Sprawdzenie formatu międzynarodowego
-            if phone.startswith("+"):
-                phone_digits = ''.join(filter(str.isdigit, phone[1:]))  # Pomiń + i weź tylko cyfry
-                if len(phone_digits) < 9:
-                    raise ValidationError("Numer telefonu musi zawierać co najmniej 9 cyfr po kodzie kraju")
-            else:
-                # Sprawdzenie formatu lokalnego
-                phone_digits = ''.join(filter(str.isdigit, phone))
-                if len(phone_digits) != 9:
-                    raise ValidationError("Lokalny numer telefonu musi zawierać dokładnie 9 cyfr")
-            
-            if not phone_digits.isdigit():
-                raise ValidationError("Numer telefonu może zawierać tylko cyfry (oraz + na początku dla kodu kraju)")
-                
-            return True
-        except ValidationError as e:
-            messagebox.showerror("Błąd", str(e))
-            return False
+        return self.show_validation_errors([check_phone(phone)])
 
     def validate_email(self, email):
         """
@@ -354,16 +1257,34 @@ class ContactManager:
         Returns:
             bool: True jeśli adres jest poprawny
         """
-        try:
-            if not email:
-                raise ValidationError("Email nie może być pusty")
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, email):
-                raise ValidationError("Niepoprawny format email")
-            return True
-        except ValidationError as e:
-            messagebox.showerror("Błąd", str(e))
-            return False
+        return self.show_validation_errors([check_email(email)])
+
+    def show_validation_errors(self, errors):
+        """
+        Wyświetla błędy walidacji w oknach dialogowych.
+        Args:
+            errors: Lista błędów (FieldError lub None dla poprawnych pól)
+        Returns:
+            bool: True jeśli nie było błędów
+        """
+        errors = [error for error in errors if error is not None]
+        for error in errors:
+            messagebox.showerror("Błąd", error.message)
+        return not errors
+
+    def read_input_fields(self):
+        """
+        Odczytuje dane kontaktu z pól wprowadzania.
+        Returns:
+            list: Pola kontaktu [imię, nazwisko, nick, telefon, email]
+        """
+        return [
+            self.first_name_var.get().strip(),
+            self.last_name_var.get().strip(),
+            self.nickname_var.get().strip(),
+            self.phone_var.get().strip(),
+            self.email_var.get().strip(),
+        ]
 
     def add_contact(self):
         """
@@ -371,28 +1292,61 @@ class ContactManager:
         Pobiera dane z pól wprowadzania i dodaje nowy wiersz do tabeli.
         """
         try:
-            first_name = self.first_name_var.get().strip()
-            last_name = self.last_name_var.get().strip()
-            nickname = self.nickname_var.get().strip()
-            phone = self.phone_var.get().strip()
-            email = self.email_var.get().strip()
-
-            if not all([
-                self.validate_name(first_name, "Imię"),
-                self.validate_name(last_name, "Nazwisko"),
-                self.validate_phone(phone),
-                self.validate_email(email)
-            ]):
+            save_error = None
+            contact = self.read_input_fields()
+            try:
+                try:
+                    contact_id = self.store.add(contact, check_duplicates=True)
+                except DuplicateContactError as e:
+                    if not self.confirm_duplicate(e.duplicates):
+                        return
+                    contact_id = self.store.add(contact)
+            except ValidationError as e:
+                self.show_validation_errors(e.errors)
+                return
+            except StorageError as e:
+                # Kontakt jest już w modelu - tabela musi go pokazać
+                contact_id, save_error = e.contact_id, e
+
+            contact = self.store.get(contact_id)
+            if self.search_results is not None:
+                # Aktywny filtr - nowy kontakt jest widoczny tylko, jeśli pasuje
+                if not self.virtual_table:
+                    self.tree.insert("", "end", iid=str(contact_id), values=contact)
+                self.search_results = self.run_search(self._search_query)
+                self.refresh_view()
+            elif self.virtual_table:
+                self._editable_view().append(contact_id)
+                self.refresh_virtual_rows()
+            else:
+                self.tree.insert("", "end", iid=str(contact_id), values=contact)
+            if save_error is not None:
+                messagebox.showerror("Błąd", f"Błąd podczas zapisywania kontaktów: {str(save_error)}")
                 return
-
-            contact = [first_name, last_name, nickname, phone, email]
-            self.contacts.append(contact)
-            self.tree.insert("", "end", values=contact)
-            self.save_contacts()
             messagebox.showinfo("Sukces", "Kontakt został dodany")
         except Exception as e:
             messagebox.showerror("Błąd", f"Wystąpił błąd: {str(e)}")
 
+    def confirm_duplicate(self, duplicates):
+        """
+        Pyta, czy dodać kontakt mimo możliwych duplikatów.
+        Args:
+            duplicates: Pary (identyfikator, przyczyny) z ContactStore.possible_duplicates
+        Returns:
+            bool: True, jeśli użytkownik chce dodać kontakt
+        """
+        from duplicates import describe_reasons
+
+        lines = [f"{' '.join(self.store.get(contact_id)[:2])} "
+                 f"({describe_reasons(reasons)})"
+                 for contact_id, reasons in duplicates[:5]]
+        if len(duplicates) > 5:
+            lines.append(f"... i {len(duplicates) - 5} innych")
+        return messagebox.askyesno(
+            "Możliwy duplikat",
+            "Podobny kontakt już istnieje:\n" + "\n".join(lines) + "\n\nCzy mimo to dodać kontakt?"
+        )
+
     def update_contact(self):
         """
         Aktualizuje wybrany kontakt.
@@ -403,27 +1357,30 @@ class ContactManager:
                 messagebox.showerror("Błąd", "Proszę wybrać kontakt do aktualizacji")
                 return
 
-            first_name = self.first_name_var.get().strip()
-            last_name = self.last_name_var.get().strip()
-            nickname = self.nickname_var.get().strip()
-            phone = self.phone_var.get().strip()
-            email = self.email_var.get().strip()
-
-            if not all([
-                self.validate_name(first_name, "Imię"),
-                self.validate_name(last_name, "Nazwisko"),
-                self.validate_phone(phone),
-                self.validate_email(email)
-            ]):
+            contact_id = self.contact_ids[self.selected_index]
+            save_error = None
+            try:
+                self.store.update(contact_id, self.read_input_fields())
+            except ValidationError as e:
+                self.show_validation_errors(e.errors)
                 return
-
-            contact = [first_name, last_name, nickname, phone, email]
-            self.contacts[self.selected_index] = contact
-            self.tree.delete(*self.tree.get_children())
-            for contact in self.contacts:
-                self.tree.insert("", "end", values=contact)
-            self.save_contacts()
+            except StorageError as e:
+                save_error = e
+
+            contact = self.store.get(contact_id)
+            if not self.virtual_table:
+                # Aktualizacja jednego wiersza w miejscu - pozycja po sortowaniu zostaje
+                self.tree.item(str(contact_id), values=contact)
+                self.tree.selection_remove(*self.tree.selection())
             self.selected_index = None
+            if self.search_results is not None:
+                self.search_results = self.run_search(self._search_query)
+                self.refresh_view()
+            elif self.virtual_table:
+                self.refresh_virtual_rows()
+            if save_error is not None:
+                messagebox.showerror("Błąd", f"Błąd podczas zapisywania kontaktów: {str(save_error)}")
+                return
             messagebox.showinfo("Sukces", "Kontakt został zaktualizowany")
         except Exception as e:
             messagebox.showerror("Błąd", f"Wystąpił błąd: {str(e)}")
@@ -437,23 +1394,151 @@ class ContactManager:
             return
 
         if messagebox.askyesno("Potwierdzenie", "Czy na pewno chcesz usunąć ten kontakt?"):
-            del self.contacts[self.selected_index]
-            self.tree.delete(*self.tree.get_children())
-            for contact in self.contacts:
-                self.tree.insert("", "end", values=contact)
-            self.save_contacts()
+            contact_id = self.contact_ids[self.selected_index]
+            save_error = None
+            try:
+                self.store.delete(contact_id)
+            except StorageError as e:
+                save_error = e
+            if self.search_results is not None and contact_id in self.search_results:
+                self.search_results.remove(contact_id)
+            if self.virtual_table:
+                self._editable_view().remove(contact_id)
+            else:
+                self.tree.delete(str(contact_id))
             self.selected_index = None
+            if self.virtual_table:
+                self.refresh_virtual_rows()
+            if save_error is not None:
+                messagebox.showerror("Błąd", f"Błąd podczas zapisywania kontaktów: {str(save_error)}")
+                return
             messagebox.showinfo("Sukces", "Kontakt został usunięty")
 
+    def undo(self, event=None):
+        """Cofa ostatnią zmianę (Ctrl+Z)"""
+        self._step_history(self.store.undo)
+
+    def redo(self, event=None):
+        """Ponawia ostatnio cofniętą zmianę (Ctrl+Y lub Ctrl+Shift+Z)"""
+        self._step_history(self.store.redo)
+
+    def _step_history(self, action):
+        """
+        Wykonuje cofnięcie lub ponowienie i odświeża zmienione wiersze tabeli.
+        Args:
+            action: self.store.undo lub self.store.redo
+        """
+        from history import HistoryConflict
+
+        if str(self.undo_button.cget("state")) == "disabled":
+            # Wczytywanie, import lub eksport w toku - edycja jest zablokowana
+            return
+        save_error = None
+        try:
+            changes = action()
+        except HistoryConflict as e:
+            messagebox.showerror("Błąd", str(e))
+            return
+        except StorageError as e:
+            changes, save_error = e.changes, e
+        if not changes:
+            # Brak wpisu do cofnięcia lub ponowienia
+            self.root.bell()
+            return
+        self.apply_changes(changes)
+        if save_error is not None:
+            messagebox.showerror("Błąd", f"Błąd podczas zapisywania kontaktów: {str(save_error)}")
+
+    def apply_changes(self, changes, selected_id=None):
+        """
+        Odświeża tabelę po zmianach wykonanych w modelu poza formularzem
+        (cofnięcie, ponowienie, zmiany z serwera) - tylko zmienione wiersze,
+        bez przebudowy tabeli.
+        Args:
+            changes: Pary (operacja, identyfikator) z ContactStore.undo/redo
+            selected_id: Identyfikator kontaktu, który zostaje zaznaczony
+                         (None - zaznaczenie jest usuwane)
+        """
+        for op, contact_id in changes:
+            if op == 'add':
+                if not self.virtual_table:
+                    self.tree.insert("", "end", iid=str(contact_id), values=self.store.get(contact_id))
+                elif self.search_results is None:
+                    self._editable_view().append(contact_id)
+            elif op == 'update':
+                if not self.virtual_table:
+                    self.tree.item(str(contact_id), values=self.store.get(contact_id))
+            else:
+                if self.search_results is not None and contact_id in self.search_results:
+                    self.search_results.remove(contact_id)
+                if not self.virtual_table:
+                    self.tree.delete(str(contact_id))
+                elif self.search_results is None:
+                    self._editable_view().remove(contact_id)
+        if selected_id is not None:
+            self.selected_index = self.contact_index(selected_id)
+        else:
+            if not self.virtual_table:
+                self.tree.selection_remove(*self.tree.selection())
+            self.selected_index = None
+        if self.search_results is not None:
+            # Przywrócony lub zmieniony kontakt jest widoczny tylko, jeśli pasuje
+            self.search_results = self.run_search(self._search_query)
+            self.refresh_view()
+        elif self.virtual_table:
+            self.refresh_virtual_rows()
+
+    def show_contact_history(self):
+        """
+        Pokazuje historię zmian wybranego kontaktu (od najnowszej) w osobnym oknie.
+        """
+        if self.selected_index is None:
+            messagebox.showerror("Błąd", "Proszę wybrać kontakt, którego historię chcesz zobaczyć")
+            return
+        contact_id = self.contact_ids[self.selected_index]
+        contact = self.store.get(contact_id)
+        window = tk.Toplevel(self.root)
+        window.title(f"Historia zmian - {contact[0]} {contact[1]}")
+        window.geometry("640x320")
+
+        columns = ("Czas", "Zmiana", "Szczegóły")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for col, width in zip(columns, (140, 120, 360)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width)
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        titles = self.tree["columns"]
+        for entry, change, undone in self.store.contact_history(contact_id):
+            if change.op == 'update':
+                details = "; ".join(f"{titles[field]}: {old or '-'} → {new or '-'}"
+                                    for field, old, new in change.data)
+            else:
+                details = ", ".join(value for value in change.data if value)
+            label = entry.label + (" (cofnięta)" if undone else "")
+            tree.insert("", "end", values=(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.time)), label, details))
+        if not tree.get_children():
+            ttk.Label(window, text="Brak zapisanych zmian tego kontaktu").pack(padx=10, pady=5)
+        ttk.Button(window, text="Zamknij", command=window.destroy).pack(side="right", padx=10, pady=5)
+
     def item_selected(self, event):
         """
         Wyświetla dane kontaktu w polach wprowadzania po wyborze wiersza w tabeli.
         """
         selection = self.tree.selection()
         if selection:
-            item = self.tree.item(selection[0])
-            self.selected_index = self.tree.index(selection[0])
-            contact = item['values']
+            if self.virtual_table:
+                # Wiersz tabeli -> pozycja w oknie -> indeks kontaktu
+                position = self._row_items.index(selection[0])
+                index = self.contact_index(self._view[self._offset + position])
+                if index == self.selected_index:
+                    # Ponowne zaznaczenie po przewinięciu - pola zostają bez zmian
+                    return
+            else:
+                # Identyfikator wiersza to identyfikator kontaktu
+                index = self.contact_index(int(selection[0]))
+            self.selected_index = index
+            contact = self.contacts[index]
             self.first_name_var.set(contact[0])
             self.last_name_var.set(contact[1])
             self.nickname_var.set(contact[2])
@@ -462,32 +1547,861 @@ class ContactManager:
 
     def load_contacts(self):
         """
-        Ładuje kontakty z pliku CSV.
+        Ładuje kontakty z pliku CSV i odtwarza zmiany zapisane w dzienniku.
         """
         try:
-            if os.path.exists('contacts.csv'):
-                with open('contacts.csv', 'r', encoding='utf-8') as file:
-                    reader = csv.reader(file)
-                    self.contacts = list(reader)
-                    for contact in self.contacts:
-                        self.tree.insert("", "end", values=contact)
+            self.store.load()
+            self.show_contacts()
         except Exception as e:
+            self.books.discard(self.book_path)
+            self.refresh_sidebar()
             messagebox.showerror("Błąd", f"Błąd podczas ładowania kontaktów: {str(e)}")
+            return
+        self.book_ready()
 
-    def save_contacts(self):
+    def load_contacts_snapshot(self):
+        """
+        Wczytuje aktywną książkę z migawki startowej (startup.load_snapshot) -
+        bez parsowania pliku CSV i budowy indeksu wyszukiwania.
+        Returns:
+            bool: False, gdy migawki nie ma lub jest nieaktualna (plik lub
+                  dziennik zmieniły się od jej zapisu) - wtedy kontakty
+                  wczytuje się zwykle
+        """
+        if not load_snapshot(self.store):
+            return False
+        self.show_contacts()
+        self.book_ready()
+        return True
+
+    def load_contacts_lazy(self):
+        """
+        Otwiera plik CSV w trybie odczytu na żądanie (lazy_csv.LazyCsvRows).
+        Okno pokazuje wirtualną tabelę od razu - wiersze są dekodowane
+        z pliku dopiero przy wyświetlaniu.
+        Returns:
+            bool: False, gdy trybu nie można użyć (baza SQLite, niepusty
+                  dziennik zmian, brak pliku) - wtedy kontakty wczytuje się zwykle
+        """
+        try:
+            rows = self.store.storage.load_lazy()
+        except Exception:
+            # Błąd zostanie zgłoszony przez zwykłe wczytywanie
+            return False
+        if rows is None:
+            return False
+        self.store.reset(rows)
+        self.store.load_history()
+        self.enable_virtual_table()
+        self.book_ready()
+        return True
+
+    def load_contacts_async(self):
+        """
+        Wczytuje kontakty w wątku w tle.
+        Wątek parsuje plik i przekazuje porcje wierszy przez kolejkę, a pętla Tk
+        co LOAD_POLL_MS dopisuje je do tabeli - okno jest gotowe od razu,
+        a przeglądanie i wyszukiwanie działa na już wczytanych kontaktach.
+        """
+        self.loading = True
+        self._load_cancelled = False
+        self._load_queue = queue.Queue()
+        for button in self.action_buttons:
+            button.configure(state="disabled")
+        self.progress.configure(value=0)
+        self.status_label.configure(text="Wczytywanie kontaktów...")
+        self.status_frame.pack(fill="x", padx=10, pady=5, before=self.tree)
+
+        self._load_thread = threading.Thread(target=self._load_worker,
+                                             name="contacts-loader", daemon=True)
+        self._load_thread.start()
+        self._load_job = self.root.after(self.LOAD_POLL_MS, self._poll_loading)
+
+    def _load_worker(self):
+        """
+        Wątek wczytujący - nie korzysta z Tk, wyniki trafiają do kolejki.
+        Przygotowuje też dane indeksu wyszukiwania, odciążając wątek interfejsu.
+        """
+        def on_batch(batch, progress):
+            if self._load_cancelled:
+                raise LoadCancelled()
+            self._load_queue.put(('batch', batch, prepare_entries(batch), progress))
+
+        def on_operation(operation):
+            self._load_queue.put(('operation', operation))
+
+        try:
+            # Kopia wczytywana przez wątek służy tylko do odtworzenia dziennika
+            self.store.storage.load(on_batch=on_batch, on_operation=on_operation,
+                                    container=ContactTable())
+            self._load_queue.put(('done', None))
+        except LoadCancelled:
+            pass
+        except Exception as e:
+            self._load_queue.put(('done', e))
+
+    def _poll_loading(self):
+        """
+        Przenosi wczytane porcje do modelu i tabeli w ograniczonym czasie,
+        tak aby pętla zdarzeń Tk pozostała responsywna.
+        """
+        deadline = time.perf_counter() + self.LOAD_TIME_BUDGET
+        changed = False
+        rerun_search = False
+        while time.perf_counter() < deadline:
+            try:
+                message = self._load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'batch':
+                self._append_loaded_batch(*message[1:])
+            elif message[0] == 'operation':
+                self._apply_loaded_operation(message[1])
+                rerun_search = rerun_search or message[1][0] != 'delete'
+            else:
+                self._finish_loading(message[1])
+                return
+            changed = True
+
+        if rerun_search and self.search_results is not None:
+            # Dodany lub zmieniony kontakt jest widoczny tylko, jeśli pasuje
+            self.search_results = self.run_search(self._search_query)
+
+        if changed and (self.virtual_table or self.sort_columns or self.search_results is not None):
+            self.refresh_view()
+        self._load_job = self.root.after(self.LOAD_POLL_MS, self._poll_loading)
+
+    def cancel_loading(self):
+        """
+        Przerywa wczytywanie w tle (wątek kończy się przy następnej porcji).
+        """
+        self._load_cancelled = True
+        self._load_thread.join()
+        self._load_thread = None
+        self.root.after_cancel(self._load_job)
+        self.loading = False
+        self.status_frame.pack_forget()
+
+    def _append_loaded_batch(self, batch, entries, progress):
+        """
+        Dopisuje porcję wczytanych kontaktów.
+        Args:
+            batch: Lista kontaktów
+            entries: Dane indeksu wyszukiwania przygotowane w wątku wczytującym
+            progress: Postęp wczytywania pliku (0.0-1.0)
+        """
+        ids = self.store.extend(batch, entries)
+        if self.search_results is not None and not self.fuzzy_var.get():
+            # Ranking przybliżony jest liczony ponownie po wczytaniu całego pliku
+            self.search_results.extend(self.store.search(self._search_query, ids))
+
+        if self.virtual_table is None and len(self.contacts) >= self.VIRTUAL_TABLE_THRESHOLD:
+            self.enable_virtual_table()
+        elif not self.virtual_table:
+            for contact_id, contact in zip(ids, batch):
+                self.tree.insert("", "end", iid=str(contact_id), values=contact)
+        self.progress.configure(value=progress * 100)
+        self.status_label.configure(text=f"Wczytano {len(self.contacts)} kontaktów...")
+
+    def _apply_loaded_operation(self, operation):
+        """
+        Nakłada operację odtworzoną z dziennika na wczytane kontakty.
+        Args:
+            operation: Krotka (operacja, indeks, kontakt)
+        """
+        op, index, contact = operation
+        contact_id = self.store.replay(operation)
+        if op == 'delete' and self.search_results is not None and contact_id in self.search_results:
+            self.search_results.remove(contact_id)
+        if self.virtual_table:
+            return
+        if op == 'add':
+            self.tree.insert("", "end", iid=str(contact_id), values=contact)
+        elif op == 'update':
+            self.tree.item(str(contact_id), values=contact)
+        else:
+            self.tree.delete(str(contact_id))
+
+    def _finish_loading(self, error):
+        """
+        Kończy wczytywanie w tle: odblokowuje edycję i ukrywa pasek postępu.
+        Args:
+            error: Wyjątek zgłoszony przez wątek wczytujący lub None
+        """
+        self.loading = False
+        self._load_thread = None
+        self.status_frame.pack_forget()
+        if error is None:
+            # Po błędzie edycja zostaje zablokowana, aby nie nadpisać niepełnymi danymi
+            for button in self.action_buttons:
+                button.configure(state="normal")
+        if self.virtual_table is None:
+            self.virtual_table = False
+        if self.search_results is not None:
+            self.search_results = self.run_search(self._search_query)
+        self.refresh_view()
+        if error is not None:
+            # Niepełny model nie zostaje w pamięci podręcznej - ponowne wybranie
+            # książki wczyta ją od nowa
+            self.books.discard(self.book_path)
+            self.refresh_sidebar()
+            messagebox.showerror("Błąd", f"Błąd podczas ładowania kontaktów: {str(error)}")
+        else:
+            self.store.load_history()
+            self.book_ready()
+
+    def import_contacts(self):
+        """
+        Importuje kontakty z pliku CSV lub vCard.
+        Plik jest czytany i walidowany w wątku w tle; błędne wiersze i duplikaty
+        trafiają do jednego raportu, a kontakty są zapisywane jednym zapisem pliku.
+        """
+        path = filedialog.askopenfilename(
+            title="Importuj kontakty",
+            filetypes=[("Kontakty (CSV, vCard)", "*.csv *.vcf *.vcard"),
+                       ("Wszystkie pliki", "*.*")]
+        )
+        if not path:
+            return
+        from importer import contact_keys
+
+        # Klucze istniejących kontaktów - wątek importu nie czyta modelu
+        self.store.materialize()
+        known_keys = contact_keys(self.contacts)
+        self._import_queue = queue.Queue()
+        for button in self.action_buttons:
+            button.configure(state="disabled")
+        self.progress.configure(mode="indeterminate")
+        self.progress.start()
+        self.status_label.configure(text="Importowanie kontaktów...")
+        self.status_frame.pack(fill="x", padx=10, pady=5, before=self.tree)
+
+        self._import_thread = threading.Thread(target=self._import_worker, args=(path, known_keys),
+                                               name="contacts-importer", daemon=True)
+        self._import_thread.start()
+        self.root.after(self.LOAD_POLL_MS, self._poll_import)
+
+    def _import_worker(self, path, known_keys):
+        """
+        Wątek importu - czyta, waliduje i odfiltrowuje duplikaty bez dostępu do Tk.
+        Args:
+            path: Ścieżka do importowanego pliku
+            known_keys: Klucze telefonów i adresów email istniejących kontaktów
+        """
+        from importer import import_file
+
+        def on_progress(count):
+            self._import_queue.put(('progress', count))
+
+        try:
+            accepted, report = import_file(path, known_keys, on_progress=on_progress)
+            self._import_queue.put(('done', (accepted, report)))
+        except Exception as e:
+            self._import_queue.put(('error', e))
+
+    def _poll_import(self):
+        """
+        Odbiera postęp i wynik importu z wątku w tle.
+        """
+        while True:
+            try:
+                kind, value = self._import_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.status_label.configure(text=f"Przetworzono {value} rekordów...")
+            elif kind == 'done':
+                self._finish_import(*value)
+                return
+            else:
+                self._finish_import(None, None, error=value)
+                return
+        self.root.after(self.LOAD_POLL_MS, self._poll_import)
+
+    def _finish_import(self, accepted, report, error=None):
+        """
+        Dopisuje zaimportowane kontakty do modelu i tabeli, zapisuje plik
+        i pokazuje podsumowanie importu.
+        Args:
+            accepted: Lista przyjętych kontaktów
+            report: Raport importu (importer.ImportReport)
+            error: Wyjątek zgłoszony przez wątek importu lub None
+        """
+        self._import_thread = None
+        self.progress.stop()
+        self.progress.configure(mode="determinate")
+        self.status_frame.pack_forget()
+        for button in self.action_buttons:
+            button.configure(state="normal")
+        if error is not None:
+            messagebox.showerror("Błąd", f"Błąd podczas importu kontaktów: {str(error)}")
+            return
+
+        if accepted:
+            ids = self.store.extend(accepted)
+            if not self.virtual_table and len(self.contacts) >= self.VIRTUAL_TABLE_THRESHOLD:
+                self.enable_virtual_table()
+            elif not self.virtual_table:
+                for contact_id, contact in zip(ids, accepted):
+                    self.tree.insert("", "end", iid=str(contact_id), values=contact)
+            if self.search_results is not None:
+                self.search_results = self.run_search(self._search_query)
+            self.refresh_view()
+            try:
+                self.store.save()
+            except StorageError as e:
+                messagebox.showerror("Błąd", f"Błąd podczas zapisywania kontaktów: {str(e)}")
+
+        if report.rejected or report.duplicates:
+            if messagebox.askyesno("Import zakończony",
+                                   f"{report.summary()}\n\nCzy zapisać raport odrzuconych wierszy?"):
+                report_path = filedialog.asksaveasfilename(
+                    title="Zapisz raport importu",
+                    defaultextension=".csv",
+                    initialfile="raport_importu.csv",
+                    filetypes=[("CSV", "*.csv")]
+                )
+                if report_path:
+                    try:
+                        report.write(report_path)
+                    except OSError as e:
+                        messagebox.showerror("Błąd", f"Błąd podczas zapisywania raportu: {str(e)}")
+        else:
+            messagebox.showinfo("Import zakończony", report.summary())
+
+    def selected_ids(self):
+        """
+        Zwraca identyfikatory zaznaczonych kontaktów w kolejności tabeli.
+        Wirtualna tabela pamięta tylko jeden wybrany kontakt.
+        """
+        if self.virtual_table:
+            if self.selected_index is None:
+                return []
+            return [self.contact_ids[self.selected_index]]
+        return [int(item) for item in self.tree.selection()]
+
+    def export_contacts(self):
+        """
+        Eksportuje bieżący widok (filtr i sortowanie) lub zaznaczone kontakty
+        do pliku CSV, vCard, JSON Lines (opcjonalnie .gz lub .zst).
+        Kontakty są kodowane i zapisywane porcjami w wątku w tle
+        (exporter.export_file) - pamięć nie rośnie z rozmiarem książki.
+        """
+        if self._export_thread is not None:
+            return
+        contact_ids = None
+        selected = self.selected_ids()
+        if selected:
+            answer = messagebox.askyesnocancel(
+                "Eksportuj",
+                f"Eksportować tylko zaznaczone kontakty ({len(selected)})?\n"
+                "Nie - eksport wszystkich kontaktów z bieżącego widoku")
+            if answer is None:
+                return
+            if answer:
+                contact_ids = selected
+        path = filedialog.asksaveasfilename(
+            title="Eksportuj kontakty",
+            defaultextension=".csv",
+            initialfile="kontakty.csv",
+            filetypes=[("CSV", "*.csv"),
+                       ("vCard", "*.vcf"),
+                       ("JSON Lines", "*.jsonl"),
+                       ("Skompresowane (gzip, zstd)", "*.gz *.zst"),
+                       ("Wszystkie pliki", "*.*")]
+        )
+        if not path:
+            return
+        from exporter import detect_export_format
+        try:
+            file_format, compression = detect_export_format(path)
+        except ValueError as e:
+            messagebox.showerror("Błąd", str(e))
+            return
+        if contact_ids is None and (self.sort_columns or self.search_results is not None):
+            contact_ids = list(self.current_order())
+        total = len(self.store) if contact_ids is None else len(contact_ids)
+
+        # Edycja jest zablokowana do końca eksportu - wątek czyta model
+        for button in self.action_buttons:
+            button.configure(state="disabled")
+        self._export_queue = queue.Queue()
+        self._export_cancel = threading.Event()
+        self._export_total = total
+        self.progress.configure(value=0)
+        self.status_label.configure(text="Eksportowanie kontaktów...")
+        self.cancel_button.configure(state="normal")
+        self.cancel_button.pack(side="left", padx=5)
+        self.status_frame.pack(fill="x", padx=10, pady=5, before=self.tree)
+
+        self._export_thread = threading.Thread(
+            target=self._export_worker,
+            args=(self.store.iter_contacts(contact_ids), path, file_format, compression),
+            name="contacts-exporter", daemon=True)
+        self._export_thread.start()
+        self.root.after(self.LOAD_POLL_MS, self._poll_export)
+
+    def _export_worker(self, contacts, path, file_format, compression):
         """
-        Zapisuje kontakty do pliku CSV.
+        Wątek eksportu - koduje i zapisuje kontakty bez dostępu do Tk.
+        Args:
+            contacts: Iterator kontaktów (ContactStore.iter_contacts)
+            path: Ścieżka do pliku docelowego
+            file_format: Format pliku ('csv', 'vcard', 'jsonl')
+            compression: 'gzip', 'zstd' lub None
         """
+        from exporter import export_file
+
+        def on_progress(count):
+            self._export_queue.put(('progress', count))
+
         try:
-            with open('contacts.csv', 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerows(self.contacts)
+            count = export_file(contacts, path, file_format, compression,
+                                on_progress=on_progress, cancel=self._export_cancel)
+            self._export_queue.put(('done', (path, count)))
         except Exception as e:
+            self._export_queue.put(('error', e))
+
+    def _poll_export(self):
+        """
+        Odbiera postęp i wynik eksportu z wątku w tle.
+        """
+        while True:
+            try:
+                kind, value = self._export_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.progress.configure(value=value * 100 / max(1, self._export_total))
+                self.status_label.configure(
+                    text=f"Wyeksportowano {value} z {self._export_total} kontaktów...")
+            elif kind == 'done':
+                self._finish_export(*value)
+                return
+            else:
+                self._finish_export(None, None, error=value)
+                return
+        self.root.after(self.LOAD_POLL_MS, self._poll_export)
+
+    def cancel_export(self):
+        """Przerywa eksport - wątek kończy pracę przed zapisem kolejnej porcji"""
+        if self._export_thread is not None:
+            self._export_cancel.set()
+            self.cancel_button.configure(state="disabled")
+            self.status_label.configure(text="Przerywanie eksportu...")
+
+    def _finish_export(self, path, count, error=None):
+        """
+        Kończy eksport: ukrywa pasek postępu i pokazuje wynik.
+        Args:
+            path: Ścieżka do pliku docelowego
+            count: Liczba wyeksportowanych kontaktów
+            error: Wyjątek zgłoszony przez wątek eksportu lub None
+        """
+        self._export_thread = None
+        self.cancel_button.pack_forget()
+        self.status_frame.pack_forget()
+        for button in self.action_buttons:
+            button.configure(state="normal")
+        from exporter import ExportCancelled
+
+        if isinstance(error, ExportCancelled):
+            messagebox.showinfo("Eksportuj", "Eksport został anulowany - plik nie został zapisany")
+        elif error is not None:
+            messagebox.showerror("Błąd", f"Błąd podczas eksportu kontaktów: {str(error)}")
+        else:
+            messagebox.showinfo("Eksportuj", f"Wyeksportowano kontaktów: {count}\n{path}")
+
+    def find_duplicates(self):
+        """
+        Wyszukuje grupy możliwych duplikatów w wątku w tle.
+        Wątek pracuje na kopii kontaktów, więc okno pozostaje responsywne.
+        """
+        # Plik otwarty w trybie leniwym jest najpierw wczytywany do pamięci
+        self.store.materialize()
+        contacts = self.contacts.copy()
+        contact_ids = list(self.contact_ids)
+        self._duplicates_queue = queue.Queue()
+        for button in self.action_buttons:
+            button.configure(state="disabled")
+        self.progress.configure(mode="indeterminate")
+        self.progress.start()
+        self.status_label.configure(text="Wyszukiwanie duplikatów...")
+        self.status_frame.pack(fill="x", padx=10, pady=5, before=self.tree)
+
+        self._duplicates_thread = threading.Thread(
+            target=self._duplicates_worker, args=(contacts, contact_ids),
+            name="duplicates-finder", daemon=True
+        )
+        self._duplicates_thread.start()
+        self.root.after(self.LOAD_POLL_MS, self._poll_duplicates)
+
+    def _duplicates_worker(self, contacts, contact_ids):
+        """
+        Wątek wyszukiwania duplikatów - bez dostępu do Tk i modelu.
+        Args:
+            contacts: Kopia kontaktów
+            contact_ids: Identyfikatory kontaktów (równoległe do contacts)
+        """
+        from duplicates import find_duplicates
+
+        try:
+            self._duplicates_queue.put((find_duplicates(contacts, contact_ids), None))
+        except Exception as e:
+            self._duplicates_queue.put((None, e))
+
+    def _poll_duplicates(self):
+        """
+        Odbiera wynik wyszukiwania duplikatów z wątku w tle.
+        """
+        try:
+            groups, error = self._duplicates_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(self.LOAD_POLL_MS, self._poll_duplicates)
+            return
+        self._duplicates_thread = None
+        self.progress.stop()
+        self.progress.configure(mode="determinate")
+        self.status_frame.pack_forget()
+        for button in self.action_buttons:
+            button.configure(state="normal")
+        if error is not None:
+            messagebox.showerror("Błąd", f"Błąd podczas wyszukiwania duplikatów: {str(error)}")
+        elif not groups:
+            messagebox.showinfo("Duplikaty", "Nie znaleziono możliwych duplikatów")
+        else:
+            self.show_duplicates(groups)
+
+    def show_duplicates(self, groups):
+        """
+        Pokazuje grupy możliwych duplikatów w osobnym oknie z akcją scalania.
+        Args:
+            groups: Grupy (duplicates.DuplicateGroup) od największej
+        """
+        from duplicates import describe_reasons
+
+        if self.duplicates_window is not None and self.duplicates_window.winfo_exists():
+            self.duplicates_window.destroy()
+        window = tk.Toplevel(self.root)
+        window.title("Możliwe duplikaty")
+        window.geometry("760x420")
+        self.duplicates_window = window
+
+        shown = groups[:self.MAX_DUPLICATE_GROUPS_SHOWN]
+        text = f"Grup: {len(groups)}"
+        if len(groups) > len(shown):
+            text += f" (pokazano {len(shown)} największych)"
+        ttk.Label(window, text=text + ". Zaznacz kontakt, który ma zostać zachowany, "
+                                      "lub całą grupę (zostanie zachowany pierwszy).",
+                  wraplength=720).pack(fill="x", padx=10, pady=5)
+
+        columns = self.tree["columns"]
+        tree = ttk.Treeview(window, columns=columns, show="tree headings")
+        tree.column("#0", width=200)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=110)
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        self.duplicates_tree = tree
+        # Identyfikator wiersza grupy -> identyfikatory jej kontaktów
+        self._duplicate_groups = {}
+        for number, group in enumerate(shown, 1):
+            group_iid = f"group{number}"
+            self._duplicate_groups[group_iid] = list(group.contact_ids)
+            tree.insert("", "end", iid=group_iid, open=True,
+                        text=f"Grupa {number}: {describe_reasons(group.reasons)}")
+            for contact_id in group.contact_ids:
+                tree.insert(group_iid, "end", iid=f"{group_iid}:{contact_id}",
+                            text="", values=self.store.get(contact_id))
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Button(button_frame, text="Scal", command=self.merge_selected_duplicates).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Zamknij", command=window.destroy).pack(side="right", padx=5)
+
+    def merge_selected_duplicates(self):
+        """
+        Scala zaznaczoną grupę duplikatów w jeden kontakt.
+        Zachowany jest zaznaczony kontakt (lub pierwszy w grupie); jego puste
+        pola są uzupełniane danymi pozostałych kontaktów, które są usuwane.
+        """
+        if str(self.undo_button.cget("state")) == "disabled":
+            # Wczytywanie, import lub eksport w toku - edycja jest zablokowana
+            messagebox.showinfo("Duplikaty", "Poczekaj na zakończenie wczytywania, "
+                                             "importu lub eksportu")
+            return
+        selection = self.duplicates_tree.selection()
+        if not selection:
+            messagebox.showerror("Błąd", "Proszę wybrać grupę lub kontakt do scalenia")
+            return
+        group_iid, _, selected = selection[0].partition(":")
+        # Kontakty usunięte po wyszukaniu duplikatów są pomijane
+        contact_ids = []
+        for contact_id in self._duplicate_groups[group_iid]:
+            try:
+                self.store.get(contact_id)
+            except KeyError:
+                continue
+            contact_ids.append(contact_id)
+        if selected and int(selected) in contact_ids:
+            contact_ids.remove(int(selected))
+            contact_ids.insert(0, int(selected))
+        if len(contact_ids) < 2:
+            messagebox.showerror("Błąd", "Grupa zawiera mniej niż dwa istniejące kontakty")
+            return
+        if not messagebox.askyesno("Potwierdzenie",
+                                   f"Czy scalić {len(contact_ids)} kontakty w jeden?"):
+            return
+
+        save_error = None
+        try:
+            keep = self.store.merge(contact_ids)
+        except ValidationError as e:
+            self.show_validation_errors(e.errors)
+            return
+        except StorageError as e:
+            keep, save_error = e.contact_id, e
+        self._contacts_merged(keep, contact_ids[1:])
+        self.duplicates_tree.delete(group_iid)
+        del self._duplicate_groups[group_iid]
+        if save_error is not None:
+            messagebox.showerror("Błąd", f"Błąd podczas zapisywania kontaktów: {str(save_error)}")
+            return
+        messagebox.showinfo("Sukces", "Kontakty zostały scalone")
+
+    def _contacts_merged(self, keep, removed):
+        """
+        Odświeża tabelę po scaleniu kontaktów.
+        Args:
+            keep: Identyfikator zachowanego kontaktu
+            removed: Identyfikatory usuniętych kontaktów
+        """
+        if self.virtual_table:
+            removed_set = set(removed)
+            self._view = [contact_id for contact_id in self._view if contact_id not in removed_set]
+        else:
+            self.tree.item(str(keep), values=self.store.get(keep))
+            self.tree.delete(*map(str, removed))
+        self.selected_index = None
+        if self.search_results is not None:
+            self.search_results = self.run_search(self._search_query)
+            self.refresh_view()
+        elif self.virtual_table:
+            self.refresh_virtual_rows()
+
+    def search_all_books(self):
+        """
+        Wyszukuje tekst z pola wyszukiwania we wszystkich książkach.
+        Książki z pamięci podręcznej są przeszukiwane od razu przez indeks,
+        pozostałe przegląda wątek w tle (books.scan_book) - wyniki kolejnych
+        plików są dopisywane do okna wyników.
+        """
+        query = self.search_var.get()
+        if not query.strip():
+            messagebox.showinfo("Szukaj", "Wpisz tekst do wyszukania")
+            return
+        if self._book_search_thread is not None:
+            # Poprzednie wyszukiwanie kończy się po bieżącej książce
+            self._book_search_stop.set()
+        self.show_book_search(query)
+        for path, contact in self.books.search(query, self.MAX_BOOK_SEARCH_RESULTS):
+            self._add_book_result(path, contact)
+
+        paths = self.books.uncached_paths()
+        self._book_search_stop = threading.Event()
+        results = queue.Queue()
+        self._book_search_thread = threading.Thread(
+            target=self._book_search_worker, args=(query, paths, self._book_search_stop, results),
+            name="books-search", daemon=True
+        )
+        self._book_search_thread.start()
+        self.root.after(self.LOAD_POLL_MS, self._poll_book_search,
+                        results, self._book_search_stop, len(self.books) - len(paths))
+
+    def _book_search_worker(self, query, paths, stop, results):
+        """
+        Wątek przeglądający książki spoza pamięci podręcznej - bez dostępu do Tk.
+        Args:
+            query: Tekst zapytania
+            paths: Ścieżki książek do przejrzenia
+            stop: threading.Event przerywający wyszukiwanie
+            results: Kolejka na trójki (ścieżka, kontakty, błąd); None kończy wyniki
+        """
+        for path in paths:
+            if stop.is_set():
+                break
+            try:
+                results.put((path, scan_book(path, query, self.MAX_BOOK_SEARCH_RESULTS), None))
+            except Exception as e:
+                results.put((path, [], e))
+        results.put(None)
+
+    def _poll_book_search(self, results, stop, searched):
+        """
+        Dopisuje wyniki kolejnych książek do okna wyszukiwania.
+        Args:
+            results: Kolejka wątku wyszukiwania
+            stop: threading.Event tego wyszukiwania
+            searched: Liczba już przeszukanych książek
+        """
+        window = self.book_search_window
+        if stop.is_set() or window is None or not window.winfo_exists():
+            stop.set()
+            return
+        while True:
+            try:
+                message = results.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                self._book_search_thread = None
+                self.book_search_status.configure(
+                    text=f"Przeszukano książek: {searched}, znaleziono: {len(self._book_results)}")
+                return
+            path, contacts, error = message
+            searched += 1
+            if error is not None:
+                self._book_search_errors.append(f"{book_name(path)}: {error}")
+            for contact in contacts:
+                self._add_book_result(path, contact)
+        text = f"Przeszukano książek: {searched} z {len(self.books)}..."
+        if self._book_search_errors:
+            text += " Błędy: " + "; ".join(self._book_search_errors)
+        self.book_search_status.configure(text=text)
+        self.root.after(self.LOAD_POLL_MS, self._poll_book_search, results, stop, searched)
+
+    def show_book_search(self, query):
+        """
+        Otwiera (lub czyści) okno wyników wyszukiwania we wszystkich książkach.
+        Args:
+            query: Tekst zapytania (w tytule okna)
+        """
+        if self.book_search_window is not None and self.book_search_window.winfo_exists():
+            self.book_search_window.destroy()
+        window = tk.Toplevel(self.root)
+        window.title(f"Wyniki we wszystkich książkach: {query}")
+        window.geometry("860x420")
+        self.book_search_window = window
+
+        self.book_search_status = ttk.Label(window, text="Wyszukiwanie...")
+        self.book_search_status.pack(fill="x", padx=10, pady=5)
+        columns = self.tree["columns"]
+        tree = ttk.Treeview(window, columns=columns, show="tree headings")
+        tree.heading("#0", text="Książka")
+        tree.column("#0", width=140)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=130)
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        tree.bind('<Double-1>', self.open_book_result)
+        self.book_search_tree = tree
+        # Identyfikator wiersza -> (ścieżka książki, kontakt)
+        self._book_results = {}
+        self._book_search_errors = []
+        ttk.Label(window, text="Dwuklik otwiera książkę z wybranym kontaktem").pack(
+            side="left", padx=10, pady=5)
+        ttk.Button(window, text="Zamknij", command=window.destroy).pack(side="right", padx=10, pady=5)
+
+    def _add_book_result(self, path, contact):
+        """Dopisuje jeden wynik do okna wyszukiwania we wszystkich książkach"""
+        item = self.book_search_tree.insert("", "end", text=book_name(path), values=contact)
+        self._book_results[item] = (path, contact)
+
+    def open_book_result(self, event):
+        """
+        Przełącza okno na książkę wybranego wyniku i filtruje tabelę do
+        tego kontaktu (po numerze telefonu, adresie email lub nazwisku).
+        """
+        selection = self.book_search_tree.selection()
+        if not selection:
+            return
+        path, contact = self._book_results[selection[0]]
+        self.switch_book(path)
+        if self.book_path == book_key(path):
+            first_name, last_name, _, phone, email = contact[:5]
+            self.search_var.set(phone or email or f"{first_name} {last_name}")
+
+    def save_contacts(self):
+        """
+        Zleca zapis wszystkich kontaktów do pliku CSV.
+        Pojedyncze zmiany utrwala model (self.store) przy dodawaniu,
+        aktualizacji i usuwaniu kontaktu; zapis na dysk wykonuje wątek
+        w tle (BackgroundStorage), a jego stan pokazuje self.save_status.
+        """
+        try:
+            self.store.save()
+        except StorageError as e:
             messagebox.showerror("Błąd", f"Błąd podczas zapisywania kontaktów: {str(e)}")
 
+    def on_close(self):
+        """
+        Zamyka aplikację po zapisaniu zaległych zmian i zakończeniu
+        kompaktowania dziennika w tle.
+        """
+        if self._load_thread is not None:
+            # Przerwanie wczytywania w tle przed zamknięciem dziennika
+            self._load_cancelled = True
+            self._load_thread.join()
+        if self._book_search_thread is not None:
+            self._book_search_stop.set()
+        self.stop_sync()
+        if self._export_thread is not None:
+            # Niedokończony eksport jest przerywany (plik tymczasowy jest usuwany)
+            self._export_cancel.set()
+            self._export_thread.join()
+        self.root.after_cancel(self._save_status_job)
+        # Przerwane wczytywanie zostawia niepełny model - bez migawki
+        stores = [self.books.get(path) for path in self.books.cached_paths()
+                  if not (self.loading and path == self.book_path)]
+        try:
+            # Zapis zmian wszystkich książek z pamięci podręcznej
+            self.books.close()
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Błąd podczas zamykania pliku kontaktów: {str(e)}")
+        if self.startup is not None:
+            # Migawki do następnego szybkiego startu - po zamknięciu pliki
+            # zawierają wszystkie zmiany (książki z błędem zapisu są pomijane)
+            for store in stores:
+                save_snapshot(store, {'dark_theme': self.is_dark_theme})
+        if self.diagnostics is not None:
+            try:
+                self.diagnostics.close()
+            except OSError as e:
+                messagebox.showerror("Błąd", f"Błąd podczas zapisu profilu: {str(e)}")
+        self.root.destroy()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Menedżer kontaktów")
+    parser.add_argument('paths', nargs='*', metavar='path',
+                        help="książki kontaktów (CSV, bazy SQLite, np. contacts.db, lub adresy "
+                             "serwera, np. http://127.0.0.1:8765); pierwsza jest otwierana przy starcie")
+    parser.add_argument('--books-dir', metavar='KATALOG',
+                        help="dodaje do listy wszystkie książki z katalogu")
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="budżet pamięci wczytanych książek w MB (domyślnie %(default)s)")
+    parser.add_argument('--lazy', action='store_true', help="odczyt pliku CSV na żądanie")
+    parser.add_argument('--diagnostics', action='store_true',
+                        help="pomiary czasu wywołań i opóźnienia pętli zdarzeń (okno: F12)")
+    parser.add_argument('--profile', metavar='ŚCIEŻKA',
+                        help="zapis profilu przy zamknięciu: ŚCIEŻKA.prof i ŚCIEŻKA.folded")
+    parser.add_argument('--fast-start', action='store_true',
+                        help="szybki start: książka z migawki zapisanej przy zamknięciu, "
+                             "czasy startu na stderr (też CONTACTS_FAST_START=1)")
+    options = parser.parse_args()
+    startup = StartupTimer(IMPORT_STARTED) if fast_start_from_environment(options.fast_start) else None
+    if startup is not None:
+        startup.mark('importy')
+    paths = list(options.paths)
+    if options.books_dir:
+        paths.extend(discover_books(options.books_dir))
+    if not paths:
+        paths = ['contacts.csv']
+    from diagnostics import from_environment
+    diagnostics = from_environment(options.diagnostics, options.profile)
     root = tk.Tk()
-    app = ContactManager(root)
+    app = ContactManager(root, path=paths[0], books=paths[1:], lazy=options.lazy,
+                         diagnostics=diagnostics, memory_budget=options.cache_mb * 1024 * 1024,
+                         startup=startup)
     root.mainloop()
 
 """
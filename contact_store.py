@@ -0,0 +1,707 @@
+# -*- coding: utf-8 -*-
+"""
+Model książki kontaktów niezależny od interfejsu graficznego.
+
+ContactStore przechowuje kontakty w pamięci razem z ich stałymi
+identyfikatorami, kluczami sortowania i indeksem wyszukiwania, waliduje
+zmiany i utrwala je przez backend zapisu. Nie korzysta z Tkinter, więc może
+być używany przez okno aplikacji, wiersz poleceń (cli.py), importy wsadowe
+i testy wydajności na serwerze bez ekranu.
+
+Tryb leniwy (load(lazy=True)) otwiera plik CSV przez lazy_csv.LazyCsvRows:
+kontakty są dekodowane z pliku przy odczycie, a indeks wyszukiwania nie jest
+budowany. Pierwsza operacja wymagająca całej książki (edycja, wyszukiwanie,
+sortowanie, duplikaty, zapis) wczytuje kontakty do pamięci (materialize).
+
+Zmiany wykonane przez add, update, delete i merge trafiają do historii
+(history.History, plik 'contacts.csv.history'), z której undo i redo
+cofają i ponawiają je tymi samymi operacjami modelu - bez przebudowy
+tabeli ani indeksów.
+
+Wykorzystane biblioteki:
+- bisect: odnajdywanie kontaktów po identyfikatorze
+- contact_table, fuzzy_search, history, lazy_csv, storage, sqlite_storage,
+  sync_client, sorting, search_index, validation: moduły projektu
+- duplicates: wykrywanie i scalanie duplikatów (importowany przy pierwszym
+  użyciu - okno go nie potrzebuje do startu)
+"""
+
+from bisect import bisect_left
+
+from contact_table import ContactTable
+from fuzzy_search import DEFAULT_LIMIT, FuzzyIndex, split_query
+from history import LABELS, History, HistoryConflict, apply_diff, conflicts
+from lazy_csv import LazyCsvRows
+from search_index import SearchIndex, prepare_entries
+from sorting import ContactSorter
+from sqlite_storage import SqliteStorage, is_sqlite_path
+from storage import JournalStorage
+from sync_client import RemoteStorage, is_server_url
+from validation import ValidationError, normalize_contact, validate_contact
+
+
+def create_storage(path):
+    """
+    Wybiera backend zapisu na podstawie rozszerzenia pliku.
+    Args:
+        path: Ścieżka do pliku kontaktów
+    Returns:
+        RemoteStorage dla adresu serwera ('http://host:port', sync_server.py),
+        SqliteStorage dla plików .db/.sqlite/.sqlite3 (przy pierwszym otwarciu
+        przenosi kontakty z pliku .csv o tej samej nazwie), w pozostałych
+        przypadkach JournalStorage (CSV z dziennikiem zmian)
+    """
+    if is_server_url(path):
+        return RemoteStorage(path)
+    if is_sqlite_path(path):
+        return SqliteStorage(path)
+    return JournalStorage(path)
+
+
+class StorageError(Exception):
+    """
+    Zmiana została wprowadzona w pamięci, ale nie udało się jej utrwalić.
+    Atrybut contact_id wskazuje kontakt, którego dotyczyła operacja,
+    a changes - operacje wykonane przez undo/redo (jak ich wynik).
+    """
+    def __init__(self, message, contact_id=None, changes=None):
+        super().__init__(message)
+        self.contact_id = contact_id
+        self.changes = changes
+
+
+class DuplicateContactError(Exception):
+    """
+    Dodawany kontakt ma ten sam numer telefonu lub adres email co istniejący.
+    Atrybut duplicates zawiera pary (identyfikator, przyczyny) z
+    ContactStore.possible_duplicates.
+    """
+    def __init__(self, duplicates):
+        self.duplicates = list(duplicates)
+        super().__init__(f"Możliwy duplikat istniejącego kontaktu ({len(self.duplicates)})")
+
+
+class ContactStore:
+    """
+    Kontakty w pamięci z identyfikatorami, sortowaniem, wyszukiwaniem i zapisem.
+    """
+    def __init__(self, path='contacts.csv', storage=None, history=None):
+        """
+        Args:
+            path: Ścieżka do pliku kontaktów (CSV lub baza SQLite)
+            storage: Opcjonalny backend zapisu (domyślnie create_storage(path))
+            history: Opcjonalna historia zmian (domyślnie History z plikiem
+                     path + '.history'; dla adresu serwera - tylko w pamięci)
+        """
+        self.path = path
+        self.storage = storage if storage is not None else create_storage(path)
+        if history is None:
+            history = History(None if is_server_url(path) else path + '.history')
+        self.history = history
+        # Zmiany zbierane w jeden wpis historii (merge) lub None
+        self._pending_changes = None
+        # Kontakty (zwarta tabela kolumnowa) i równoległa lista stałych,
+        # rosnących identyfikatorów
+        self.contacts = ContactTable()
+        self.contact_ids = []
+        self._next_contact_id = 0
+        # Klucze sortowania i posortowane permutacje
+        self.sorter = ContactSorter()
+        # Indeks odwrócony do wyszukiwania
+        self.search_index = SearchIndex()
+        # Skróty telefonów i adresów email do wykrywania duplikatów
+        # (budowany przy pierwszym sprawdzeniu, potem aktualizowany przy edycji)
+        self.duplicate_index = None
+        # Słownik słów do wyszukiwania przybliżonego (budowany przy pierwszym
+        # wyszukiwaniu przybliżonym, potem aktualizowany przy edycji)
+        self.fuzzy_index = None
+
+    def __len__(self):
+        return len(self.contacts)
+
+    def __iter__(self):
+        """Zwraca pary (identyfikator, kontakt) w kolejności dodawania"""
+        return zip(self.contact_ids, self.contacts)
+
+    @property
+    def lazy(self):
+        """Czy kontakty są odczytywane z pliku na żądanie (przed materialize)"""
+        return isinstance(self.contacts, LazyCsvRows)
+
+    def load(self, lazy=False):
+        """
+        Wczytuje kontakty z backendu zapisu (razem z operacjami z dziennika).
+        Args:
+            lazy: Czy otworzyć plik CSV do odczytu na żądanie; gdy backend tego
+                  nie obsługuje (SQLite) lub dziennik zawiera zmiany,
+                  kontakty są wczytywane w całości
+        """
+        rows = self.storage.load_lazy() if lazy else None
+        if rows is None:
+            rows = self.storage.load(container=ContactTable())
+        self.reset(rows)
+        self.load_history()
+
+    def load_history(self):
+        """
+        Wczytuje historię zmian dla wczytanej książki (wywoływane przez load;
+        po wczytaniu porcjami przez extend/replay - przez wywołującego).
+        Do tego czasu zmiany nie trafiają do historii.
+        """
+        self.history.load(self.contact_ids, self.index_of)
+
+    def materialize(self):
+        """
+        Wczytuje do pamięci kontakty pliku otwartego w trybie leniwym
+        i buduje indeks wyszukiwania (identyfikatory się nie zmieniają).
+        """
+        if not self.lazy:
+            return
+        # reset zamyka plik otwarty w trybie leniwym
+        self.reset(ContactTable(self.contacts))
+
+    def reset(self, contacts=()):
+        """
+        Zastępuje zawartość modelu podaną listą kontaktów (bez zapisu).
+        Args:
+            contacts: Lista kontaktów, ContactTable (używana bez kopiowania)
+                      lub LazyCsvRows (tryb leniwy)
+        """
+        if self.lazy and self.contacts is not contacts:
+            self.contacts.close()
+        if isinstance(contacts, LazyCsvRows):
+            # Identyfikatory to numery wierszy - bez listy w pamięci
+            self.contacts = contacts
+            self.contact_ids = range(len(contacts))
+            self._next_contact_id = len(contacts)
+            self.sorter.reset()
+            self.search_index = SearchIndex()
+            self.duplicate_index = None
+            self.fuzzy_index = None
+            return
+        if not isinstance(contacts, ContactTable):
+            contacts = ContactTable(contacts)
+        self.contacts = contacts
+        self.contact_ids = list(range(len(self.contacts)))
+        self._next_contact_id = len(self.contacts)
+        self.sorter.reset()
+        self.search_index.build(self.contacts, self.contact_ids)
+        self.duplicate_index = None
+        self.fuzzy_index = None
+
+    def state(self):
+        """
+        Zwraca stan wczytanego modelu do zapisania w migawce startowej
+        (startup.py). Klucze sortowania i pozostałe indeksy nie są
+        zapisywane - są budowane na żądanie.
+        Returns:
+            dict: Kontakty, identyfikatory, następny identyfikator i indeks
+                  wyszukiwania (obiekty modelu, bez kopiowania)
+        """
+        return {
+            'contacts': self.contacts,
+            'contact_ids': self.contact_ids,
+            'next_contact_id': self._next_contact_id,
+            'search_index': self.search_index,
+        }
+
+    def restore(self, state):
+        """
+        Przywraca stan zwrócony przez state() bez odczytu pliku i budowy
+        indeksu wyszukiwania (historię wczytuje wywołujący przez load_history).
+        Args:
+            state: Słownik z state(), np. odczytany z migawki startowej
+        """
+        if self.lazy:
+            self.contacts.close()
+        self.contacts = state['contacts']
+        self.contact_ids = state['contact_ids']
+        self._next_contact_id = state['next_contact_id']
+        self.sorter.reset()
+        self.search_index = state['search_index']
+        self.duplicate_index = None
+        self.fuzzy_index = None
+
+    def extend(self, batch, entries=None):
+        """
+        Dopisuje porcję wczytanych kontaktów (bez walidacji i zapisu).
+        Args:
+            batch: Lista kontaktów
+            entries: Dane indeksu wyszukiwania z prepare_entries(batch)
+                     (np. przygotowane w wątku wczytującym)
+        Returns:
+            range: Identyfikatory nadane kontaktom z porcji
+        """
+        self.materialize()
+        if entries is None:
+            entries = prepare_entries(batch)
+        ids = range(self._next_contact_id, self._next_contact_id + len(batch))
+        self._next_contact_id += len(batch)
+        self.contacts.extend(batch)
+        self.contact_ids.extend(ids)
+        self.sorter.reset()
+        self.search_index.extend(ids, entries)
+        if self.duplicate_index is not None:
+            self.duplicate_index.extend(ids, batch)
+        if self.fuzzy_index is not None:
+            for contact_id, contact in zip(ids, batch):
+                self.fuzzy_index.add(contact_id, contact)
+        self.history.extended(len(self.contacts))
+        return ids
+
+    def replay(self, operation):
+        """
+        Nakłada operację odtworzoną z dziennika (bez walidacji i zapisu).
+        Args:
+            operation: Krotka (operacja, indeks, kontakt)
+        Returns:
+            int: Identyfikator kontaktu, którego dotyczyła operacja
+        """
+        op, index, contact = operation
+        if op == 'add':
+            return self._add(contact)
+        contact_id = self.contact_ids[index]
+        if op == 'update':
+            self._update(index, contact)
+        else:
+            self._delete(index)
+        return contact_id
+
+    def index_of(self, contact_id):
+        """
+        Zwraca indeks kontaktu o podanym identyfikatorze.
+        Identyfikatory w self.contact_ids są rosnące, więc wystarcza
+        wyszukiwanie binarne - wynik nie zależy od sortowania widoku.
+        Args:
+            contact_id: Identyfikator kontaktu
+        Returns:
+            int: Indeks kontaktu w self.contacts
+        """
+        return bisect_left(self.contact_ids, contact_id)
+
+    def get(self, contact_id):
+        """
+        Zwraca kontakt o podanym identyfikatorze.
+        Args:
+            contact_id: Identyfikator kontaktu
+        Returns:
+            list: Pola kontaktu
+        Raises:
+            KeyError: Gdy kontakt nie istnieje
+        """
+        return self.contacts[self._existing_index(contact_id)]
+
+    def iter_contacts(self, contact_ids=None):
+        """
+        Zwraca kolejne kontakty bez budowania ich listy (np. do eksportu w tle).
+        Plik otwarty w trybie leniwym jest czytany przez osobne mapowanie,
+        więc wczytanie książki do pamięci (materialize) w trakcie iteracji
+        jej nie przerywa.
+        Args:
+            contact_ids: Identyfikatory kontaktów w kolejności zwracania
+                         (None - wszystkie w kolejności dodawania)
+        Yields:
+            Pola kontaktu
+        """
+        contacts, ids, lazy = self.contacts, self.contact_ids, self.lazy
+        if lazy:
+            contacts = LazyCsvRows(contacts.path)
+        try:
+            if contact_ids is None:
+                yield from contacts
+            else:
+                for contact_id in contact_ids:
+                    yield contacts[bisect_left(ids, contact_id)]
+        finally:
+            if lazy:
+                contacts.close()
+
+    def new_contact_id(self):
+        """
+        Przydziela identyfikator dla nowego kontaktu.
+        Returns:
+            int: Identyfikator większy od wszystkich dotychczasowych
+        """
+        contact_id = self._next_contact_id
+        self._next_contact_id += 1
+        return contact_id
+
+    def add(self, contact, check_duplicates=False):
+        """
+        Waliduje, dodaje i utrwala nowy kontakt.
+        Args:
+            contact: Pola kontaktu [imię, nazwisko, nick, telefon, email]
+            check_duplicates: Czy odrzucić kontakt o telefonie lub adresie email
+                              już obecnym w książce (sprawdzenie O(1))
+        Returns:
+            int: Identyfikator nowego kontaktu
+        Raises:
+            ValidationError: Gdy dane kontaktu są niepoprawne
+            DuplicateContactError: Gdy check_duplicates i kontakt jest możliwym
+                                   duplikatem (bez zmian w modelu)
+            StorageError: Gdy zapis się nie powiódł (kontakt jest już w pamięci)
+        """
+        contact = self._checked(contact)
+        if check_duplicates:
+            duplicates = self.possible_duplicates(contact)
+            if duplicates:
+                raise DuplicateContactError(duplicates)
+        contact_id = self._add(contact)
+        self._changed('add', len(self.contacts) - 1, contact_id, None, contact)
+        self._record(('add', len(self.contacts) - 1, contact), contact_id)
+        return contact_id
+
+    def update(self, contact_id, contact):
+        """
+        Waliduje, zmienia i utrwala istniejący kontakt.
+        Args:
+            contact_id: Identyfikator kontaktu
+            contact: Nowe pola kontaktu
+        Raises:
+            KeyError: Gdy kontakt nie istnieje
+            ValidationError: Gdy dane kontaktu są niepoprawne
+            StorageError: Gdy zapis się nie powiódł (zmiana jest już w pamięci)
+        """
+        index = self._existing_index(contact_id)
+        contact = self._checked(contact)
+        before = self.contacts[index]
+        self._update(index, contact)
+        self._changed('update', index, contact_id, before, contact)
+        self._record(('update', index, contact), contact_id)
+
+    def delete(self, contact_id):
+        """
+        Usuwa i utrwala usunięcie kontaktu.
+        Args:
+            contact_id: Identyfikator kontaktu
+        Raises:
+            KeyError: Gdy kontakt nie istnieje
+            StorageError: Gdy zapis się nie powiódł (kontakt jest już usunięty z pamięci)
+        """
+        index = self._existing_index(contact_id)
+        before = self.contacts[index]
+        self._delete(index)
+        self._changed('delete', index, contact_id, before, None)
+        self._record(('delete', index, None), contact_id)
+
+    def possible_duplicates(self, contact, exclude=None):
+        """
+        Sprawdza, czy istnieje kontakt o tym samym telefonie lub adresie email.
+        Kosztuje O(1) - dwa odczyty indeksu skrótów (indeks jest budowany
+        przy pierwszym wywołaniu).
+        Args:
+            contact: Pola sprawdzanego kontaktu
+            exclude: Identyfikator pomijany w wyniku (np. edytowany kontakt)
+        Returns:
+            list: Pary (identyfikator, przyczyny) - przyczyny to krotka
+                  z 'phone' i/lub 'email'
+        """
+        from duplicates import DuplicateIndex, matches
+
+        self.materialize()
+        if self.duplicate_index is None:
+            self.duplicate_index = DuplicateIndex()
+            self.duplicate_index.build(self.contacts, self.contact_ids)
+        contact = normalize_contact(contact)
+        found = []
+        for contact_id in self.duplicate_index.candidates(contact):
+            if contact_id == exclude:
+                continue
+            # Potwierdzenie na danych - różne klucze mogą mieć ten sam skrót
+            reasons = matches(contact, self.get(contact_id))
+            if reasons:
+                found.append((contact_id, reasons))
+        return found
+
+    def find_duplicates(self, **options):
+        """
+        Wyszukuje grupy możliwych duplikatów wśród wszystkich kontaktów.
+        Args:
+            **options: Opcje duplicates.find_duplicates (max_name_block)
+        Returns:
+            list: Grupy (duplicates.DuplicateGroup) od największej
+        """
+        from duplicates import find_duplicates
+
+        self.materialize()
+        return find_duplicates(self.contacts, self.contact_ids, **options)
+
+    def merge(self, contact_ids):
+        """
+        Scala kontakty w pierwszy z podanych i usuwa pozostałe.
+        Puste pola zachowanego kontaktu są uzupełniane z pozostałych.
+        Args:
+            contact_ids: Identyfikatory kontaktów (pierwszy jest zachowywany)
+        Returns:
+            int: Identyfikator zachowanego kontaktu
+        Raises:
+            KeyError: Gdy któryś kontakt nie istnieje
+            ValidationError: Gdy scalony kontakt jest niepoprawny (bez zmian w modelu)
+            StorageError: Gdy zapis się nie powiódł (scalenie jest już w pamięci)
+        """
+        from duplicates import merge_contacts
+
+        keep = contact_ids[0]
+        merged = merge_contacts([self.get(contact_id) for contact_id in contact_ids])
+        save_error = None
+        # Edycja i usunięcia to jeden wpis historii (cofane razem)
+        self._pending_changes = []
+        try:
+            try:
+                self.update(keep, merged)
+            except StorageError as e:
+                save_error = e
+            for contact_id in contact_ids[1:]:
+                try:
+                    self.delete(contact_id)
+                except StorageError as e:
+                    save_error = save_error or e
+        finally:
+            changes, self._pending_changes = self._pending_changes, None
+            self.history.record(LABELS['merge'], changes, len(self.contacts))
+        if save_error is not None:
+            raise StorageError(str(save_error), keep) from save_error
+        return keep
+
+    def undo(self):
+        """
+        Cofa ostatnią zmianę z historii.
+        Returns:
+            list: Pary (operacja, identyfikator) wykonane na modelu ('add',
+                  'update', 'delete') - do odświeżenia widoku; [] gdy nie ma
+                  czego cofnąć
+        Raises:
+            HistoryConflict: Gdy kontakt zmienił się poza historią (historia
+                             jest czyszczona, model bez zmian)
+            StorageError: Gdy zapis się nie powiódł (cofnięcie jest już w pamięci)
+        """
+        changes = self.history.undo_changes()
+        if changes is None:
+            return []
+        operations, save_error = self._apply_changes(changes)
+        self.history.undone(operations, len(self.contacts))
+        return self._applied(operations, save_error)
+
+    def redo(self):
+        """
+        Ponawia ostatnio cofniętą zmianę.
+        Returns:
+            list: Pary (operacja, identyfikator) jak w undo; [] gdy nie ma
+                  czego ponowić
+        Raises:
+            HistoryConflict: Gdy kontakt zmienił się poza historią
+            StorageError: Gdy zapis się nie powiódł (zmiana jest już w pamięci)
+        """
+        changes = self.history.redo_changes()
+        if changes is None:
+            return []
+        operations, save_error = self._apply_changes(changes)
+        self.history.redone(operations, len(self.contacts))
+        return self._applied(operations, save_error)
+
+    def contact_history(self, contact_id):
+        """
+        Zwraca historię zmian kontaktu (history.History.contact_history).
+        Returns:
+            list: Krotki (Entry, Change, czy cofnięta) od najnowszej zmiany
+        """
+        return self.history.contact_history(contact_id)
+
+    def search(self, query, candidates=None):
+        """
+        Wyszukuje kontakty pasujące do zapytania.
+        Args:
+            query: Tekst zapytania
+            candidates: Opcjonalna lista identyfikatorów, do których zawęża się wynik
+        Returns:
+            list: Rosnące identyfikatory pasujących kontaktów
+                  lub None, gdy zapytanie jest puste
+        """
+        self.materialize()
+        return self.search_index.search(query, candidates)
+
+    def fuzzy_search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Wyszukuje kontakty w przybliżeniu - z literówkami i bez polskich znaków
+        (np. 'wojcik' znajduje 'Wójcik', 'kowalsky' - 'Kowalski').
+        Słownik słów jest budowany przy pierwszym wywołaniu, a potem
+        aktualizowany przy edycji. Cyfry zapytania (fragment numeru telefonu)
+        muszą pasować dokładnie.
+        Args:
+            query: Tekst zapytania
+            limit: Maksymalna liczba wyników
+        Returns:
+            list: Pary (identyfikator, ocena) od najtrafniejszego wyniku
+                  lub None, gdy zapytanie jest puste
+        """
+        self.materialize()
+        words, digits = split_query(query)
+        if not words and not digits:
+            return None
+        candidates = None
+        if digits:
+            candidates = self.search_index.search(' '.join(digits))
+            if not words:
+                return [(contact_id, 1.0) for contact_id in candidates[:limit]]
+            candidates = set(candidates)
+        if self.fuzzy_index is None:
+            self.fuzzy_index = FuzzyIndex()
+            self.fuzzy_index.build(self.contacts, self.contact_ids)
+        return self.fuzzy_index.search(words, candidates, limit)
+
+    def sorted_ids(self, spec, subset=None):
+        """
+        Zwraca identyfikatory kontaktów w kolejności sortowania.
+        Args:
+            spec: Pary (numer pola, malejąco) - od najważniejszej kolumny
+            subset: Opcjonalna lista identyfikatorów do posortowania
+        Returns:
+            list: Identyfikatory kontaktów
+        """
+        self.materialize()
+        return self.sorter.sorted_ids(self.contacts, self.contact_ids, spec, subset=subset)
+
+    def save(self):
+        """
+        Zapisuje wszystkie kontakty do pliku CSV.
+        Raises:
+            StorageError: Gdy zapis się nie powiódł
+        """
+        self.materialize()
+        try:
+            self.storage.save(self.contacts)
+        except Exception as e:
+            raise StorageError(str(e)) from e
+
+    def close(self):
+        """Kończy pracę backendu zapisu (np. kompaktowanie dziennika w tle)"""
+        if self.lazy:
+            self.contacts.close()
+        self.history.close()
+        self.storage.close()
+
+    def _existing_index(self, contact_id):
+        """Zwraca indeks istniejącego kontaktu lub zgłasza KeyError"""
+        index = self.index_of(contact_id)
+        if index == len(self.contact_ids) or self.contact_ids[index] != contact_id:
+            raise KeyError(contact_id)
+        return index
+
+    def _checked(self, contact):
+        """Normalizuje i waliduje pola kontaktu"""
+        contact = normalize_contact(contact)
+        errors = validate_contact(contact)
+        if errors:
+            raise ValidationError(errors)
+        return contact
+
+    def _add(self, contact):
+        """Dodaje kontakt w pamięci i zwraca jego identyfikator"""
+        self.materialize()
+        contact_id = self.new_contact_id()
+        self.contacts.append(contact)
+        self.contact_ids.append(contact_id)
+        self.sorter.contact_added(contact)
+        self.search_index.add(contact_id, contact)
+        if self.duplicate_index is not None:
+            self.duplicate_index.add(contact_id, contact)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.add(contact_id, contact)
+        return contact_id
+
+    def _update(self, index, contact):
+        """Zmienia kontakt w pamięci"""
+        self.materialize()
+        if self.duplicate_index is not None:
+            contact_id = self.contact_ids[index]
+            self.duplicate_index.remove(contact_id, self.contacts[index])
+            self.duplicate_index.add(contact_id, contact)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.update(self.contact_ids[index], self.contacts[index], contact)
+        self.search_index.update(self.contact_ids[index], self.contacts[index], contact)
+        self.contacts[index] = contact
+        self.sorter.contact_updated(index, contact)
+
+    def _delete(self, index):
+        """Usuwa kontakt z pamięci"""
+        self.materialize()
+        contact_id = self.contact_ids[index]
+        if self.duplicate_index is not None:
+            self.duplicate_index.remove(contact_id, self.contacts[index])
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.remove(contact_id, self.contacts[index])
+        self.search_index.remove(contact_id, self.contacts[index])
+        del self.contacts[index]
+        del self.contact_ids[index]
+        self.sorter.contact_deleted(index)
+
+    def _changed(self, op, index, contact_id, before, after):
+        """Przekazuje zmianę do historii (lub do wpisu zbieranego przez merge)"""
+        change = (op, index, contact_id, before, after)
+        if self._pending_changes is not None:
+            self._pending_changes.append(change)
+        else:
+            self.history.record(LABELS[op], [change], len(self.contacts))
+
+    def _apply_changes(self, changes):
+        """
+        Wykonuje zmiany z historii na modelu i utrwala je.
+        Przed pierwszą zmianą sprawdza, czy kontakty są w stanie zapisanym
+        w historii (np. książka nie została zmieniona innym programem).
+        Args:
+            changes: Lista history.Change
+        Returns:
+            tuple: (wykonane operacje (operacja, indeks, klucz, identyfikator),
+                    pierwszy StorageError lub None)
+        Raises:
+            HistoryConflict: Gdy stan kontaktu nie pasuje do zmiany
+        """
+        self.materialize()
+        for change in changes:
+            contact_id = self.history.contact_id(change.key)
+            contact = None
+            if contact_id is not None:
+                index = self.index_of(contact_id)
+                if index < len(self.contact_ids) and self.contact_ids[index] == contact_id:
+                    contact = self.contacts[index]
+            if conflicts(change, contact):
+                self.history.clear(len(self.contacts))
+                raise HistoryConflict("Kontakt został zmieniony poza historią zmian - "
+                                      "historia została wyczyszczona")
+        operations = []
+        save_error = None
+        for change in changes:
+            if change.op == 'add':
+                contact = list(change.data)
+                contact_id = self._add(contact)
+                index = len(self.contacts) - 1
+            else:
+                contact_id = self.history.contact_id(change.key)
+                index = self._existing_index(contact_id)
+                if change.op == 'update':
+                    contact = apply_diff(self.contacts[index], change.data)
+                    self._update(index, contact)
+                else:
+                    contact = None
+                    self._delete(index)
+            operations.append((change.op, index, change.key, contact_id))
+            try:
+                self._record((change.op, index, contact), contact_id)
+            except StorageError as e:
+                save_error = save_error or e
+        return operations, save_error
+
+    def _applied(self, operations, save_error):
+        """Zwraca wykonane operacje dla widoku lub zgłasza błąd zapisu"""
+        changed = [(op, contact_id) for op, _, _, contact_id in operations]
+        if save_error is not None:
+            raise StorageError(str(save_error), changed[0][1], changed) from save_error
+        return changed
+
+    def _record(self, operation, contact_id):
+        """Utrwala operację przez backend zapisu"""
+        try:
+            self.storage.record(self.contacts, operation)
+        except Exception as e:
+            raise StorageError(str(e), contact_id) from e
+
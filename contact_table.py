@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Zwarta, kolumnowa reprezentacja listy kontaktów w pamięci.
+
+Lista list napisów kosztuje kilkaset bajtów na kontakt: obiekt listy,
+pięć wskaźników i osobny obiekt str dla każdego pola (csv.reader tworzy
+nowe napisy nawet dla powtarzających się imion). ContactTable przechowuje
+każde pole w osobnej kolumnie:
+- imiona, nazwiska, nicki i domeny adresów email - kolumny kodowane słownikiem:
+  każda różna wartość jest zapisana raz, a wiersz przechowuje 4-bajtowy kod
+- numery telefonów i części adresów email przed '@' - bajty UTF-8 w jednym
+  buforze (bytearray) z tablicami początków i długości
+
+Tabela zachowuje się jak lista kontaktów (len, indeksowanie, append, extend,
+przypisanie i usuwanie po indeksie, iteracja), więc model, zapis i tabela
+Tk korzystają z niej bez zmian. Odczyt wiersza zwraca krotkę pól tworzoną
+na żądanie - w pamięci nie ma obiektów przypadających na wiersz.
+
+Pomiar dla 1 000 000 kontaktów (tracemalloc, Python 3.11, zbiór
+bench_data/contacts_1m_s1.csv z dataset.py):
+- lista list z csv.reader: ok. 426 MB (ok. 426 B na kontakt)
+- ContactTable: ok. 72 MB (ok. 72 B na kontakt)
+- cała wczytana książka (ContactStore: tabela, identyfikatory i indeks
+  wyszukiwania): ok. 450 MB - indeks przechowuje własną kopię tekstu
+  kontaktów (ok. 187 MB) i listy kluczy (ok. 148 MB)
+
+Wykorzystane biblioteki:
+- array: zwarte tablice kodów, początków i długości wartości
+"""
+
+from array import array
+
+# Liczba pól kontaktu: imię, nazwisko, nick, telefon, email
+FIELD_COUNT = 5
+# Minimalny rozmiar nieużywanych bajtów bufora, od którego bufor jest przepisywany
+_COMPACT_MIN_GARBAGE = 1 << 20
+
+
+class _CodedColumn:
+    """
+    Kolumna kodowana słownikiem - powtarzające się wartości zapisane raz.
+    """
+    __slots__ = ('codes', 'values', '_lookup')
+
+    def __init__(self):
+        # Kod wiersza -> indeks w self.values
+        self.codes = array('I')
+        self.values = []
+        self._lookup = {}
+
+    def code(self, value):
+        """Zwraca kod wartości (dopisuje ją do słownika przy pierwszym użyciu)"""
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.code(value))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __setitem__(self, index, value):
+        self.codes[index] = self.code(value)
+
+    def __delitem__(self, index):
+        del self.codes[index]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def copy(self):
+        """Zwraca niezależną kopię kolumny"""
+        column = _CodedColumn()
+        column.codes = array('I', self.codes)
+        column.values = list(self.values)
+        column._lookup = dict(self._lookup)
+        return column
+
+
+class _TextColumn:
+    """
+    Kolumna napisów zapisanych jako bajty UTF-8 w jednym buforze.
+    Zmienione i usunięte wartości zostawiają nieużywane bajty, które są
+    usuwane przepisaniem bufora, gdy stanowią ponad połowę jego rozmiaru.
+    """
+    __slots__ = ('_data', '_starts', '_lengths', '_garbage')
+
+    def __init__(self):
+        self._data = bytearray()
+        self._starts = array('q')
+        self._lengths = array('I')
+        self._garbage = 0
+
+    def append(self, value):
+        encoded = value.encode('utf-8')
+        self._starts.append(len(self._data))
+        self._lengths.append(len(encoded))
+        self._data += encoded
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        start = self._starts[index]
+        return self._data[start:start + self._lengths[index]].decode('utf-8')
+
+    def __setitem__(self, index, value):
+        encoded = value.encode('utf-8')
+        self._garbage += self._lengths[index]
+        self._starts[index] = len(self._data)
+        self._lengths[index] = len(encoded)
+        self._data += encoded
+        self._compact_if_needed()
+
+    def __delitem__(self, index):
+        self._garbage += self._lengths[index]
+        del self._starts[index]
+        del self._lengths[index]
+        self._compact_if_needed()
+
+    def __iter__(self):
+        data = self._data
+        for start, length in zip(self._starts, self._lengths):
+            yield data[start:start + length].decode('utf-8')
+
+    def copy(self):
+        """Zwraca niezależną kopię kolumny"""
+        column = _TextColumn()
+        column._data = bytearray(self._data)
+        column._starts = array('q', self._starts)
+        column._lengths = array('I', self._lengths)
+        column._garbage = self._garbage
+        return column
+
+    def _compact_if_needed(self):
+        """Przepisuje bufor bez nieużywanych bajtów"""
+        if self._garbage < _COMPACT_MIN_GARBAGE or self._garbage * 2 < len(self._data):
+            return
+        data = bytearray()
+        starts = array('q')
+        old = self._data
+        for start, length in zip(self._starts, self._lengths):
+            starts.append(len(data))
+            data += old[start:start + length]
+        self._data = data
+        self._starts = starts
+        self._garbage = 0
+
+
+class ContactTable:
+    """
+    Lista kontaktów przechowywana kolumnami.
+    Wiersze są zwracane jako krotki (imię, nazwisko, nick, telefon, email).
+    """
+    __slots__ = ('_first_names', '_last_names', '_nicknames', '_phones',
+                 '_email_locals', '_email_domains')
+
+    def __init__(self, contacts=()):
+        """
+        Args:
+            contacts: Początkowe kontakty (sekwencje pól)
+        """
+        self._first_names = _CodedColumn()
+        self._last_names = _CodedColumn()
+        self._nicknames = _CodedColumn()
+        self._phones = _TextColumn()
+        # Adres email dzielony na część lokalną i domenę (None - adres bez '@')
+        self._email_locals = _TextColumn()
+        self._email_domains = _CodedColumn()
+        self.extend(contacts)
+
+    def __len__(self):
+        return len(self._phones)
+
+    def __repr__(self):
+        return f"ContactTable({len(self)} kontaktów)"
+
+    def __getitem__(self, index):
+        """
+        Zwraca kontakt (lub listę kontaktów dla wycinka).
+        Args:
+            index: Indeks kontaktu lub wycinek
+        Returns:
+            tuple: Pola kontaktu
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        local = self._email_locals[index]
+        domain = self._email_domains[index]
+        return (self._first_names[index], self._last_names[index], self._nicknames[index],
+                self._phones[index], local if domain is None else f"{local}@{domain}")
+
+    def __setitem__(self, index, contact):
+        """
+        Zastępuje kontakt.
+        Args:
+            index: Indeks kontaktu
+            contact: Nowe pola kontaktu
+        """
+        first_name, last_name, nickname, phone, email = _fields(contact)
+        local, domain = _split_email(email)
+        self._phones[index] = phone
+        self._first_names[index] = first_name
+        self._last_names[index] = last_name
+        self._nicknames[index] = nickname
+        self._email_locals[index] = local
+        self._email_domains[index] = domain
+
+    def __delitem__(self, index):
+        """
+        Usuwa kontakt.
+        Args:
+            index: Indeks kontaktu
+        """
+        del self._phones[index]
+        del self._first_names[index]
+        del self._last_names[index]
+        del self._nicknames[index]
+        del self._email_locals[index]
+        del self._email_domains[index]
+
+    def __iter__(self):
+        for first_name, last_name, nickname, phone, local, domain in zip(
+                self._first_names, self._last_names, self._nicknames,
+                self._phones, self._email_locals, self._email_domains):
+            yield (first_name, last_name, nickname, phone,
+                   local if domain is None else f"{local}@{domain}")
+
+    def append(self, contact):
+        """
+        Dopisuje kontakt na koniec tabeli.
+        Args:
+            contact: Pola kontaktu
+        """
+        first_name, last_name, nickname, phone, email = _fields(contact)
+        local, domain = _split_email(email)
+        self._first_names.append(first_name)
+        self._last_names.append(last_name)
+        self._nicknames.append(nickname)
+        self._phones.append(phone)
+        self._email_locals.append(local)
+        self._email_domains.append(domain)
+
+    def extend(self, contacts):
+        """
+        Dopisuje kontakty na koniec tabeli.
+        Args:
+            contacts: Sekwencja kontaktów
+        """
+        append = self.append
+        for contact in contacts:
+            append(contact)
+
+    def column(self, field):
+        """
+        Zwraca wartości jednego pola wszystkich kontaktów bez tworzenia wierszy.
+        Args:
+            field: Numer pola (0-4)
+        Returns:
+            iterator: Wartości pola w kolejności kontaktów
+        """
+        if field == FIELD_COUNT - 1:
+            return (local if domain is None else f"{local}@{domain}"
+                    for local, domain in zip(self._email_locals, self._email_domains))
+        return iter((self._first_names, self._last_names, self._nicknames, self._phones)[field])
+
+    def copy(self):
+        """
+        Zwraca niezależną kopię tabeli (np. migawkę do zapisu w tle).
+        Returns:
+            ContactTable: Kopia
+        """
+        table = ContactTable.__new__(ContactTable)
+        for name in ContactTable.__slots__:
+            setattr(table, name, getattr(self, name).copy())
+        return table
+
+
+def _fields(contact):
+    """Zwraca dokładnie pięć pól kontaktu (brakujące pola są puste)"""
+    if len(contact) == FIELD_COUNT:
+        return contact
+    return (list(contact) + [''] * FIELD_COUNT)[:FIELD_COUNT]
+
+
+def _split_email(email):
+    """Dzieli adres email na część lokalną i domenę (None, gdy brak '@')"""
+    local, at, domain = email.rpartition('@')
+    if not at:
+        return email, None
+    return local, domain
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Generator syntetycznych książek kontaktów do testów wydajności.
+
+Dane przypominają dołączony plik contacts.csv: polskie imiona i nazwiska
+(żeńskie formy nazwisk -ska/-cka), zdrobnienia jako nicki, numery w kilku
+zapisach (+48501234569, 501234567, 501-234-567, +48 501 234 567, dawny
+zapis z zerem 0501234567) i adresy email w popularnych domenach. Część
+kontaktów (domyślnie 10%) to osoby z zagranicy z numerem kierunkowym
+innego kraju.
+
+Generator jest deterministyczny: to samo ziarno i ta sama liczba wierszy
+dają identyczny plik, więc wyniki pomiarów z różnych commitów można
+porównywać. Numery telefonów i adresy email są unikalne (numer to
+permutacja indeksu wiersza), a imiona i nazwiska powtarzają się jak
+w prawdziwej książce.
+
+Przykład:
+    python dataset.py --rows 10000 100000 1000000 --out-dir bench_data
+
+Wykorzystane biblioteki:
+- argparse: parametry wiersza poleceń
+- csv: zapis pliku kontaktów
+- random: losowanie danych (z ziarnem)
+- os: katalog wyjściowy
+- sorting: usuwanie znaków diakrytycznych z adresów email
+"""
+
+import argparse
+import csv
+import os
+import random
+
+from sorting import fold_diacritics
+
+# Imiona z typowymi zdrobnieniami (nick)
+_FEMALE_NAMES = (
+    ('Anna', 'Ania'), ('Maria', 'Marysia'), ('Katarzyna', 'Kasia'), ('Małgorzata', 'Gosia'),
+    ('Agnieszka', 'Aga'), ('Barbara', 'Basia'), ('Ewa', 'Ewka'), ('Krystyna', 'Krysia'),
+    ('Elżbieta', 'Ela'), ('Magdalena', 'Madzia'), ('Joanna', 'Asia'), ('Zofia', 'Zosia'),
+    ('Monika', 'Monia'), ('Aleksandra', 'Ola'), ('Natalia', 'Nati'), ('Julia', 'Jula'),
+    ('Dorota', 'Dora'), ('Beata', 'Beti'), ('Jadwiga', 'Jadzia'), ('Łucja', 'Łucka'),
+)
+_MALE_NAMES = (
+    ('Jan', 'Janek'), ('Piotr', 'Piotrek'), ('Krzysztof', 'Krzyś'), ('Andrzej', 'Andrzejek'),
+    ('Tomasz', 'Tom'), ('Paweł', 'Pako'), ('Michał', 'Mike'), ('Marcin', 'Marcinek'),
+    ('Stanisław', 'Staszek'), ('Grzegorz', 'Grześ'), ('Adam', 'Ad'), ('Łukasz', 'Łuki'),
+    ('Mateusz', 'Mati'), ('Wojciech', 'Wojtek'), ('Jakub', 'Kuba'), ('Zbigniew', 'Zbyszek'),
+    ('Dariusz', 'Darek'), ('Rafał', 'Rafi'), ('Kamil', 'Kamyk'), ('Szymon', 'Szymek'),
+)
+# Nazwiska: (forma męska, forma żeńska)
+_SURNAMES = (
+    ('Nowak', 'Nowak'), ('Kowalski', 'Kowalska'), ('Wiśniewski', 'Wiśniewska'),
+    ('Wójcik', 'Wójcik'), ('Kowalczyk', 'Kowalczyk'), ('Kamiński', 'Kamińska'),
+    ('Lewandowski', 'Lewandowska'), ('Zieliński', 'Zielińska'), ('Szymański', 'Szymańska'),
+    ('Woźniak', 'Woźniak'), ('Dąbrowski', 'Dąbrowska'), ('Kozłowski', 'Kozłowska'),
+    ('Jankowski', 'Jankowska'), ('Mazur', 'Mazur'), ('Kwiatkowski', 'Kwiatkowska'),
+    ('Krawczyk', 'Krawczyk'), ('Piotrowski', 'Piotrowska'), ('Grabowski', 'Grabowska'),
+    ('Nowakowski', 'Nowakowska'), ('Pawłowski', 'Pawłowska'), ('Michalski', 'Michalska'),
+    ('Zając', 'Zając'), ('Król', 'Król'), ('Wieczorek', 'Wieczorek'), ('Jabłoński', 'Jabłońska'),
+    ('Wróbel', 'Wróbel'), ('Majewski', 'Majewska'), ('Olszewski', 'Olszewska'),
+    ('Stępień', 'Stępień'), ('Malinowski', 'Malinowska'), ('Jaworski', 'Jaworska'),
+    ('Adamczyk', 'Adamczyk'), ('Dudek', 'Dudek'), ('Nowicki', 'Nowicka'), ('Pawlak', 'Pawlak'),
+    ('Górski', 'Górska'), ('Witkowski', 'Witkowska'), ('Walczak', 'Walczak'),
+    ('Sikora', 'Sikora'), ('Baran', 'Baran'), ('Rutkowski', 'Rutkowska'), ('Michalak', 'Michalak'),
+    ('Szewczyk', 'Szewczyk'), ('Ostrowski', 'Ostrowska'), ('Tomaszewski', 'Tomaszewska'),
+    ('Pietrzak', 'Pietrzak'), ('Duda', 'Duda'), ('Zalewski', 'Zalewska'),
+    ('Wróblewski', 'Wróblewska'), ('Jasiński', 'Jasińska'), ('Zawadzki', 'Zawadzka'),
+    ('Sadowski', 'Sadowska'), ('Bąk', 'Bąk'), ('Chmielewski', 'Chmielewska'),
+    ('Włodarczyk', 'Włodarczyk'), ('Borkowski', 'Borkowska'), ('Czarnecki', 'Czarnecka'),
+    ('Sawicki', 'Sawicka'), ('Sokołowski', 'Sokołowska'), ('Urbański', 'Urbańska'),
+)
+# Kontakty z zagranicy: (imiona, nazwiska, numer kierunkowy, długość numeru, domeny)
+_FOREIGN = (
+    (('John', 'Emma', 'Oliver', 'Amelia', 'Harry'), ('Smith', 'Jones', 'Taylor', 'Brown', 'Wilson'),
+     '44', 10, ('gmail.com', 'outlook.com', 'yahoo.co.uk')),
+    (('Karl', 'Anna', 'Lukas', 'Sophie', 'Jürgen'), ('Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber'),
+     '49', 11, ('gmx.de', 'web.de', 'gmail.com')),
+    (('Olena', 'Oleksandr', 'Iryna', 'Andrii', 'Natalia'), ('Kovalenko', 'Shevchenko', 'Bondarenko', 'Tkachenko', 'Melnyk'),
+     '380', 9, ('ukr.net', 'gmail.com')),
+    (('Marie', 'Louis', 'Camille', 'Hugo', 'Léa'), ('Dubois', 'Martin', 'Bernard', 'Lefèvre', 'Moreau'),
+     '33', 9, ('orange.fr', 'free.fr', 'gmail.com')),
+    (('Jan', 'Tereza', 'Petr', 'Lucie', 'Tomáš'), ('Novák', 'Svoboda', 'Dvořák', 'Černý', 'Procházka'),
+     '420', 9, ('seznam.cz', 'gmail.com')),
+)
+_POLISH_DOMAINS = ('gmail.com', 'wp.pl', 'o2.pl', 'interia.pl', 'onet.pl', 'op.pl',
+                   'outlook.com', 'hotmail.com', 'yahoo.com', 'poczta.fm')
+# Rozmiary zbiorów używane przez testy wydajności
+STANDARD_SIZES = (10000, 100000, 1000000)
+# Mnożnik permutujący numery - względnie pierwszy z liczbą numerów w puli
+_PHONE_STEP = 7919
+_PHONE_POOL = 400000000
+
+
+def _ascii(value):
+    """Zwraca tekst bez znaków diakrytycznych, małymi literami (część adresu email)"""
+    return fold_diacritics(value.lower())
+
+
+def generate_contacts(count, seed=1, foreign_ratio=0.1, legacy_ratio=0.02):
+    """
+    Generuje kontakty w sposób deterministyczny.
+    Args:
+        count: Liczba kontaktów
+        seed: Ziarno generatora liczb losowych
+        foreign_ratio: Udział kontaktów z zagranicy
+        legacy_ratio: Udział dawnych numerów z zerem na początku (0501234567,
+                      jak w contacts.csv - nie przechodzą walidacji)
+    Yields:
+        list: Pola kontaktu [imię, nazwisko, nick, telefon, email]
+    """
+    rng = random.Random(seed)
+    random_value = rng.random
+    choice = rng.choice
+    # Nazwy bez znaków diakrytycznych liczone raz dla każdej wartości
+    ascii_names = {}
+    offset = rng.randrange(_PHONE_POOL)
+    for i in range(count):
+        number = (offset + i * _PHONE_STEP) % _PHONE_POOL
+        draw = random_value()
+        if draw < foreign_ratio:
+            first_names, last_names, country, length, domains = choice(_FOREIGN)
+            first_name = choice(first_names)
+            last_name = choice(last_names)
+            nickname = ''
+            national = f"{number:09d}"[-9:].rjust(length, '1')
+            phone = f"+{country}{national}" if random_value() < 0.7 else f"+{country} {national}"
+            domain = choice(domains)
+        else:
+            if random_value() < 0.5:
+                first_name, nickname = choice(_FEMALE_NAMES)
+                last_name = choice(_SURNAMES)[1]
+            else:
+                first_name, nickname = choice(_MALE_NAMES)
+                last_name = choice(_SURNAMES)[0]
+            if random_value() < 0.4:
+                nickname = ''
+            digits = str(500000000 + number)
+            style = random_value()
+            if style < legacy_ratio:
+                phone = '0' + digits
+            elif style < 0.4:
+                phone = '+48' + digits
+            elif style < 0.75:
+                phone = digits
+            elif style < 0.9:
+                phone = f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+            else:
+                phone = f"+48 {digits[:3]} {digits[3:6]} {digits[6:]}"
+            domain = choice(_POLISH_DOMAINS)
+        first = ascii_names.get(first_name) or ascii_names.setdefault(first_name, _ascii(first_name))
+        last = ascii_names.get(last_name) or ascii_names.setdefault(last_name, _ascii(last_name))
+        pattern = random_value()
+        if pattern < 0.5:
+            local = f"{first}.{last}"
+        elif pattern < 0.8:
+            local = f"{first[0]}.{last}"
+        else:
+            local = f"{first}{last}"
+        # Numer wiersza zapewnia unikalność adresu (jak 'jan.kowalski84')
+        yield [first_name, last_name, nickname, phone, f"{local}{i}@{domain}"]
+
+
+def write_dataset(path, count, seed=1, **options):
+    """
+    Zapisuje wygenerowane kontakty do pliku CSV (strumieniowo).
+    Args:
+        path: Ścieżka do pliku CSV
+        count: Liczba kontaktów
+        seed: Ziarno generatora liczb losowych
+        **options: Opcje generate_contacts (foreign_ratio, legacy_ratio)
+    Returns:
+        str: Ścieżka do zapisanego pliku
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerows(generate_contacts(count, seed, **options))
+    return path
+
+
+def dataset_name(count, seed=1):
+    """
+    Zwraca nazwę pliku dla zbioru danej wielkości (np. 'contacts_100k_s1.csv').
+    Args:
+        count: Liczba kontaktów
+        seed: Ziarno generatora
+    Returns:
+        str: Nazwa pliku
+    """
+    if count % 1000000 == 0:
+        size = f"{count // 1000000}m"
+    elif count % 1000 == 0:
+        size = f"{count // 1000}k"
+    else:
+        size = str(count)
+    return f"contacts_{size}_s{seed}.csv"
+
+
+def ensure_dataset(directory, count, seed=1):
+    """
+    Zwraca ścieżkę do zbioru danych, generując go, jeśli jeszcze nie istnieje.
+    Args:
+        directory: Katalog ze zbiorami
+        count: Liczba kontaktów
+        seed: Ziarno generatora
+    Returns:
+        str: Ścieżka do pliku CSV
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, dataset_name(count, seed))
+    if not os.path.exists(path):
+        # Zapis przez plik tymczasowy - przerwane generowanie nie zostawia niepełnego zbioru
+        write_dataset(path + '.tmp', count, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generator syntetycznych książek kontaktów")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(STANDARD_SIZES),
+                        help="liczby kontaktów (domyślnie 10000 100000 1000000)")
+    parser.add_argument('--seed', type=int, default=1, help="ziarno generatora danych")
+    parser.add_argument('--out-dir', default='bench_data', help="katalog wyjściowy")
+    parser.add_argument('--force', action='store_true', help="nadpisz istniejące pliki")
+    args = parser.parse_args(argv)
+
+    for count in args.rows:
+        path = os.path.join(args.out_dir, dataset_name(count, args.seed))
+        if args.force and os.path.exists(path):
+            os.remove(path)
+        print(f"{ensure_dataset(args.out_dir, count, args.seed)}: {count} kontaktów")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""
+Opcjonalna diagnostyka wydajności okna programu.
+
+Włączana flagą wiersza poleceń lub zmienną środowiskową (domyślnie
+wyłączona - bez niej program nie ponosi żadnego narzutu):
+    python contact_manager.py --diagnostics
+    python contact_manager.py --profile profil
+    CONTACTS_DIAGNOSTICS=1 python contact_manager.py
+    CONTACTS_PROFILE=profil python contact_manager.py
+
+Diagnostyka:
+- opakowuje wybrane metody okna i modelu (wczytywanie, zapis, sortowanie,
+  wybór wiersza, walidacja, wstawianie wierszy do tabeli) pomiarem czasu;
+  czasy trafiają do histogramów o przedziałach logarytmicznych
+  (od 0,05 ms do 5 s), z których liczone są p50/p95
+- co LOOP_LAG_INTERVAL_MS mierzy opóźnienie pętli zdarzeń Tk: zadanie
+  root.after uruchomione później niż planowano oznacza, że wątek interfejsu
+  był zajęty (okno nie reagowało)
+- pokazuje wyniki w małym oknie (DiagnosticsWindow, klawisz F12)
+- z profilowaniem (--profile ŚCIEŻKA) dodatkowo uruchamia cProfile dla
+  wątku interfejsu i próbkowanie stosu; przy zamknięciu zapisuje
+  ŚCIEŻKA.prof (format pstats: python -m pstats, snakeviz, gprof2dot)
+  i ŚCIEŻKA.folded (stosy w formacie "a;b;c liczba" dla flamegraph.pl
+  i speedscope)
+
+Wykorzystane biblioteki:
+- time, bisect: pomiar czasu i przedziały histogramu
+- threading, sys: wątek próbkujący stos wątku interfejsu
+- cProfile: profil w formacie pstats (importowany tylko z profilowaniem)
+- atexit: zapis profilu także przy nietypowym zakończeniu programu
+- tkinter: okno diagnostyki
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+import tkinter as tk
+from bisect import bisect_left
+from tkinter import ttk
+
+# Zmienne środowiskowe włączające diagnostykę i profilowanie
+DIAGNOSTICS_ENV = 'CONTACTS_DIAGNOSTICS'
+PROFILE_ENV = 'CONTACTS_PROFILE'
+# Odstęp między pomiarami opóźnienia pętli zdarzeń Tk (ms)
+LOOP_LAG_INTERVAL_MS = 50
+# Odstęp między próbkami stosu wątku interfejsu (s)
+SAMPLE_INTERVAL = 0.005
+# Górne granice przedziałów histogramu (ms); ostatni przedział jest otwarty
+HISTOGRAM_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Nazwa pomiaru opóźnienia pętli zdarzeń
+LOOP_LAG = 'tk: opóźnienie pętli zdarzeń'
+# Metody okna (ContactManager) mierzone przez diagnostykę
+APP_METHODS = (
+    'load_contacts', 'load_contacts_lazy', 'load_contacts_snapshot', '_append_loaded_batch', '_apply_loaded_operation',
+    '_finish_loading', 'save_contacts', 'sort_column', 'item_selected', 'apply_search',
+    'refresh_view', 'refresh_virtual_rows', 'add_contact', 'update_contact', 'delete_contact',
+    'validate_name', 'validate_phone', 'validate_email',
+)
+# Metody modelu (ContactStore) mierzone przez diagnostykę; _checked to walidacja
+# kontaktu przed dodaniem lub zmianą
+STORE_METHODS = ('add', 'update', 'delete', '_checked', 'extend', 'search', 'fuzzy_search',
+                 'sorted_ids', 'save', 'materialize')
+# Sparkline histogramu w oknie diagnostyki
+_BARS = " ▁▂▃▄▅▆▇█"
+
+
+class Histogram:
+    """
+    Histogram czasów wywołań o stałych, logarytmicznych przedziałach.
+    """
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, seconds):
+        """
+        Dopisuje czas jednego wywołania.
+        Args:
+            seconds: Czas w sekundach
+        """
+        milliseconds = seconds * 1000
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.max:
+            self.max = milliseconds
+        self.buckets[bisect_left(HISTOGRAM_BOUNDS_MS, milliseconds)] += 1
+
+    def percentile(self, fraction):
+        """
+        Szacuje percentyl jako górną granicę przedziału (nie więcej niż maksimum).
+        Args:
+            fraction: Percentyl jako ułamek (np. 0.95)
+        Returns:
+            float: Czas w milisekundach (0.0 dla pustego histogramu)
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                if index == len(HISTOGRAM_BOUNDS_MS):
+                    return self.max
+                return min(HISTOGRAM_BOUNDS_MS[index], self.max)
+        return self.max
+
+    def sparkline(self):
+        """Zwraca histogram jako ciąg znaków blokowych (jeden znak na przedział)"""
+        peak = max(self.buckets) or 1
+        return ''.join(_BARS[(count * (len(_BARS) - 1) + peak - 1) // peak] for count in self.buckets)
+
+
+class StackSampler:
+    """
+    Próbkuje stos wątku interfejsu i zlicza stosy w formacie "folded"
+    (ramki od najbardziej zewnętrznej, rozdzielone średnikami).
+    """
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        """
+        Args:
+            thread_id: Identyfikator próbkowanego wątku (threading.get_ident())
+            interval: Odstęp między próbkami (s)
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        # Chroni self.counts - zapis (write) może nastąpić w trakcie próbkowania
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        """
+        Zapisuje zliczone stosy (format flamegraph.pl / speedscope).
+        Args:
+            path: Ścieżka do pliku .folded
+        """
+        with self._lock:
+            counts = sorted(self.counts.items())
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in counts:
+                file.write(f"{stack} {count}\n")
+
+    def _run(self):
+        labels = {}
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    # Spacje i średniki są separatorami formatu folded
+                    label = labels[code] = (f"{code.co_name}({os.path.basename(code.co_filename)}"
+                                            f":{code.co_firstlineno})").replace(' ', '_').replace(';', ':')
+                stack.append(label)
+                frame = frame.f_back
+            del frame
+            if stack:
+                key = ';'.join(reversed(stack))
+                with self._lock:
+                    self.counts[key] = self.counts.get(key, 0) + 1
+
+
+class Diagnostics:
+    """
+    Pomiary czasu wywołań, opóźnienia pętli zdarzeń Tk i opcjonalny profil.
+    """
+    def __init__(self, profile_path=None):
+        """
+        Args:
+            profile_path: Ścieżka (bez rozszerzenia) do zapisu profilu przy
+                          zamknięciu; None - bez profilowania
+        """
+        self.profile_path = profile_path
+        # Nazwa pomiaru -> Histogram
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._root = None
+        self._lag_job = None
+        self._lag_expected = 0.0
+        self._profiler = None
+        self._sampler = None
+        self._closed = False
+        self.window = None
+        if profile_path:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        atexit.register(self.close)
+
+    def record(self, name, seconds):
+        """
+        Dopisuje czas wywołania do histogramu.
+        Args:
+            name: Nazwa pomiaru
+            seconds: Czas w sekundach
+        """
+        with self._lock:
+            histogram = self.stats.get(name)
+            if histogram is None:
+                histogram = self.stats[name] = Histogram()
+            histogram.add(seconds)
+
+    def reset(self):
+        """Usuwa zebrane pomiary czasu"""
+        with self._lock:
+            self.stats = {}
+
+    def snapshot(self):
+        """
+        Zwraca podsumowanie pomiarów.
+        Returns:
+            list: Krotki (nazwa, liczba wywołań, suma ms, średnia ms, p50 ms,
+                  p95 ms, maksimum ms, sparkline) od największej sumy czasu
+        """
+        with self._lock:
+            rows = [(name, h.count, h.total, h.total / h.count, h.percentile(0.5),
+                     h.percentile(0.95), h.max, h.sparkline())
+                    for name, h in self.stats.items() if h.count]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def timed(self, name, function):
+        """
+        Opakowuje funkcję pomiarem czasu.
+        Args:
+            name: Nazwa pomiaru
+            function: Funkcja lub metoda związana z obiektem
+        Returns:
+            callable: Funkcja zapisująca czas każdego wywołania
+        """
+        record = self.record
+        clock = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, clock() - start)
+        return wrapper
+
+    def instrument(self, obj, names, prefix):
+        """
+        Zastępuje metody obiektu (atrybuty instancji) wersjami mierzącymi czas.
+        Wywoływane przed utworzeniem widżetów - przyciski i powiązania
+        zdarzeń dostają już opakowane metody.
+        Args:
+            obj: Obiekt, np. ContactManager lub ContactStore
+            names: Nazwy metod (brakujące są pomijane)
+            prefix: Przedrostek nazw pomiarów (np. 'okno' lub 'model')
+        """
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self.timed(f"{prefix}.{name}", method))
+
+    def start(self, root):
+        """
+        Uruchamia pomiar opóźnienia pętli zdarzeń Tk i skrót F12 do okna diagnostyki.
+        Args:
+            root: Główne okno aplikacji
+        """
+        self._root = root
+        root.bind_all('<F12>', lambda event: self.show_window())
+        self._schedule_lag_probe()
+
+    def show_window(self):
+        """Otwiera (lub przywraca) okno diagnostyki"""
+        if self.window is not None and self.window.top.winfo_exists():
+            self.window.top.lift()
+            return
+        self.window = DiagnosticsWindow(self._root, self)
+
+    def dump_profile(self):
+        """
+        Zapisuje bieżący profil (ŚCIEŻKA.prof i ŚCIEŻKA.folded).
+        Returns:
+            list: Ścieżki zapisanych plików (pusta bez profilowania)
+        Raises:
+            OSError: Błąd zapisu pliku profilu
+        """
+        if self._profiler is None:
+            return []
+        self._profiler.disable()
+        try:
+            self._profiler.dump_stats(self.profile_path + '.prof')
+        finally:
+            if not self._closed:
+                self._profiler.enable()
+        self._sampler.write(self.profile_path + '.folded')
+        return [self.profile_path + '.prof', self.profile_path + '.folded']
+
+    def close(self):
+        """Kończy pomiary i zapisuje profil (wywoływane też przy wyjściu z programu)"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        if self._lag_job is not None and self._root is not None:
+            try:
+                self._root.after_cancel(self._lag_job)
+            except tk.TclError:
+                # Okno zostało już zniszczone
+                pass
+            self._lag_job = None
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.dump_profile()
+
+    def _schedule_lag_probe(self):
+        self._lag_expected = time.perf_counter() + LOOP_LAG_INTERVAL_MS / 1000
+        self._lag_job = self._root.after(LOOP_LAG_INTERVAL_MS, self._lag_probe)
+
+    def _lag_probe(self):
+        """Zapisuje, o ile później niż planowano uruchomiono zadanie root.after"""
+        self.record(LOOP_LAG, max(0.0, time.perf_counter() - self._lag_expected))
+        self._schedule_lag_probe()
+
+
+def from_environment(enabled=False, profile_path=None, environ=None):
+    """
+    Tworzy diagnostykę, jeśli włączono ją flagą lub zmienną środowiskową.
+    Args:
+        enabled: Flaga --diagnostics
+        profile_path: Ścieżka z flagi --profile (ma pierwszeństwo przed zmienną)
+        environ: Zmienne środowiskowe (domyślnie os.environ)
+    Returns:
+        Diagnostics lub None, gdy diagnostyka jest wyłączona
+    """
+    environ = os.environ if environ is None else environ
+    profile_path = profile_path or environ.get(PROFILE_ENV) or None
+    enabled = enabled or environ.get(DIAGNOSTICS_ENV, '') not in ('', '0')
+    if not (enabled or profile_path):
+        return None
+    return Diagnostics(profile_path)
+
+
+class DiagnosticsWindow:
+    """
+    Okno z tabelą czasów wywołań i histogramami (odświeżane co sekundę).
+    """
+    REFRESH_MS = 1000
+    COLUMNS = ("Wywołania", "Suma ms", "Średnia ms", "p50 ms", "p95 ms", "Maks. ms", "Histogram")
+
+    def __init__(self, root, diagnostics):
+        """
+        Args:
+            root: Główne okno aplikacji
+            diagnostics: Obiekt Diagnostics
+        """
+        self.diagnostics = diagnostics
+        self.top = tk.Toplevel(root)
+        self.top.title("Diagnostyka")
+        self.top.geometry("900x400")
+
+        self.tree = ttk.Treeview(self.top, columns=self.COLUMNS)
+        self.tree.heading('#0', text="Pomiar")
+        self.tree.column('#0', width=260)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=150 if column == "Histogram" else 80, anchor="e")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        buttons = ttk.Frame(self.top)
+        buttons.pack(fill="x", padx=10, pady=5)
+        ttk.Button(buttons, text="Wyczyść", command=self.clear).pack(side="left", padx=5)
+        if diagnostics.profile_path:
+            ttk.Button(buttons, text="Zapisz profil", command=self.save_profile).pack(side="left", padx=5)
+        self.status = ttk.Label(buttons, text=f"Histogram: przedziały od <{HISTOGRAM_BOUNDS_MS[0]} ms "
+                                              f"do >{HISTOGRAM_BOUNDS_MS[-1]} ms")
+        self.status.pack(side="left", padx=5)
+        self.refresh()
+
+    def refresh(self):
+        """Odświeża tabelę pomiarów"""
+        if not self.top.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for name, count, total, mean, p50, p95, maximum, sparkline in self.diagnostics.snapshot():
+            self.tree.insert("", "end", text=name, values=(
+                count, f"{total:.1f}", f"{mean:.2f}", f"{p50:.2f}", f"{p95:.2f}",
+                f"{maximum:.2f}", sparkline))
+        self.top.after(self.REFRESH_MS, self.refresh)
+
+    def clear(self):
+        """Usuwa zebrane pomiary"""
+        self.diagnostics.reset()
+        self.tree.delete(*self.tree.get_children())
+
+    def save_profile(self):
+        """Zapisuje bieżący profil bez zamykania programu"""
+        try:
+            paths = self.diagnostics.dump_profile()
+        except OSError as e:
+            self.status.configure(text=f"Błąd zapisu profilu: {str(e)}")
+            return
+        self.status.configure(text="Zapisano: " + ", ".join(paths))
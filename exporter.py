@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Strumieniowy eksport kontaktów do plików CSV, vCard 4.0 i JSON Lines,
+opcjonalnie skompresowanych (gzip, zstd).
+
+Przebieg eksportu (potok generatorów):
+1. źródło - iterator kontaktów (np. ContactStore.iter_contacts), który
+   odczytuje kontakty po jednym; cała książka nie jest kopiowana
+2. porcje po CHUNK_SIZE kontaktów (itertools.islice)
+3. kodowanie porcji do tekstu w wybranym formacie i do bajtów UTF-8
+4. zapis do pliku tymczasowego, przez kompresor gzip lub zstd,
+   a na koniec os.replace - przerwany eksport nie zostawia niepełnego pliku
+
+W pamięci jest naraz tylko jedna porcja, więc zużycie pamięci nie zależy
+od rozmiaru książki. Między porcjami zgłaszany jest postęp i sprawdzane
+jest żądanie anulowania (threading.Event), dzięki czemu eksport może
+działać w wątku w tle.
+
+Formaty (rozpoznawane po rozszerzeniu pliku):
+- .csv: imię, nazwisko, nick, telefon, email - jak plik książki
+- .vcf, .vcard: vCard 4.0 (RFC 6350) - FN, N, NICKNAME, TEL (URI tel:), EMAIL
+- .jsonl, .ndjson: jeden obiekt JSON w linii z polami validation.FIELDS
+- dodatkowe rozszerzenie .gz lub .zst (np. kopia.csv.gz) - kompresja
+
+Wykorzystane biblioteki:
+- csv, json: kodowanie kontaktów
+- gzip: kompresja gzip
+- zstandard (opcjonalnie): kompresja zstd
+- contextlib, io, itertools, os: potok zapisu i zapis przez plik tymczasowy
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from contextlib import ExitStack
+from itertools import islice
+
+try:
+    import zstandard
+except ImportError:
+    # Eksport .zst wymaga pakietu zstandard; pozostałe formaty działają bez niego
+    zstandard = None
+
+from validation import FIELDS
+
+# Liczba kontaktów kodowanych i zapisywanych naraz
+CHUNK_SIZE = 5000
+# Obsługiwane formaty i kompresje
+EXPORT_FORMATS = ('csv', 'vcard', 'jsonl')
+COMPRESSIONS = ('gzip', 'zstd')
+# Rozszerzenie pliku -> format
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.vcf': 'vcard',
+    '.vcard': 'vcard',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+# Rozszerzenie pliku -> kompresja
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+# Poziomy kompresji (gzip 6 - jak narzędzie gzip; zstd 3 - domyślny zstd)
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Maksymalna długość linii vCard w bajtach (dłuższe są zawijane)
+VCARD_LINE_OCTETS = 75
+
+
+class ExportCancelled(Exception):
+    """
+    Eksport przerwany na żądanie (plik docelowy nie został utworzony).
+    """
+    def __init__(self, exported):
+        """
+        Args:
+            exported: Liczba kontaktów zapisanych przed przerwaniem
+        """
+        super().__init__(f"Eksport anulowany po {exported} kontaktach")
+        self.exported = exported
+
+
+def detect_export_format(path):
+    """
+    Rozpoznaje format i kompresję eksportu po rozszerzeniu pliku.
+    Args:
+        path: Ścieżka do pliku docelowego, np. 'kopia.vcf.gz'
+    Returns:
+        tuple: (format, kompresja lub None)
+    Raises:
+        ValueError: Gdy rozszerzenie nie odpowiada żadnemu formatowi
+    """
+    root, extension = os.path.splitext(path.lower())
+    compression = COMPRESSION_EXTENSIONS.get(extension)
+    if compression is not None:
+        root, extension = os.path.splitext(root)
+    file_format = FORMAT_EXTENSIONS.get(extension)
+    if file_format is None:
+        raise ValueError(f"Nieznany format eksportu: {os.path.basename(path)} "
+                         f"(obsługiwane: {', '.join(FORMAT_EXTENSIONS)}, opcjonalnie z .gz lub .zst)")
+    return file_format, compression
+
+
+def encode_csv(contacts):
+    """
+    Koduje porcję kontaktów jako wiersze CSV.
+    Args:
+        contacts: Lista kontaktów
+    Returns:
+        str: Tekst porcji
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(contacts)
+    return buffer.getvalue()
+
+
+def encode_jsonl(contacts):
+    """
+    Koduje porcję kontaktów jako JSON Lines (obiekt z polami FIELDS w linii).
+    Args:
+        contacts: Lista kontaktów
+    Returns:
+        str: Tekst porcji
+    """
+    return ''.join(json.dumps(dict(zip(FIELDS, contact)), ensure_ascii=False) + '\n'
+                   for contact in contacts)
+
+
+def encode_vcard(contacts):
+    """
+    Koduje porcję kontaktów jako wizytówki vCard 4.0.
+    Args:
+        contacts: Lista kontaktów
+    Returns:
+        str: Tekst porcji (linie zakończone CRLF)
+    """
+    lines = []
+    for first_name, last_name, nickname, phone, email in contacts:
+        # FN jest wymagane - bez imienia i nazwiska nazwą jest nick, email lub telefon
+        full_name = ' '.join(part for part in (first_name, last_name) if part) or nickname or email or phone
+        lines.append('BEGIN:VCARD')
+        lines.append('VERSION:4.0')
+        lines.append(_fold('FN:' + _escape(full_name)))
+        lines.append(_fold(f'N:{_escape(last_name)};{_escape(first_name)};;;'))
+        if nickname:
+            lines.append(_fold('NICKNAME:' + _escape(nickname)))
+        if phone:
+            lines.append(_fold('TEL;VALUE=uri:tel:' + phone.replace(' ', '')))
+        if email:
+            lines.append(_fold('EMAIL:' + _escape(email)))
+        lines.append('END:VCARD')
+    lines.append('')
+    return '\r\n'.join(lines)
+
+
+def _escape(value):
+    """Dodaje znaki ucieczki do wartości tekstowej vCard (\\, przecinek, średnik, nowa linia)"""
+    return (value.replace('\\', '\\\\').replace(',', '\\,').replace(';', '\\;')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """
+    Zawija linię vCard dłuższą niż VCARD_LINE_OCTETS bajtów (RFC 6350, 3.2)
+    bez dzielenia znaków wielobajtowych.
+    """
+    if len(line) * 4 <= VCARD_LINE_OCTETS or len(line.encode('utf-8')) <= VCARD_LINE_OCTETS:
+        return line
+    parts, current, size = [], [], 0
+    for char in line:
+        octets = len(char.encode('utf-8'))
+        # Linie kontynuacji zaczynają się od spacji, która też się liczy
+        limit = VCARD_LINE_OCTETS if not parts else VCARD_LINE_OCTETS - 1
+        if size + octets > limit:
+            parts.append(''.join(current))
+            current, size = [], 0
+        current.append(char)
+        size += octets
+    parts.append(''.join(current))
+    return '\r\n '.join(parts)
+
+
+# Format -> funkcja kodująca porcję kontaktów
+ENCODERS = {
+    'csv': encode_csv,
+    'vcard': encode_vcard,
+    'jsonl': encode_jsonl,
+}
+
+
+def encoded_chunks(contacts, file_format='csv', chunk_size=CHUNK_SIZE):
+    """
+    Dzieli strumień kontaktów na porcje i koduje każdą do bajtów.
+    Args:
+        contacts: Iterator kontaktów
+        file_format: 'csv', 'vcard' lub 'jsonl'
+        chunk_size: Liczba kontaktów w porcji
+    Yields:
+        tuple: (liczba kontaktów w porcji, bajty UTF-8)
+    """
+    encode = ENCODERS[file_format]
+    contacts = iter(contacts)
+    while True:
+        chunk = list(islice(contacts, chunk_size))
+        if not chunk:
+            return
+        yield len(chunk), encode(chunk).encode('utf-8')
+
+
+def write_contacts(contacts, stream, file_format='csv', on_progress=None, cancel=None,
+                   chunk_size=CHUNK_SIZE):
+    """
+    Zapisuje strumień kontaktów do otwartego strumienia binarnego.
+    Args:
+        contacts: Iterator kontaktów
+        stream: Strumień binarny (plik, kompresor, sys.stdout.buffer)
+        file_format: 'csv', 'vcard' lub 'jsonl'
+        on_progress: Funkcja wywoływana po każdej porcji z liczbą zapisanych kontaktów
+        cancel: threading.Event - ustawienie przerywa zapis przed kolejną porcją
+        chunk_size: Liczba kontaktów w porcji
+    Returns:
+        int: Liczba zapisanych kontaktów
+    Raises:
+        ExportCancelled: Gdy zapis został anulowany
+    """
+    exported = 0
+    for count, data in encoded_chunks(contacts, file_format, chunk_size):
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled(exported)
+        stream.write(data)
+        exported += count
+        if on_progress is not None:
+            on_progress(exported)
+    return exported
+
+
+def export_file(contacts, path, file_format=None, compression=None, on_progress=None,
+                cancel=None, chunk_size=CHUNK_SIZE):
+    """
+    Eksportuje kontakty do pliku przez plik tymczasowy.
+    Args:
+        contacts: Iterator kontaktów
+        path: Ścieżka do pliku docelowego
+        file_format: 'csv', 'vcard', 'jsonl' lub None (według rozszerzenia)
+        compression: 'gzip', 'zstd' lub None; przy file_format=None
+                     kompresja jest także rozpoznawana po rozszerzeniu
+        on_progress: Funkcja wywoływana po każdej porcji z liczbą zapisanych kontaktów
+        cancel: threading.Event - ustawienie przerywa eksport
+        chunk_size: Liczba kontaktów w porcji
+    Returns:
+        int: Liczba wyeksportowanych kontaktów
+    Raises:
+        ValueError: Nieznany format lub kompresja
+        RuntimeError: Kompresja zstd bez pakietu zstandard
+        ExportCancelled: Eksport anulowany (plik docelowy nie jest zmieniany)
+        OSError: Błąd zapisu pliku
+    """
+    if file_format is None:
+        file_format, compression = detect_export_format(path)
+    if file_format not in ENCODERS:
+        raise ValueError(f"Nieznany format eksportu: {file_format}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Nieznana kompresja: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise RuntimeError("kompresja zstd wymaga pakietu zstandard (pip install zstandard)")
+
+    tmp_path = path + '.tmp'
+    try:
+        with ExitStack() as stack:
+            stream = file = stack.enter_context(open(tmp_path, 'wb'))
+            # Utrwalenie pliku po zamknięciu kompresora, przed os.replace
+            stack.callback(lambda: (file.flush(), os.fsync(file.fileno())))
+            if compression == 'gzip':
+                # Nazwa zapisywana w nagłówku gzip - plik po rozpakowaniu
+                name = os.path.basename(path)
+                if name.lower().endswith('.gz'):
+                    name = name[:-3]
+                stream = stack.enter_context(
+                    gzip.GzipFile(filename=name, mode='wb', fileobj=stream,
+                                  compresslevel=GZIP_LEVEL))
+            elif compression == 'zstd':
+                compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+                stream = stack.enter_context(compressor.stream_writer(stream, closefd=False))
+            exported = write_contacts(contacts, stream, file_format, on_progress, cancel, chunk_size)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return exported
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+Wyszukiwanie przybliżone (odporne na literówki i brak polskich znaków).
+
+Zamiast liczyć odległość edycyjną dla każdego kontaktu, FuzzyIndex
+przechowuje słownik słów występujących w kontaktach (imiona, nazwiska,
+nicki, części adresów email) - słów jest wielokrotnie mniej niż kontaktów:
+- słowa są zapisywane po casefold i usunięciu znaków diakrytycznych
+  ('Wójcik' -> 'wojcik', 'Michał' -> 'michal'), więc brak polskich
+  znaków w zapytaniu lub w danych nie przeszkadza w dopasowaniu
+- każde słowo wskazuje na rosnącą tablicę identyfikatorów kontaktów (array)
+- trójki znaków słów (z '$' na początku i końcu) wskazują na słowa, które
+  je zawierają; kandydaci do porównania to słowa mające z zapytaniem
+  wystarczająco wiele wspólnych trójek (co najmniej n - 3k dla k edycji)
+- dla kandydatów liczona jest odległość Damerau-Levenshteina (zamiana
+  sąsiednich liter to jedna edycja) z przerwaniem po przekroczeniu limitu
+
+Cyfry (numery telefonów, cyfry w adresach email) nie trafiają do słownika -
+cyfry z zapytania są dopasowywane dokładnie przez indeks wyszukiwania.
+
+Ocena słowa zapytania: 1.0 - to samo słowo (po usunięciu znaków
+diakrytycznych), 0.6-0.9 - początek słowa (pisanie w toku), do 0.9 - słowo
+w odległości edycyjnej 1-2 (zależnie od długości). Ocena kontaktu to suma
+najlepszych ocen wszystkich słów zapytania; kontakt musi pasować do każdego
+słowa. Czas odpowiedzi zależy od liczby słów w słowniku i kontaktów
+pasujących słów, a nie od liczby wszystkich kontaktów; liczba słów
+kandydatów i przeglądanych kontaktów jest ograniczona.
+
+Wykorzystane biblioteki:
+- array: zwarte listy identyfikatorów
+- bisect: wyszukiwanie słów po początku i utrzymanie porządku identyfikatorów
+- collections: zliczanie wspólnych trójek znaków
+- heapq: wybór najlepszych wyników
+- re: podział tekstu na słowa
+- sorting: usuwanie znaków diakrytycznych
+"""
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+
+from sorting import fold_diacritics
+
+# Maksymalna liczba słów ze słownika dopasowanych do jednego słowa zapytania
+MAX_TERMS_PER_WORD = 64
+# Maksymalna liczba kontaktów kandydatów przeglądanych dla zapytania
+MAX_CANDIDATES = 200000
+# Domyślna maksymalna liczba zwracanych wyników
+DEFAULT_LIMIT = 500
+# Minimalna długość słowa zapisywanego w słowniku
+MIN_TERM_LENGTH = 2
+
+# Ciągi liter (bez cyfr i '_') - słowa słownika
+_LETTER_RUNS = re.compile(r'[^\W\d_]+')
+_DIGIT_RUNS = re.compile(r'\d+')
+# Spacje i myślniki wewnątrz numeru telefonu w zapytaniu ('501 234-569' -> '501234569')
+_PHONE_SEPARATORS = re.compile(r'(?<=\d)[\s-]+(?=\d)')
+# Cyfry zamieniane na spacje - adresy różniące się tylko cyframi mają te same słowa
+_DIGITS_TO_SPACES = str.maketrans('0123456789', ' ' * 10)
+# Pola kontaktu zapisywane w słowniku: imię, nazwisko, nick, email
+_TEXT_FIELDS = (0, 1, 2, 4)
+
+
+def max_edits(length):
+    """
+    Zwraca dopuszczalną liczbę literówek dla słowa o danej długości.
+    Args:
+        length: Długość słowa zapytania
+    Returns:
+        int: 0 dla słów do 2 liter, 1 do 5 liter, 2 dla dłuższych
+    """
+    if length <= 2:
+        return 0
+    return 1 if length <= 5 else 2
+
+
+def trigrams(term):
+    """Zwraca zbiór trójek znaków słowa z '$' na początku i końcu"""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Odległość Damerau-Levenshteina (zamiana sąsiednich liter to jedna edycja)
+    z przerwaniem, gdy przekracza limit.
+    Args:
+        a, b: Porównywane słowa
+        limit: Maksymalna interesująca odległość
+    Returns:
+        int: Odległość lub limit + 1, gdy jest większa niż limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            cost = 0 if char_a == char_b else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == char_b and value > previous2[j - 2] + 1):
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def value_words(value):
+    """
+    Zwraca słowa pola zapisywane w słowniku (przed usunięciem znaków diakrytycznych).
+    Args:
+        value: Wartość pola (imię, nazwisko, nick lub adres email)
+    Returns:
+        list: Ciągi liter (casefold) o długości co najmniej MIN_TERM_LENGTH
+    """
+    return [word for word in _LETTER_RUNS.findall(value.casefold()) if len(word) >= MIN_TERM_LENGTH]
+
+
+def contact_terms(contact):
+    """
+    Zwraca słowa kontaktu zapisywane w słowniku.
+    Args:
+        contact: Pola kontaktu [imię, nazwisko, nick, telefon, email]
+    Returns:
+        set: Ciągi liter (casefold) imienia, nazwiska, nicku i adresu email
+    """
+    first_name, last_name, nickname, _, email = contact[:5]
+    return set(value_words(f"{first_name} {last_name} {nickname} {email}"))
+
+
+def split_query(query):
+    """
+    Dzieli zapytanie na słowa do dopasowania przybliżonego i ciągi cyfr.
+    Args:
+        query: Tekst zapytania
+    Returns:
+        tuple: (słowa bez znaków diakrytycznych, ciągi cyfr)
+    """
+    query = _PHONE_SEPARATORS.sub('', query.casefold())
+    words = [fold_diacritics(word) for word in _LETTER_RUNS.findall(query)]
+    return words, _DIGIT_RUNS.findall(query)
+
+
+class FuzzyIndex:
+    """
+    Słownik słów kontaktów z indeksem trójek znaków, aktualizowany przy edycji.
+    """
+    def __init__(self):
+        # Słowo (bez znaków diakrytycznych) -> numer słowa
+        self._term_ids = {}
+        # Numer słowa -> słowo i rosnąca tablica identyfikatorów kontaktów
+        self._terms = []
+        self._postings = []
+        # Trójka znaków -> numery słów
+        self._grams = {}
+        # Posortowane słowa (wyszukiwanie po początku słowa)
+        self._sorted_terms = []
+        # Pamięć podręczna: słowo przed usunięciem znaków diakrytycznych -> numer słowa
+        self._folded = {}
+
+    def __len__(self):
+        """Liczba słów w słowniku"""
+        return len(self._terms)
+
+    def build(self, contacts, contact_ids):
+        """
+        Buduje indeks od nowa.
+        Pola są czytane kolumnami (ContactTable.column - bez tworzenia wierszy),
+        a słowa każdej różnej wartości pola są wyznaczane raz (imiona i nazwiska
+        się powtarzają; w adresach email cyfry są pomijane przy zapamiętywaniu).
+        Args:
+            contacts: Lista kontaktów lub ContactTable
+            contact_ids: Identyfikatory kontaktów (rosnące, równoległe do contacts)
+        """
+        self.__init__()
+        if hasattr(contacts, 'column'):
+            columns = [contacts.column(field) for field in _TEXT_FIELDS]
+        else:
+            columns = [map(itemgetter(field), contacts) for field in _TEXT_FIELDS]
+        name_cache = {}
+        email_cache = {}
+        postings = self._postings
+        value_terms = self._value_terms
+        for contact_id, first_name, last_name, nickname, email in zip(contact_ids, *columns):
+            numbers = name_cache.get(first_name) or value_terms(first_name, name_cache)
+            other = name_cache.get(last_name) or value_terms(last_name, name_cache)
+            if nickname:
+                other += name_cache.get(nickname) or value_terms(nickname, name_cache)
+            if email:
+                key = email.translate(_DIGITS_TO_SPACES)
+                other += email_cache.get(key) or value_terms(key, email_cache)
+            for number in numbers:
+                postings[number].append(contact_id)
+            for number in other:
+                if number not in numbers:
+                    ids = postings[number]
+                    # Słowo powtórzone w kilku polach - identyfikator zapisany raz
+                    if not ids or ids[-1] != contact_id:
+                        ids.append(contact_id)
+        self._sorted_terms = sorted(self._terms)
+
+    def _value_terms(self, value, cache):
+        """Zwraca numery słów wartości pola i zapamiętuje je w cache"""
+        numbers = cache[value] = tuple({self._term_id(word) for word in value_words(value)})
+        return numbers
+
+    def add(self, contact_id, contact):
+        """
+        Dodaje kontakt do indeksu.
+        Args:
+            contact_id: Identyfikator kontaktu
+            contact: Dane kontaktu
+        """
+        count = len(self._terms)
+        # Słowa różniące się tylko znakami diakrytycznymi to jeden numer
+        numbers = {self._term_id(word) for word in contact_terms(contact)}
+        for number in numbers:
+            if number >= count:
+                insort(self._sorted_terms, self._terms[number])
+            ids = self._postings[number]
+            if not ids or ids[-1] < contact_id:
+                ids.append(contact_id)
+            else:
+                position = bisect_left(ids, contact_id)
+                if position == len(ids) or ids[position] != contact_id:
+                    ids.insert(position, contact_id)
+
+    def remove(self, contact_id, contact):
+        """
+        Usuwa kontakt z indeksu.
+        Args:
+            contact_id: Identyfikator kontaktu
+            contact: Dane kontaktu zapisane w indeksie
+        """
+        numbers = {self._folded.get(word) for word in contact_terms(contact)}
+        numbers.discard(None)
+        for number in numbers:
+            ids = self._postings[number]
+            position = bisect_left(ids, contact_id)
+            if position < len(ids) and ids[position] == contact_id:
+                del ids[position]
+
+    def update(self, contact_id, old_contact, contact):
+        """
+        Aktualizuje kontakt w indeksie.
+        Args:
+            contact_id: Identyfikator kontaktu
+            old_contact: Dane przed zmianą
+            contact: Nowe dane
+        """
+        self.remove(contact_id, old_contact)
+        self.add(contact_id, contact)
+
+    def search(self, words, candidates=None, limit=DEFAULT_LIMIT):
+        """
+        Wyszukuje kontakty pasujące w przybliżeniu do wszystkich słów.
+        Args:
+            words: Słowa zapytania bez znaków diakrytycznych (split_query)
+            candidates: Opcjonalny zbiór identyfikatorów, do których zawęża się wynik
+            limit: Maksymalna liczba wyników
+        Returns:
+            list: Pary (identyfikator, ocena) od najlepszej oceny
+                  (przy równej ocenie - rosnąco po identyfikatorze)
+        """
+        matches = [self.match_terms(word) for word in words]
+        if not matches or not all(matches):
+            return []
+        if len(matches) == 1 and candidates is None:
+            return self._best_single(matches[0], limit)
+        # Najpierw słowo o najmniejszej liczbie kontaktów
+        matches.sort(key=lambda found: sum(len(self._postings[number]) for number in found))
+        scores = self._contact_scores(matches[0], candidates)
+        for found in matches[1:]:
+            if not scores:
+                break
+            word_scores = self._contact_scores(found, scores)
+            scores = {contact_id: score + scores[contact_id]
+                      for contact_id, score in word_scores.items()}
+        return heapq.nsmallest(limit, ((contact_id, score) for contact_id, score in scores.items()),
+                               key=lambda item: (-item[1], item[0]))
+
+    def match_terms(self, word):
+        """
+        Wyszukuje słowa słownika podobne do słowa zapytania.
+        Args:
+            word: Słowo zapytania bez znaków diakrytycznych
+        Returns:
+            dict: Numer słowa -> ocena (najwyżej MAX_TERMS_PER_WORD najlepszych)
+        """
+        found = {}
+        # Początek słowa (pisanie w toku) i słowo identyczne
+        start = bisect_left(self._sorted_terms, word)
+        for term in islice(self._sorted_terms, start, None):
+            if not term.startswith(word):
+                break
+            found[self._term_ids[term]] = 1.0 if term == word else 0.6 + 0.3 * len(word) / len(term)
+            if len(found) >= MAX_TERMS_PER_WORD * 4:
+                break
+
+        limit = max_edits(len(word))
+        if limit:
+            grams = trigrams(word)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._grams.get(gram, ()))
+            needed = max(1, len(grams) - 3 * limit)
+            terms = self._terms
+            for number, count in shared.items():
+                if count < needed or number in found:
+                    continue
+                term = terms[number]
+                distance = edit_distance(word, term, limit)
+                if distance <= limit:
+                    found[number] = 0.9 * (1 - distance / max(len(word), len(term)))
+
+        found = {number: score for number, score in found.items() if self._postings[number]}
+        if len(found) > MAX_TERMS_PER_WORD:
+            found = dict(heapq.nlargest(MAX_TERMS_PER_WORD, found.items(), key=lambda item: item[1]))
+        return found
+
+    def _best_single(self, found, limit):
+        """Wynik dla jednego słowa: kontakty kolejnych słów od najlepszej oceny"""
+        best = {}
+        for number, score in sorted(found.items(), key=lambda item: -item[1]):
+            if len(best) >= limit:
+                # Kolejne słowa mają niższe oceny
+                break
+            for contact_id in self._postings[number]:
+                if contact_id not in best:
+                    best[contact_id] = score
+        return heapq.nsmallest(limit, best.items(), key=lambda item: (-item[1], item[0]))
+
+    def _contact_scores(self, found, candidates=None):
+        """
+        Zwraca najlepszą ocenę słowa dla każdego pasującego kontaktu.
+        Args:
+            found: Numer słowa -> ocena (z match_terms)
+            candidates: Opcjonalny zbiór lub słownik identyfikatorów, do których
+                        zawęża się wynik
+        Returns:
+            dict: Identyfikator -> ocena
+        """
+        scores = {}
+        visited = 0
+        for number, score in sorted(found.items(), key=lambda item: -item[1]):
+            ids = self._postings[number]
+            visited += len(ids)
+            for contact_id in ids:
+                if candidates is not None and contact_id not in candidates:
+                    continue
+                if scores.get(contact_id, 0.0) < score:
+                    scores[contact_id] = score
+            if visited >= MAX_CANDIDATES:
+                # Ograniczenie czasu - pozostałe słowa mają niższe oceny
+                break
+        return scores
+
+    def _term_id(self, word):
+        """Zwraca numer słowa (dopisuje je do słownika przy pierwszym użyciu)"""
+        number = self._folded.get(word)
+        if number is None:
+            term = fold_diacritics(word)
+            number = self._term_ids.get(term)
+            if number is None:
+                number = self._term_ids[term] = len(self._terms)
+                self._terms.append(term)
+                self._postings.append(array('i'))
+                for gram in trigrams(term):
+                    ids = self._grams.get(gram)
+                    if ids is None:
+                        self._grams[gram] = array('i', [number])
+                    else:
+                        ids.append(number)
+            self._folded[word] = number
+        return number
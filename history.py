@@ -0,0 +1,520 @@
+# -*- coding: utf-8 -*-
+"""
+Historia zmian kontaktów z cofaniem i ponawianiem (undo/redo).
+
+Każda zmiana (dodanie, edycja, usunięcie, scalenie) to jeden wpis (Entry)
+z listą zmian pojedynczych kontaktów (Change). Zmiany są zapisywane jako
+zwarte różnice, a nie kopie książki:
+- 'add': pola dodanego kontaktu (do ponowienia)
+- 'delete': pola usuniętego kontaktu (do cofnięcia)
+- 'update': tylko zmienione pola - krotki (numer pola, stara, nowa wartość)
+
+Wpisy są w kolejce (deque) ograniczonej do limit - najstarsze wypadają
+w O(1), więc pamięć nie rośnie z liczbą zmian. Wpisy przed pozycją są
+wykonane (do cofnięcia), wpisy za nią - cofnięte (do ponowienia); nowa
+zmiana usuwa wpisy do ponowienia.
+
+Kontakty są wskazywane kluczami historii, a nie identyfikatorami
+ContactStore - identyfikatory są nadawane od nowa przy każdym wczytaniu,
+a cofnięcie usunięcia dodaje kontakt z nowym identyfikatorem.
+
+Plik historii (np. 'contacts.csv.history') - jedna linia na rekord
+w formacie dziennika zapisu (storage.JournalStorage):
+    <crc32 treści w hex> <JSON>\\n
+Rekordy:
+- ['state', liczba kontaktów, następny klucz, [[klucz, indeks], ...],
+   pozycja, [wpisy]] - stan historii (pierwsza linia pliku)
+- ['do', liczba kontaktów, czas, opis, [[operacja, indeks, klucz, dane], ...]]
+- ['undo' lub 'redo', liczba kontaktów, [[operacja, indeks, klucz], ...]]
+- ['extend', liczba kontaktów] - import (dopisanie kontaktów bez historii)
+Przy wczytaniu operacje są odtwarzane na indeksach (jak dziennik zapisu),
+co daje bieżący indeks, a więc i identyfikator, kontaktu każdego klucza.
+Gdy liczba kontaktów się nie zgadza (np. plik książki zmieniony innym
+programem), historia jest zaczynana od nowa. Po wczytaniu i po przekroczeniu
+COMPACT_FACTOR * limit linii plik jest przepisywany jedną linią stanu.
+
+Wykorzystane biblioteki:
+- collections: kolejka wpisów (deque) i opis zmian (namedtuple)
+- json, zlib: zapis linii pliku historii z sumą kontrolną CRC32
+- os, time: zapis pliku przez plik tymczasowy i czas zmian
+"""
+
+import json
+import os
+import time
+import zlib
+from collections import deque, namedtuple
+
+# Maksymalna liczba wpisów historii (głębokość cofania)
+HISTORY_LIMIT = 1000
+# Plik historii jest przepisywany, gdy liczba linii przekroczy COMPACT_FACTOR * limit
+COMPACT_FACTOR = 2
+# Opisy wpisów według operacji
+LABELS = {
+    'add': "Dodanie",
+    'update': "Edycja",
+    'delete': "Usunięcie",
+    'merge': "Scalenie",
+}
+
+# Zmiana jednego kontaktu: operacja, klucz historii, dane (pola lub różnica)
+Change = namedtuple('Change', ['op', 'key', 'data'])
+# Wpis historii: czas (time.time()), opis i krotka zmian
+Entry = namedtuple('Entry', ['time', 'label', 'changes'])
+
+
+class HistoryConflict(Exception):
+    """
+    Kontakt zmienił się poza historią - zmiany nie można cofnąć ani ponowić.
+    """
+
+
+def diff_contact(old, new):
+    """
+    Zwraca różnicę dwóch wersji kontaktu.
+    Args:
+        old: Pola przed zmianą
+        new: Pola po zmianie
+    Returns:
+        tuple: Krotki (numer pola, stara wartość, nowa wartość) zmienionych pól
+    """
+    return tuple((field, old[field], new[field])
+                 for field in range(len(new)) if old[field] != new[field])
+
+
+def apply_diff(contact, diff):
+    """
+    Nakłada różnicę na kontakt.
+    Args:
+        contact: Pola kontaktu
+        diff: Krotki (numer pola, stara wartość, nowa wartość)
+    Returns:
+        list: Pola po zmianie
+    """
+    fields = list(contact)
+    for field, _, new in diff:
+        fields[field] = new
+    return fields
+
+
+def invert(change):
+    """
+    Zwraca zmianę odwrotną (cofającą podaną).
+    Args:
+        change: Change
+    Returns:
+        Change: Dodanie dla usunięcia, usunięcie dla dodania, odwrócona różnica dla edycji
+    """
+    if change.op == 'add':
+        return Change('delete', change.key, change.data)
+    if change.op == 'delete':
+        return Change('add', change.key, change.data)
+    return Change('update', change.key, tuple((field, new, old) for field, old, new in change.data))
+
+
+def conflicts(change, contact):
+    """
+    Sprawdza, czy zmianę można nałożyć na bieżącą wersję kontaktu.
+    Args:
+        change: Change do wykonania
+        contact: Bieżące pola kontaktu lub None, gdy kontakt nie istnieje
+    Returns:
+        bool: True, gdy stan kontaktu nie pasuje do zmiany
+    """
+    if change.op == 'add':
+        return contact is not None
+    if contact is None:
+        return True
+    if change.op == 'delete':
+        return tuple(contact) != tuple(change.data)
+    return any(contact[field] != old for field, old, _ in change.data)
+
+
+class History:
+    """
+    Ograniczona historia zmian z cofaniem, ponawianiem i plikiem dziennika.
+    """
+    def __init__(self, path=None, limit=HISTORY_LIMIT):
+        """
+        Args:
+            path: Ścieżka do pliku historii (None - historia tylko w pamięci)
+            limit: Maksymalna liczba wpisów
+        """
+        self.path = path
+        self.limit = limit
+        self._entries = deque()
+        # Liczba wykonanych wpisów (wpisy od tej pozycji są cofnięte)
+        self._position = 0
+        # Klucz historii <-> identyfikator kontaktu w ContactStore
+        self._id_of = {}
+        self._key_of = {}
+        self._next_key = 0
+        # Funkcja zwracająca indeks kontaktu o identyfikatorze (ContactStore.index_of)
+        self._index_of = None
+        self._file = None
+        self._lines = 0
+        # Historia zapisuje zmiany dopiero po wczytaniu książki (load)
+        self.loaded = False
+        # Ostatni błąd zapisu pliku historii (historia działa dalej w pamięci)
+        self.last_error = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def can_undo(self):
+        """Czy jest wpis do cofnięcia"""
+        return self._position > 0
+
+    @property
+    def can_redo(self):
+        """Czy jest wpis do ponowienia"""
+        return self._position < len(self._entries)
+
+    def load(self, contact_ids, index_of):
+        """
+        Wczytuje historię z pliku dla wczytanej książki i zapisuje jej stan
+        od nowa (jedna linia stanu).
+        Args:
+            contact_ids: Identyfikatory kontaktów książki (w kolejności indeksów)
+            index_of: Funkcja zwracająca indeks kontaktu o identyfikatorze
+        """
+        self._index_of = index_of
+        self._entries.clear()
+        self._position = 0
+        self._id_of.clear()
+        self._key_of.clear()
+        self._next_key = 0
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                positions = self._replay(len(contact_ids))
+            except (OSError, ValueError, TypeError, KeyError, IndexError):
+                # Uszkodzona lub niepasująca do książki historia - zaczynana od nowa
+                positions = None
+            if positions is None:
+                self._entries.clear()
+                self._position = 0
+                self._next_key = 0
+            else:
+                for key, index in positions.items():
+                    self._bind(key, contact_ids[index])
+        self.loaded = True
+        self._rewrite(len(contact_ids))
+
+    def record(self, label, changes, count):
+        """
+        Dodaje wpis po wykonaniu zmiany (usuwa wpisy do ponowienia).
+        Args:
+            label: Opis wpisu (np. LABELS['update'])
+            changes: Krotki (operacja, indeks, identyfikator, przed, po) - pola
+                     kontaktu przed i po zmianie (None, gdy kontakt nie istniał)
+            count: Liczba kontaktów po zmianie
+        """
+        if not self.loaded:
+            return
+        entry_changes = []
+        operations = []
+        for op, index, contact_id, before, after in changes:
+            key = self._key_for(contact_id)
+            if op == 'add':
+                data = tuple(after)
+            elif op == 'delete':
+                data = tuple(before)
+                self._unbind(key)
+            else:
+                data = diff_contact(before, after)
+                if not data:
+                    continue
+            entry_changes.append(Change(op, key, data))
+            operations.append([op, index, key, data])
+        if not entry_changes:
+            return
+        while len(self._entries) > self._position:
+            self._entries.pop()
+        entry = Entry(time.time(), label, tuple(entry_changes))
+        self._push(entry)
+        self._write(['do', count, entry.time, label, operations], count)
+
+    def extended(self, count):
+        """
+        Zapisuje dopisanie kontaktów spoza historii (import).
+        Args:
+            count: Liczba kontaktów po dopisaniu
+        """
+        if self.loaded:
+            self._write(['extend', count], count)
+
+    def undo_changes(self):
+        """
+        Zwraca zmiany cofające ostatni wykonany wpis (bez zmiany historii).
+        Returns:
+            list: Zmiany (Change) do wykonania lub None, gdy nie ma czego cofnąć
+        """
+        if not self.can_undo:
+            return None
+        return [invert(change) for change in reversed(self._entries[self._position - 1].changes)]
+
+    def redo_changes(self):
+        """
+        Zwraca zmiany ostatnio cofniętego wpisu (bez zmiany historii).
+        Returns:
+            list: Zmiany (Change) do wykonania lub None, gdy nie ma czego ponowić
+        """
+        if not self.can_redo:
+            return None
+        return list(self._entries[self._position].changes)
+
+    def undone(self, operations, count):
+        """
+        Oznacza ostatni wpis jako cofnięty.
+        Args:
+            operations: Wykonane operacje (operacja, indeks, klucz, identyfikator)
+            count: Liczba kontaktów po cofnięciu
+        """
+        self._position -= 1
+        self._applied('undo', operations, count)
+
+    def redone(self, operations, count):
+        """
+        Oznacza cofnięty wpis jako ponownie wykonany.
+        Args:
+            operations: Wykonane operacje (operacja, indeks, klucz, identyfikator)
+            count: Liczba kontaktów po ponowieniu
+        """
+        self._position += 1
+        self._applied('redo', operations, count)
+
+    def contact_id(self, key):
+        """Zwraca identyfikator kontaktu o kluczu historii lub None (kontakt nie istnieje)"""
+        return self._id_of.get(key)
+
+    def contact_history(self, contact_id):
+        """
+        Zwraca historię zmian jednego kontaktu.
+        Args:
+            contact_id: Identyfikator kontaktu
+        Returns:
+            list: Krotki (Entry, Change, czy cofnięta) od najnowszej zmiany
+        """
+        key = self._key_of.get(contact_id)
+        if key is None:
+            return []
+        found = []
+        for number, entry in enumerate(self._entries):
+            for change in entry.changes:
+                if change.key == key:
+                    found.append((entry, change, number >= self._position))
+        found.reverse()
+        return found
+
+    def clear(self, count):
+        """
+        Usuwa wszystkie wpisy (np. po konflikcie ze zmianą spoza historii).
+        Args:
+            count: Liczba kontaktów książki
+        """
+        self._entries.clear()
+        self._position = 0
+        if self.loaded:
+            self._rewrite(count)
+
+    def close(self):
+        """Zamyka plik historii"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _push(self, entry):
+        """Dodaje wpis na koniec; najstarszy wypada po przekroczeniu limitu"""
+        self._entries.append(entry)
+        self._position += 1
+        if len(self._entries) > self.limit:
+            self._entries.popleft()
+            self._position -= 1
+
+    def _applied(self, kind, operations, count):
+        """Aktualizuje powiązania kluczy i zapisuje wykonane cofnięcie/ponowienie"""
+        for op, _, key, contact_id in operations:
+            if op == 'add':
+                self._bind(key, contact_id)
+            elif op == 'delete':
+                self._unbind(key)
+        self._write([kind, count, [[op, index, key] for op, index, key, _ in operations]], count)
+
+    def _key_for(self, contact_id):
+        """Zwraca klucz historii kontaktu (nadaje nowy przy pierwszej zmianie)"""
+        key = self._key_of.get(contact_id)
+        if key is None:
+            key = self._next_key
+            self._next_key += 1
+            self._bind(key, contact_id)
+        return key
+
+    def _bind(self, key, contact_id):
+        self._id_of[key] = contact_id
+        self._key_of[contact_id] = key
+
+    def _unbind(self, key):
+        contact_id = self._id_of.pop(key, None)
+        if contact_id is not None:
+            self._key_of.pop(contact_id, None)
+
+    def _write(self, record, count):
+        """Dopisuje rekord do pliku historii (błąd zapisu nie przerywa edycji)"""
+        if self.path is None:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(_encode(record))
+            self._file.flush()
+            self._lines += 1
+            if self._lines > COMPACT_FACTOR * self.limit:
+                self._rewrite(count)
+        except OSError as e:
+            self.last_error = e
+
+    def _rewrite(self, count):
+        """
+        Przepisuje plik historii jedną linią stanu (przez plik tymczasowy).
+        Klucze bez wpisów są przy tym zapominane, więc słowniki kluczy
+        nie rosną ponad liczbę kontaktów występujących w historii.
+        """
+        used = {change.key for entry in self._entries for change in entry.changes}
+        for key in list(self._id_of):
+            if key not in used:
+                self._unbind(key)
+        if self.path is None:
+            return
+        positions = [[key, self._index_of(contact_id)] for key, contact_id in self._id_of.items()]
+        entries = [[entry.time, entry.label, [list(change) for change in entry.changes]]
+                   for entry in self._entries]
+        record = ['state', count, self._next_key, positions, self._position, entries]
+        try:
+            self.close()
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as file:
+                file.write(_encode(record))
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'ab')
+            self._lines = 1
+            self.last_error = None
+        except OSError as e:
+            self.last_error = e
+
+    def _replay(self, count):
+        """
+        Odtwarza plik historii.
+        Args:
+            count: Liczba kontaktów wczytanej książki
+        Returns:
+            dict: Klucz -> bieżący indeks kontaktu lub None, gdy historia
+                  nie pasuje do książki
+        """
+        positions = None
+        total = 0
+        for record in _read_records(self.path):
+            kind = record[0]
+            if kind == 'state':
+                _, total, self._next_key, pairs, position, entries = record
+                positions = dict(map(tuple, pairs))
+                self._entries.clear()
+                for entry_time, label, changes in entries:
+                    self._entries.append(Entry(entry_time, label, tuple(map(_change, changes))))
+                self._position = position
+                continue
+            if positions is None:
+                return None
+            if kind == 'do':
+                _, expected, entry_time, label, operations = record
+                for op, index, key, _ in operations:
+                    total = _track(positions, total, op, index, key)
+                    self._next_key = max(self._next_key, key + 1)
+                while len(self._entries) > self._position:
+                    self._entries.pop()
+                self._push(Entry(entry_time, label, tuple(
+                    _change([op, key, data]) for op, _, key, data in operations)))
+            elif kind in ('undo', 'redo'):
+                _, expected, operations = record
+                for op, index, key in operations:
+                    total = _track(positions, total, op, index, key)
+                self._position += -1 if kind == 'undo' else 1
+                if not 0 <= self._position <= len(self._entries):
+                    return None
+            elif kind == 'extend':
+                _, expected = record
+                total = expected
+            else:
+                return None
+            if total != expected:
+                return None
+        if positions is None or total != count:
+            return None
+        return positions
+
+
+def _track(positions, count, op, index, key):
+    """
+    Nakłada operację na indeksy śledzonych kluczy (odtwarzanie pliku historii).
+    Args:
+        positions: Słownik klucz -> indeks (modyfikowany w miejscu)
+        count: Liczba kontaktów przed operacją
+        op: 'add', 'update' lub 'delete'
+        index: Indeks kontaktu, którego dotyczy operacja
+        key: Klucz historii kontaktu
+    Returns:
+        int: Liczba kontaktów po operacji
+    Raises:
+        ValueError: Gdy operacja nie pasuje do stanu (historia niezgodna z książką)
+    """
+    if op == 'add':
+        if index != count:
+            raise ValueError(f"Niespójny indeks dodawania: {index}")
+        positions[key] = index
+        return count + 1
+    if not 0 <= index < count or positions.get(key, index) != index:
+        raise ValueError(f"Niespójny indeks kontaktu: {index}")
+    if key not in positions and index in positions.values():
+        raise ValueError(f"Indeks {index} należy do innego kontaktu")
+    if op == 'update':
+        positions[key] = index
+        return count
+    positions.pop(key, None)
+    for other, position in positions.items():
+        if position > index:
+            positions[other] = position - 1
+    return count - 1
+
+
+def _change(values):
+    """Tworzy Change z listy odczytanej z JSON (różnica edycji jako krotki)"""
+    op, key, data = values
+    if op == 'update':
+        return Change(op, key, tuple(map(tuple, data)))
+    return Change(op, key, tuple(data))
+
+
+def _encode(record):
+    """Koduje rekord jako linię z sumą kontrolną"""
+    payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b'%08x %s\n' % (zlib.crc32(payload), payload)
+
+
+def _read_records(path):
+    """
+    Czyta rekordy pliku historii do pierwszej urwanej lub uszkodzonej linii.
+    Yields:
+        list: Rekord
+    """
+    with open(path, 'rb') as file:
+        for line in file:
+            if not line.endswith(b'\n'):
+                return
+            checksum, _, payload = line[:-1].partition(b' ')
+            try:
+                if int(checksum, 16) != zlib.crc32(payload):
+                    return
+                record = json.loads(payload.decode('utf-8'))
+            except ValueError:
+                return
+            yield record
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Import wsadowy kontaktów z plików CSV i vCard.
+
+Przebieg importu:
+1. plik jest czytany strumieniowo, porcjami po BATCH_SIZE rekordów
+   (cały plik nie jest ładowany do pamięci naraz)
+2. każda porcja jest walidowana w całości, kolumna po kolumnie
+   (validation.validate_rows), razem z wyliczeniem kluczy telefonu i email;
+   przy workers > 1 porcje są rozdzielane między procesy potomne
+3. poprawne kontakty są porównywane z istniejącymi i już zaimportowanymi
+   po znormalizowanym numerze telefonu i adresie email (duplikaty są pomijane)
+4. błędy i duplikaty trafiają do raportu (ImportReport) zamiast osobnego
+   komunikatu dla każdego wiersza
+5. przyjęte kontakty są dopisywane do modelu i zapisywane jednym zapisem pliku
+
+Obsługiwane formaty:
+- CSV: imię, nazwisko, nick, telefon, email (opcjonalny wiersz nagłówka)
+- vCard 2.1/3.0/4.0: pola N (lub FN), NICKNAME, TEL, EMAIL;
+  z wielu numerów i adresów brany jest pierwszy
+
+Wykorzystane biblioteki:
+- csv: odczyt plików CSV i zapis raportu błędów
+- concurrent.futures: walidacja porcji w wielu procesach (importowany dopiero
+  przy workers > 1 - razem z multiprocessing wydłużałby start okna programu)
+- collections: kolejka porcji przetwarzanych równolegle
+- itertools: dzielenie strumienia rekordów na porcje
+"""
+
+import csv
+import os
+from collections import deque
+from itertools import islice
+
+from validation import FieldError, email_keys, normalize_contact, phone_keys, validate_rows
+
+# Liczba rekordów w jednej porcji walidacji
+BATCH_SIZE = 10000
+# Rozszerzenia plików rozpoznawanych jako vCard
+VCARD_EXTENSIONS = ('.vcf', '.vcard')
+# Wartości pierwszego wiersza CSV uznawane za nagłówek kolumny email
+_HEADER_EMAIL = ('email', 'e-mail', 'mail')
+
+
+class ImportReport:
+    """
+    Wynik importu: liczba przyjętych kontaktów, odrzucone wiersze i duplikaty.
+    """
+    def __init__(self, source=''):
+        """
+        Args:
+            source: Nazwa importowanego pliku (do raportu)
+        """
+        self.source = source
+        self.imported = 0
+        # Pary (numer wiersza w pliku, lista błędów FieldError)
+        self.rejected = []
+        # Pary (numer wiersza w pliku, lista błędów z kodem 'duplicate')
+        self.duplicates = []
+
+    @property
+    def total(self):
+        """Liczba przetworzonych rekordów"""
+        return self.imported + len(self.rejected) + len(self.duplicates)
+
+    def summary(self):
+        """
+        Zwraca krótkie podsumowanie importu.
+        Returns:
+            str: Tekst podsumowania
+        """
+        return (f"Zaimportowano kontaktów: {self.imported}, "
+                f"odrzucono: {len(self.rejected)}, duplikaty: {len(self.duplicates)}")
+
+    def write(self, path):
+        """
+        Zapisuje raport błędów do pliku CSV (wiersz, pole, kod, komunikat).
+        Args:
+            path: Ścieżka do pliku raportu
+        """
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['wiersz', 'pole', 'kod', 'komunikat'])
+            for line, errors in sorted(self.rejected + self.duplicates):
+                for error in errors:
+                    writer.writerow([line, error.field, error.code, error.message])
+
+
+def detect_format(path):
+    """
+    Rozpoznaje format pliku po rozszerzeniu lub pierwszej linii.
+    Args:
+        path: Ścieżka do pliku
+    Returns:
+        str: 'vcard' lub 'csv'
+    """
+    if path.lower().endswith(VCARD_EXTENSIONS):
+        return 'vcard'
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as file:
+        first_line = file.readline().strip().upper()
+    return 'vcard' if first_line == 'BEGIN:VCARD' else 'csv'
+
+
+def read_csv_records(path):
+    """
+    Czyta rekordy z pliku CSV.
+    Args:
+        path: Ścieżka do pliku CSV
+    Yields:
+        tuple: (numer wiersza, lista pól)
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        for row in reader:
+            if reader.line_num == 1 and _is_header(row):
+                continue
+            if row:
+                yield reader.line_num, row
+
+
+def _is_header(row):
+    """Czy wiersz CSV jest nagłówkiem kolumn (zamiast danych kontaktu)"""
+    values = [value.strip().casefold() for value in row]
+    return any(value in _HEADER_EMAIL for value in values) and not any('@' in value for value in values)
+
+
+def read_vcard_records(path):
+    """
+    Czyta kontakty z pliku vCard.
+    Args:
+        path: Ścieżka do pliku .vcf
+    Yields:
+        tuple: (numer linii BEGIN:VCARD, lista pól [imię, nazwisko, nick, telefon, email])
+    """
+    card = None
+    start = 0
+    for line_number, line in _unfolded_lines(path):
+        name, params, value = _parse_property(line)
+        if name == 'BEGIN' and value.upper() == 'VCARD':
+            card, start = {}, line_number
+        elif card is None:
+            continue
+        elif name == 'END':
+            yield start, _card_fields(card)
+            card = None
+        elif name not in card:
+            # Z powtarzających się właściwości (kilka numerów, adresów) liczy się pierwsza
+            card[name] = value
+
+
+def _unfolded_lines(path):
+    """
+    Zwraca logiczne linie pliku vCard (z połączonymi liniami kontynuacji).
+    Yields:
+        tuple: (numer pierwszej linii fizycznej, treść linii)
+    """
+    pending, pending_number = None, 0
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.rstrip('\r\n')
+            if line[:1] in (' ', '\t') and pending is not None:
+                pending += line[1:]
+                continue
+            if pending:
+                yield pending_number, pending
+            pending, pending_number = line, line_number
+    if pending:
+        yield pending_number, pending
+
+
+def _parse_property(line):
+    """
+    Dzieli linię vCard na nazwę, parametry i wartość.
+    Args:
+        line: Linia, np. 'item1.TEL;TYPE=cell:+48 501 234 567'
+    Returns:
+        tuple: (nazwa wielkimi literami, parametry, wartość)
+    """
+    head, _, value = line.partition(':')
+    name, _, params = head.partition(';')
+    return name.rsplit('.', 1)[-1].strip().upper(), params, value
+
+
+def _split_value(value, separator=None):
+    """Dzieli wartość vCard na części z uwzględnieniem znaków ucieczki ('\\;', '\\,')"""
+    parts, current, escaped = [], [], False
+    for char in value:
+        if escaped:
+            current.append({'n': '\n', 'N': '\n'}.get(char, char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == separator:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def _unescape(value):
+    """Usuwa znaki ucieczki z wartości vCard"""
+    return _split_value(value)[0]
+
+
+def _card_fields(card):
+    """Zamienia właściwości wizytówki na pola kontaktu"""
+    parts = _split_value(card.get('N', ''), ';')
+    last_name = parts[0]
+    first_name = parts[1] if len(parts) > 1 else ''
+    if not (first_name or last_name) and 'FN' in card:
+        # Brak pola N - imię i nazwisko z nazwy wyświetlanej
+        first_name, _, last_name = _unescape(card['FN']).strip().partition(' ')
+    nickname = _split_value(card.get('NICKNAME', ''), ',')[0]
+    phone = _unescape(card.get('TEL', ''))
+    if phone.lower().startswith('tel:'):
+        # vCard 4.0 zapisuje numer jako URI
+        phone = phone[4:]
+    email = _unescape(card.get('EMAIL', ''))
+    return [first_name, last_name, nickname, phone, email]
+
+
+def read_records(path, file_format=None):
+    """
+    Czyta rekordy z pliku w podanym lub wykrytym formacie.
+    Args:
+        path: Ścieżka do pliku
+        file_format: 'csv', 'vcard' lub None (wykrycie automatyczne)
+    Returns:
+        iterator: Pary (numer wiersza, lista pól)
+    """
+    if file_format is None:
+        file_format = detect_format(path)
+    if file_format == 'vcard':
+        return read_vcard_records(path)
+    return read_csv_records(path)
+
+
+def validate_batch(batch):
+    """
+    Waliduje porcję rekordów. Funkcja na poziomie modułu, aby mogła działać
+    w procesie potomnym (ProcessPoolExecutor).
+    Args:
+        batch: Lista par (numer wiersza, lista pól)
+    Returns:
+        tuple: (lista krotek (numer wiersza, kontakt, klucz telefonu, klucz email)
+                poprawnych rekordów,
+                lista par (numer wiersza, błędy) odrzuconych rekordów)
+    """
+    contacts = [normalize_contact(fields) for _, fields in batch]
+    valid = []
+    rejected = []
+    for (line, _), contact, errors in zip(batch, contacts, validate_rows(contacts)):
+        if errors:
+            rejected.append((line, errors))
+        else:
+            valid.append((line, contact))
+    if not valid:
+        return [], rejected
+    lines, accepted = zip(*valid)
+    return (list(zip(lines, accepted,
+                     phone_keys([contact[3] for contact in accepted]),
+                     email_keys([contact[4] for contact in accepted]))),
+            rejected)
+
+
+def _batches(records, batch_size):
+    """Dzieli strumień rekordów na listy po batch_size elementów"""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _validated_batches(batches, workers):
+    """
+    Waliduje porcje w bieżącym procesie lub w puli procesów.
+    Kolejność wyników odpowiada kolejności porcji; w toku jest najwyżej
+    2 * workers porcji, więc pamięć nie rośnie z rozmiarem pliku.
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield validate_batch(batch)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(validate_batch, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def contact_keys(contacts):
+    """
+    Zwraca znormalizowane numery telefonów i adresy email kontaktów.
+    Args:
+        contacts: Lista kontaktów
+    Returns:
+        tuple: (zbiór kluczy telefonów, zbiór kluczy adresów email)
+    """
+    if hasattr(contacts, 'column'):
+        # Tabela kolumnowa - wartości pól bez tworzenia całych wierszy
+        phones = set(phone_keys(contacts.column(3)))
+        emails = set(email_keys(contacts.column(4)))
+    else:
+        phones = set(phone_keys(contact[3] for contact in contacts))
+        emails = set(email_keys(contact[4] for contact in contacts))
+    phones.discard('')
+    emails.discard('')
+    return phones, emails
+
+
+def import_file(path, known_keys=None, file_format=None, batch_size=BATCH_SIZE,
+                workers=0, on_progress=None):
+    """
+    Czyta, waliduje i odfiltrowuje duplikaty z pliku kontaktów.
+    Args:
+        path: Ścieżka do pliku CSV lub vCard
+        known_keys: Wynik contact_keys() dla istniejących kontaktów
+                    (zbiory są uzupełniane o klucze przyjętych kontaktów)
+        file_format: 'csv', 'vcard' lub None (wykrycie automatyczne)
+        batch_size: Liczba rekordów w porcji
+        workers: Liczba procesów walidujących (0 lub 1 - bieżący proces)
+        on_progress: Opcjonalna funkcja wywoływana po każdej porcji
+                     z liczbą przetworzonych rekordów
+    Returns:
+        tuple: (lista przyjętych kontaktów, ImportReport)
+    """
+    phones, emails = known_keys if known_keys is not None else (set(), set())
+    report = ImportReport(os.path.basename(path))
+    accepted = []
+    records = read_records(path, file_format)
+    for valid, rejected in _validated_batches(_batches(records, batch_size), workers):
+        report.rejected.extend(rejected)
+        for line, contact, phone, email in valid:
+            errors = []
+            if phone in phones:
+                errors.append(FieldError('phone', 'duplicate',
+                                         "Kontakt z tym numerem telefonu już istnieje"))
+            if email in emails:
+                errors.append(FieldError('email', 'duplicate',
+                                         "Kontakt z tym adresem email już istnieje"))
+            if errors:
+                report.duplicates.append((line, errors))
+                continue
+            phones.add(phone)
+            emails.add(email)
+            accepted.append(contact)
+        if on_progress is not None:
+            on_progress(report.total + len(accepted))
+    report.imported = len(accepted)
+    return accepted, report
+
+
+def import_into(store, path, **options):
+    """
+    Importuje plik do modelu kontaktów z jednym zapisem na końcu.
+    Args:
+        store: Model kontaktów (ContactStore)
+        path: Ścieżka do pliku CSV lub vCard
+        **options: Opcje przekazywane do import_file()
+    Returns:
+        ImportReport: Raport importu
+    Raises:
+        StorageError: Gdy zapis się nie powiódł (kontakty są już w pamięci)
+    """
+    # Klucze istniejących kontaktów liczone kolumnami (plik otwarty leniwie jest wczytywany)
+    store.materialize()
+    accepted, report = import_file(path, contact_keys(store.contacts), **options)
+    if accepted:
+        store.extend(accepted)
+        store.save()
+    return report
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Odczyt pliku CSV z kontaktami na żądanie (bez wczytywania całego pliku).
+
+list(csv.reader(file)) tworzy obiekty wszystkich wierszy, zanim cokolwiek
+zostanie pokazane. LazyCsvRows mapuje plik do pamięci (mmap) i w jednym
+przebiegu buduje zwartą tablicę początków wierszy (array('q'), 8 B na
+wiersz). Wiersz jest dekodowany dopiero przy odczycie, więc w pamięci
+procesu są tylko przesunięcia i wiersze aktualnie wyświetlane - strony
+pliku wczytuje i zwalnia system operacyjny.
+
+Indeks przesunięć jest zapisywany obok pliku ('contacts.csv.rows') razem
+z rozmiarem i czasem modyfikacji pliku CSV. Ponowne otwarcie niezmienionej
+książki odczytuje gotowy indeks zamiast przeglądać plik; po każdej zmianie
+pliku (zapis, kompaktowanie dziennika) indeks jest budowany od nowa.
+
+Budowa indeksu:
+- porcje pliku są dzielone na linie przez bytes.split (w C), a pozycje
+  końców linii sumowane przez itertools.accumulate
+- porcje zawierające cudzysłów są sprawdzane linia po linii: pole w
+  cudzysłowie może zawierać znak nowej linii, więc wiersz kończy się
+  dopiero na linii, na której końcu żadne pole nie jest otwarte; jak
+  w module csv cudzysłów otwiera pole tylko na jego początku (w wierszu
+  a,O"Brien,c cudzysłów jest zwykłym znakiem), a wewnątrz pola "" to
+  znak cudzysłowu
+
+Wykorzystane biblioteki:
+- mmap: mapowanie pliku do pamięci
+- array: zwarta tablica przesunięć wierszy
+- csv, io: dekodowanie wierszy z polami w cudzysłowie
+- itertools: sumy narastające długości linii
+- struct: nagłówek pliku indeksu
+"""
+
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+# Liczba pól kontaktu: imię, nazwisko, nick, telefon, email
+FIELD_COUNT = 5
+# Rozszerzenie pliku indeksu przesunięć (zapisywanego obok pliku CSV)
+INDEX_SUFFIX = '.rows'
+# Rozmiar porcji pliku przeglądanej przy budowie indeksu
+CHUNK_SIZE = 1 << 22
+# Liczba wierszy dekodowanych razem podczas iteracji
+ITER_BLOCK_ROWS = 4096
+
+# Nagłówek indeksu: znacznik, rozmiar i czas modyfikacji pliku CSV, liczba wierszy
+_INDEX_MAGIC = b'CMROWS02'
+_INDEX_HEADER = struct.Struct('<8sqqq')
+
+
+def build_row_offsets(data):
+    """
+    Wyznacza początki wierszy CSV w jednym przebiegu.
+    Args:
+        data: Zawartość pliku (bytes lub mmap)
+    Returns:
+        array: Tablica 'q' z początkiem każdego wiersza i rozmiarem danych
+               na końcu (wiersz i zajmuje bajty offsets[i]:offsets[i + 1])
+    """
+    size = len(data)
+    offsets = array('q', [0])
+    in_quotes = False
+    position = 0
+    while position < size:
+        chunk = data[position:position + CHUNK_SIZE]
+        if position + len(chunk) < size:
+            # Porcja kończy się na ostatnim znaku nowej linii (linia dłuższa
+            # od porcji jest dołączana w całości)
+            cut = chunk.rfind(b'\n') + 1
+            if cut:
+                chunk = chunk[:cut]
+            else:
+                end = data.find(b'\n', position + len(chunk))
+                chunk = data[position:end + 1] if end >= 0 else data[position:]
+        lines = chunk.split(b'\n')
+        # Ostatni element to ostatnia linia pliku bez znaku nowej linii
+        # (pusty, gdy porcja kończy się na '\n')
+        lines.pop()
+        if not in_quotes and b'"' not in chunk:
+            ends = accumulate(map(len, lines), lambda end, length: end + length + 1,
+                              initial=position)
+            next(ends)
+            offsets.extend(ends)
+        else:
+            end = position
+            for line in lines:
+                end += len(line) + 1
+                if in_quotes or b'"' in line:
+                    in_quotes = _ends_in_quotes(line, in_quotes)
+                if not in_quotes:
+                    offsets.append(end)
+        position += len(chunk)
+    if offsets[-1] != size:
+        # Ostatni wiersz bez znaku nowej linii
+        offsets.append(size)
+    return offsets
+
+
+def _ends_in_quotes(line, in_quotes):
+    """
+    Sprawdza, czy na końcu linii CSV pole w cudzysłowie jest otwarte.
+    Args:
+        line: Linia pliku (bez znaku nowej linii)
+        in_quotes: Czy linia zaczyna się wewnątrz pola w cudzysłowie
+    Returns:
+        bool: Czy wiersz jest kontynuowany w następnej linii
+    """
+    position = line.find(b'"')
+    while position >= 0:
+        if in_quotes:
+            if line[position + 1:position + 2] == b'"':
+                # "" wewnątrz pola to znak cudzysłowu
+                position = line.find(b'"', position + 2)
+                continue
+            in_quotes = False
+        elif position == 0 or line[position - 1:position] == b',':
+            # Cudzysłów na początku pola (po przecinku) otwiera pole
+            in_quotes = True
+        position = line.find(b'"', position + 1)
+    return in_quotes
+
+
+def index_path(path):
+    """Zwraca ścieżkę pliku indeksu przesunięć dla pliku CSV"""
+    return path + INDEX_SUFFIX
+
+
+def load_row_offsets(path, stat):
+    """
+    Odczytuje zapisany indeks przesunięć, jeśli pasuje do pliku CSV.
+    Args:
+        path: Ścieżka do pliku CSV
+        stat: Wynik os.stat/os.fstat pliku CSV
+    Returns:
+        array: Tablica przesunięć lub None (brak indeksu lub plik CSV się zmienił)
+    """
+    try:
+        with open(index_path(path), 'rb') as file:
+            header = file.read(_INDEX_HEADER.size)
+            if len(header) != _INDEX_HEADER.size:
+                return None
+            magic, size, mtime_ns, count = _INDEX_HEADER.unpack(header)
+            if magic != _INDEX_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None
+            offsets = array('q')
+            offsets.frombytes(file.read())
+    except (OSError, ValueError):
+        return None
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    if len(offsets) != count + 1 or offsets[-1] != size:
+        return None
+    return offsets
+
+
+def save_row_offsets(path, stat, offsets):
+    """
+    Zapisuje indeks przesunięć obok pliku CSV (przez plik tymczasowy).
+    Indeks jest tylko pamięcią podręczną - błąd zapisu (np. katalog tylko
+    do odczytu) jest pomijany.
+    Args:
+        path: Ścieżka do pliku CSV
+        stat: Wynik os.stat/os.fstat pliku CSV, dla którego zbudowano indeks
+        offsets: Tablica przesunięć
+    """
+    target = index_path(path)
+    tmp_path = target + '.tmp'
+    data = array('q', offsets)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns,
+                                          len(offsets) - 1))
+            data.tofile(file)
+        os.replace(tmp_path, target)
+    except OSError:
+        pass
+
+
+class LazyCsvRows:
+    """
+    Wiersze pliku CSV dekodowane przy odczycie.
+    Zachowuje się jak lista kontaktów tylko do odczytu (len, indeksowanie,
+    wycinki, iteracja); wiersze są krotkami pięciu pól, jak w ContactTable.
+    """
+    def __init__(self, path='contacts.csv'):
+        """
+        Args:
+            path: Ścieżka do pliku CSV z kontaktami
+        Raises:
+            OSError: Gdy pliku nie można otworzyć
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            stat = os.fstat(self._file.fileno())
+            self._data = (mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                          if stat.st_size else b'')
+            offsets = load_row_offsets(path, stat)
+            # Czy indeks został odczytany z pliku (False - zbudowany teraz)
+            self.index_reused = offsets is not None
+            if offsets is None:
+                offsets = build_row_offsets(self._data)
+                save_row_offsets(path, stat, offsets)
+        except BaseException:
+            self.close()
+            raise
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __repr__(self):
+        return f"LazyCsvRows({self.path!r}, {len(self)} wierszy)"
+
+    def __getitem__(self, index):
+        """
+        Dekoduje kontakt (lub listę kontaktów dla wycinka).
+        Args:
+            index: Indeks wiersza lub wycinek
+        Returns:
+            tuple: Pola kontaktu
+        Raises:
+            IndexError: Gdy indeks jest poza zakresem
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return list(self._decode(start, max(start, stop)))
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("indeks wiersza poza zakresem")
+        line = self._data[self._offsets[index]:self._offsets[index + 1]]
+        if b'"' in line:
+            return next(self._decode(index, index + 1))
+        # Wiersz bez cudzysłowów - wystarczy podział po przecinkach
+        line = line.rstrip(b'\r\n')
+        return _fields(line.decode('utf-8').split(',') if line else [])
+
+    def __iter__(self):
+        """Dekoduje kolejne wiersze porcjami po ITER_BLOCK_ROWS"""
+        for start in range(0, len(self), ITER_BLOCK_ROWS):
+            yield from self._decode(start, min(start + ITER_BLOCK_ROWS, len(self)))
+
+    def close(self):
+        """Zwalnia mapowanie i zamyka plik"""
+        data, self._data = getattr(self, '_data', b''), b''
+        if isinstance(data, mmap.mmap):
+            data.close()
+        self._file.close()
+
+    def _decode(self, start, stop):
+        """Dekoduje wiersze start:stop przez csv.reader (pola w cudzysłowie)"""
+        text = self._data[self._offsets[start]:self._offsets[stop]].decode('utf-8')
+        # Końce linii tłumaczone jak przy odczycie pliku w trybie tekstowym (CsvStorage)
+        return map(_fields, csv.reader(io.StringIO(text, newline=None)))
+
+
+def _fields(row):
+    """Zwraca krotkę dokładnie pięciu pól (brakujące pola są puste)"""
+    if len(row) == FIELD_COUNT:
+        return tuple(row)
+    return tuple((row + [''] * FIELD_COUNT)[:FIELD_COUNT])
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Sortowanie kontaktów po stronie modelu (bez odczytywania danych z tabeli Tk).
+
+- klucze sortowania są liczone raz dla każdej kolumny (casefold + locale.strxfrm,
+  dzięki czemu polskie litery trafiają na właściwe miejsce w alfabecie;
+  przy ustawieniach regionalnych 'C' litery ze znakami diakrytycznymi są
+  porządkowane razem z literami podstawowymi) i aktualizowane przy każdej
+  edycji pojedynczego kontaktu
+- gotowe permutacje (listy identyfikatorów kontaktów) są zapamiętywane
+  dla każdej kombinacji kolumn i kierunków, a unieważniane tylko przy edycji
+- sortowanie wielokolumnowe korzysta ze stabilności sortowania w Pythonie:
+  kolejne przebiegi od najmniej do najbardziej znaczącej kolumny
+
+Wykorzystane biblioteki:
+- locale: porównywanie napisów zgodne z ustawieniami regionalnymi
+- unicodedata: usuwanie znaków diakrytycznych, gdy brak ustawień regionalnych
+- bisect: odnajdywanie kontaktów po identyfikatorze
+"""
+
+import locale
+import unicodedata
+from bisect import bisect_left
+
+try:
+    # Ustawienia regionalne użytkownika, np. pl_PL - tylko dla porównywania napisów
+    locale.setlocale(locale.LC_COLLATE, '')
+except locale.Error:
+    pass
+
+# Czy porównywanie odbywa się według kodów znaków (brak ustawień regionalnych)
+_CODEPOINT_COLLATION = locale.setlocale(locale.LC_COLLATE).split('.')[0] in ('C', 'POSIX')
+# Litery, które nie rozkładają się na literę podstawową i znak diakrytyczny
+_BASE_LETTERS = str.maketrans({'ł': 'l', 'ø': 'o', 'đ': 'd', 'ß': 'ss'})
+
+
+def fold_diacritics(value):
+    """
+    Usuwa znaki diakrytyczne (np. 'Wójcik' -> 'Wojcik', 'Michał' -> 'Michal').
+    Args:
+        value: Tekst do przekształcenia
+    Returns:
+        str: Tekst bez znaków diakrytycznych
+    """
+    decomposed = unicodedata.normalize('NFD', value)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).translate(_BASE_LETTERS)
+
+
+def sort_key(value):
+    """
+    Zwraca klucz sortowania dla wartości pola.
+    Args:
+        value: Tekst pola kontaktu
+    Returns:
+        str: Klucz niezależny od wielkości liter, zgodny z ustawieniami regionalnymi
+    """
+    folded = value.casefold()
+    if _CODEPOINT_COLLATION:
+        if folded.isascii():
+            return folded
+        # 'ą' zaraz po 'a', 'ł' zaraz po 'l' - rozstrzygnięcie remisu pełnym tekstem
+        return fold_diacritics(folded) + '\0' + folded
+    return locale.strxfrm(folded)
+
+
+class ContactSorter:
+    """
+    Pamięć podręczna kluczy sortowania i posortowanych permutacji kontaktów.
+    """
+    def __init__(self):
+        # Klucze sortowania: numer pola -> lista kluczy równoległa do listy kontaktów
+        self._keys = {}
+        # Posortowane identyfikatory: specyfikacja sortowania -> lista identyfikatorów
+        self._orders = {}
+
+    def reset(self):
+        """Usuwa wszystkie zapamiętane klucze i permutacje (np. po wczytaniu pliku)"""
+        self._keys.clear()
+        self._orders.clear()
+
+    def contact_added(self, contact):
+        """
+        Aktualizuje klucze po dodaniu kontaktu na koniec listy.
+        Args:
+            contact: Nowy kontakt
+        """
+        for field, keys in self._keys.items():
+            keys.append(sort_key(contact[field]))
+        self._orders.clear()
+
+    def contact_updated(self, index, contact):
+        """
+        Aktualizuje klucze po zmianie kontaktu.
+        Args:
+            index: Indeks kontaktu
+            contact: Nowe dane kontaktu
+        """
+        for field, keys in self._keys.items():
+            keys[index] = sort_key(contact[field])
+        self._orders.clear()
+
+    def contact_deleted(self, index):
+        """
+        Aktualizuje klucze po usunięciu kontaktu.
+        Args:
+            index: Indeks usuniętego kontaktu
+        """
+        for keys in self._keys.values():
+            del keys[index]
+        self._orders.clear()
+
+    def sorted_ids(self, contacts, contact_ids, spec, subset=None):
+        """
+        Zwraca identyfikatory kontaktów w kolejności sortowania.
+        Args:
+            contacts: Lista kontaktów
+            contact_ids: Identyfikatory kontaktów (równoległe do contacts)
+            spec: Krotka par (numer pola, malejąco) - od najważniejszej kolumny
+            subset: Opcjonalna lista identyfikatorów do posortowania
+                    (np. wynik wyszukiwania); None oznacza wszystkie kontakty
+        Returns:
+            list: Identyfikatory kontaktów w posortowanej kolejności
+        """
+        spec = tuple(spec)
+        if subset is not None and len(subset) * 4 < len(contacts):
+            # Mały podzbiór - sortowanie tylko jego elementów
+            positions = [bisect_left(contact_ids, contact_id) for contact_id in subset]
+            return [contact_ids[i] for i in self._sort_positions(contacts, positions, spec)]
+        order = self._orders.get(spec)
+        if order is None:
+            positions = self._sort_positions(contacts, list(range(len(contacts))), spec)
+            order = [contact_ids[i] for i in positions]
+            self._orders[spec] = order
+        if subset is not None:
+            # Duży podzbiór - szybciej przefiltrować gotową permutację
+            members = set(subset)
+            return [contact_id for contact_id in order if contact_id in members]
+        return order
+
+    def _sort_positions(self, contacts, positions, spec):
+        """Sortuje w miejscu listę indeksów kontaktów według specyfikacji"""
+        for field, descending in reversed(spec):
+            positions.sort(key=self._field_keys(contacts, field).__getitem__,
+                           reverse=descending)
+        return positions
+
+    def _field_keys(self, contacts, field):
+        """Zwraca (i w razie potrzeby oblicza) klucze sortowania dla pola"""
+        keys = self._keys.get(field)
+        if keys is None:
+            # Imiona, nazwiska i domeny często się powtarzają - klucz liczony raz na wartość
+            cache = {}
+            keys = []
+            if hasattr(contacts, 'column'):
+                # Tabela kolumnowa - wartości pola bez tworzenia całych wierszy
+                values = contacts.column(field)
+            else:
+                values = (contact[field] for contact in contacts)
+            for value in values:
+                key = cache.get(value)
+                if key is None:
+                    key = cache[value] = sort_key(value)
+                keys.append(key)
+            self._keys[field] = keys
+        return keys
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Backend zapisu kontaktów w bazie SQLite.
+
+Każda zmiana to jedno polecenie INSERT/UPDATE/DELETE po kluczu głównym
+(B-drzewo - koszt O(log n)) zamiast przepisywania pliku. Kolejność kontaktów
+odpowiada kolejności kluczy głównych: nowy wiersz zawsze dostaje klucz większy
+od wszystkich istniejących, więc operacje pozycyjne ('add', indeks, kontakt)
+używane przez model są odwzorowywane przez tablicę kluczy równoległą do listy
+kontaktów.
+
+- polecenia mają stały tekst, więc moduł sqlite3 kompiluje je raz
+  i przechowuje w pamięci podręcznej przygotowanych zapytań połączenia
+- indeksy na numerze telefonu w formacie E.164, adresie email i nazwisku
+  (find_by_phone, find_by_email, find_by_last_name)
+- tryb WAL: zapis nie blokuje odczytu, a zatwierdzenie to dopisanie do pliku -wal
+- load() czyta kontakty stronami (po kluczu głównym), przekazując każdą stronę
+  do interfejsu od razu - okno pokazuje pierwsze kontakty przed wczytaniem reszty
+- jednorazowa migracja z pliku CSV (razem z jego dziennikiem) przy pierwszym
+  otwarciu pustej bazy
+
+Wykorzystane biblioteki:
+- sqlite3: baza danych (importowany przy otwarciu bazy - książki CSV
+  i serwerowe go nie potrzebują)
+- array: klucze główne wierszy w kolejności kontaktów
+- threading: blokada połączenia używanego przez wątek wczytujący i interfejs
+"""
+
+import os
+import threading
+from array import array
+
+from storage import JournalStorage
+from validation import email_key, phone_key
+
+# Rozszerzenia plików otwieranych jako baza SQLite
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone_key TEXT NOT NULL,
+    email_key TEXT NOT NULL,
+    last_name_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contacts_phone_key ON contacts (phone_key);
+CREATE INDEX IF NOT EXISTS contacts_email_key ON contacts (email_key);
+CREATE INDEX IF NOT EXISTS contacts_last_name_key ON contacts (last_name_key);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+_COLUMNS = "first_name, last_name, nickname, phone, email"
+_INSERT = ("INSERT INTO contacts (first_name, last_name, nickname, phone, email, "
+           "phone_key, email_key, last_name_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+_UPDATE = ("UPDATE contacts SET first_name = ?, last_name = ?, nickname = ?, phone = ?, "
+           "email = ?, phone_key = ?, email_key = ?, last_name_key = ? WHERE id = ?")
+_DELETE = "DELETE FROM contacts WHERE id = ?"
+_PAGE = f"SELECT id, {_COLUMNS} FROM contacts WHERE id > ? ORDER BY id LIMIT ?"
+_UPDATE_KEYS = "UPDATE contacts SET phone_key = ?, email_key = ?, last_name_key = ? WHERE id = ?"
+# Format kluczy wyszukiwania zapisanych w bazie; baza z innym formatem
+# ma klucze przeliczane przy otwarciu
+_KEY_FORMAT = 'e164'
+
+
+def is_sqlite_path(path):
+    """
+    Czy ścieżka wskazuje bazę SQLite (po rozszerzeniu pliku).
+    Args:
+        path: Ścieżka do pliku kontaktów
+    Returns:
+        bool: True dla .db, .sqlite i .sqlite3
+    """
+    return path.lower().endswith(SQLITE_EXTENSIONS)
+
+
+def _row(contact):
+    """Zwraca wartości kolumn tabeli dla kontaktu (pola i klucze wyszukiwania)"""
+    if len(contact) != 5:
+        # Niepełny wiersz z pliku CSV - brakujące pola są puste
+        contact = (list(contact) + [''] * 5)[:5]
+    first_name, last_name, nickname, phone, email = contact
+    return (first_name, last_name, nickname, phone, email,
+            phone_key(phone), email_key(email), last_name.casefold())
+
+
+class SqliteStorage:
+    """
+    Backend przechowujący kontakty w bazie SQLite.
+    """
+    def __init__(self, path='contacts.db', migrate_from=None, durable=True):
+        """
+        Args:
+            path: Ścieżka do pliku bazy
+            migrate_from: Plik CSV importowany przy pierwszym otwarciu pustej bazy
+                          (None - domyślnie plik .csv o tej samej nazwie)
+            durable: Czy każda zmiana ma być utrwalona na dysku przed powrotem
+                     (synchronous=FULL); False - szybszy tryb NORMAL
+        """
+        self.path = path
+        if migrate_from is None:
+            migrate_from = os.path.splitext(path)[0] + '.csv'
+        self.migrate_from = migrate_from
+        self.durable = durable
+        # Liczba kontaktów przeniesionych z CSV przy ostatnim otwarciu (0 - bez migracji)
+        self.migrated = 0
+        self._connection = None
+        self._lock = threading.Lock()
+        # Klucze główne wierszy w kolejności kontaktów w modelu
+        self._rowids = array('q')
+
+    def load(self, on_batch=None, on_operation=None, batch_size=5000, container=None):
+        """
+        Wczytuje kontakty z bazy stronami po batch_size wierszy.
+        Args:
+            on_batch: Opcjonalna funkcja wywoływana dla kolejnych stron
+                      z argumentami (lista kontaktów, postęp 0.0-1.0)
+            on_operation: Nieużywane - baza nie ma dziennika do odtworzenia
+            batch_size: Liczba wierszy na stronie
+            container: Opcjonalna pusta kolekcja do wypełnienia kontaktami
+        Returns:
+            list: Lista kontaktów lub container
+        """
+        contacts = container if container is not None else []
+        with self._lock:
+            connection = self._connect()
+            total = max(1, connection.execute("SELECT count(*) FROM contacts").fetchone()[0])
+            rowids = array('q')
+            last_id = 0
+            while True:
+                rows = connection.execute(_PAGE, (last_id, batch_size)).fetchall()
+                batch = [list(row[1:]) for row in rows]
+                rowids.extend(row[0] for row in rows)
+                contacts.extend(batch)
+                final = len(rows) < batch_size
+                if on_batch is not None:
+                    on_batch(batch, 1.0 if final else min(1.0, len(rowids) / total))
+                if final:
+                    break
+                last_id = rows[-1][0]
+            self._rowids = rowids
+        return contacts
+
+    def load_lazy(self):
+        """
+        Odczyt na żądanie dotyczy tylko plików CSV - baza jest wczytywana przez load.
+        Returns:
+            None
+        """
+        return None
+
+    def record(self, contacts, operation):
+        """
+        Utrwala pojedynczą zmianę jednym poleceniem SQL.
+        Args:
+            contacts: Lista kontaktów po wykonaniu operacji (nieużywana)
+            operation: Krotka (operacja, indeks, kontakt)
+        """
+        self.append([operation])
+
+    def append(self, operations):
+        """
+        Utrwala kilka zmian w jednej transakcji (jedno zatwierdzenie zamiast
+        jednego na zmianę).
+        Args:
+            operations: Krotki (operacja, indeks, kontakt) w kolejności wykonania
+        """
+        with self._lock:
+            connection = self._connect()
+            rowids = self._rowids
+            try:
+                with connection:
+                    connection.execute("BEGIN")
+                    for op, index, contact in operations:
+                        if op == 'add':
+                            cursor = connection.execute(_INSERT, _row(contact))
+                            rowids.append(cursor.lastrowid)
+                        elif op == 'update':
+                            connection.execute(_UPDATE, _row(contact) + (rowids[index],))
+                        elif op == 'delete':
+                            connection.execute(_DELETE, (rowids[index],))
+                            del rowids[index]
+                        else:
+                            raise ValueError(f"Nieznana operacja: {op}")
+            except Exception:
+                # Transakcja została wycofana - klucze wierszy odczytywane z bazy
+                self._reload_rowids()
+                raise
+
+    def save(self, contacts):
+        """
+        Zastępuje zawartość bazy podanymi kontaktami (jedna transakcja).
+        Args:
+            contacts: Lista kontaktów
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("BEGIN")
+                connection.execute("DELETE FROM contacts")
+                connection.executemany(_INSERT, map(_row, contacts))
+            self._reload_rowids()
+
+    def close(self):
+        """Zamyka połączenie z bazą"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def page(self, after_id=0, limit=100):
+        """
+        Zwraca kolejną stronę kontaktów bez wczytywania całej bazy.
+        Args:
+            after_id: Klucz główny ostatniego wiersza poprzedniej strony (0 - początek)
+            limit: Maksymalna liczba wierszy
+        Returns:
+            list: Pary (klucz główny, kontakt)
+        """
+        with self._lock:
+            rows = self._connect().execute(_PAGE, (after_id, limit)).fetchall()
+        return [(row[0], list(row[1:])) for row in rows]
+
+    def find_by_phone(self, phone):
+        """
+        Wyszukuje kontakty po numerze telefonu (w dowolnym zapisie) z użyciem indeksu.
+        Args:
+            phone: Numer telefonu
+        Returns:
+            list: Pasujące kontakty
+        """
+        return self._find('phone_key', phone_key(phone))
+
+    def find_by_email(self, email):
+        """
+        Wyszukuje kontakty po adresie email (bez względu na wielkość liter).
+        Args:
+            email: Adres email
+        Returns:
+            list: Pasujące kontakty
+        """
+        return self._find('email_key', email_key(email))
+
+    def find_by_last_name(self, last_name):
+        """
+        Wyszukuje kontakty po nazwisku (bez względu na wielkość liter).
+        Args:
+            last_name: Nazwisko
+        Returns:
+            list: Pasujące kontakty
+        """
+        return self._find('last_name_key', last_name.strip().casefold())
+
+    def _find(self, column, key):
+        """Zwraca kontakty o podanej wartości indeksowanej kolumny"""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {_COLUMNS} FROM contacts WHERE {column} = ? ORDER BY id", (key,)
+            ).fetchall()
+        return [list(row) for row in rows]
+
+    def _reload_rowids(self):
+        """Odczytuje klucze główne wierszy w kolejności kontaktów"""
+        self._rowids = array('q', (row[0] for row in self._connection.execute(
+            "SELECT id FROM contacts ORDER BY id")))
+
+    def _connect(self):
+        """Otwiera połączenie (przy pierwszym użyciu) i w razie potrzeby migruje CSV"""
+        if self._connection is None:
+            # Połączenie jest używane przez wątek wczytujący, a potem przez
+            # wątek interfejsu - dostęp chroni self._lock
+            import sqlite3
+            connection = sqlite3.connect(self.path, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={'FULL' if self.durable else 'NORMAL'}")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._migrate()
+            self._update_keys()
+        return self._connection
+
+    def _migrate(self):
+        """Jednorazowo przenosi kontakty z pliku CSV do pustej bazy"""
+        connection = self._connection
+        self.migrated = 0
+        if connection.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone():
+            return
+        if connection.execute("SELECT 1 FROM contacts LIMIT 1").fetchone():
+            return
+        contacts = []
+        if self.migrate_from and (os.path.exists(self.migrate_from)
+                                  or os.path.exists(self.migrate_from + '.journal')):
+            source = JournalStorage(self.migrate_from)
+            try:
+                contacts = source.load()
+            finally:
+                source.close()
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(_INSERT, map(_row, contacts))
+            connection.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)",
+                               (self.migrate_from or '',))
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('key_format', ?)",
+                               (_KEY_FORMAT,))
+        self.migrated = len(contacts)
+
+    def _update_keys(self):
+        """Przelicza klucze wyszukiwania zapisane w starszym formacie"""
+        connection = self._connection
+        row = connection.execute("SELECT value FROM meta WHERE key = 'key_format'").fetchone()
+        if row is not None and row[0] == _KEY_FORMAT:
+            return
+        rows = connection.execute("SELECT id, phone, email, last_name FROM contacts").fetchall()
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(_UPDATE_KEYS, (
+                (phone_key(phone), email_key(email), last_name.casefold(), rowid)
+                for rowid, phone, email, last_name in rows))
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('key_format', ?)",
+                               (_KEY_FORMAT,))
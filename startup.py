@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Szybki start okna programu (python contact_manager.py --fast-start).
+
+Bez tego trybu każdy start czyta i parsuje plik CSV, odtwarza dziennik
+i buduje indeks wyszukiwania - dla 100 000 kontaktów ok. 2 s, zanim
+edycja jest możliwa. W trybie szybkiego startu:
+- migawka startowa: przy zamknięciu okna wczytany model książki
+  (ContactTable, identyfikatory i indeks wyszukiwania) oraz ustawienia
+  okna (motyw) są zapisywane obok pliku ('contacts.csv.snapshot') w formacie
+  pickle; kolejny start odczytuje je zamiast pliku CSV, o ile rozmiar i czas
+  modyfikacji pliku CSV i dziennika się nie zmieniły (każdy zapis, import
+  z wiersza poleceń lub kompaktowanie unieważnia migawkę)
+- migawka jest tylko pamięcią podręczną: nieaktualny lub uszkodzony plik
+  jest pomijany, a książka jest wczytywana zwykle; odczyt dopuszcza tylko
+  klasy modelu (ContactTable, SearchIndex, array), więc podmieniony plik
+  nie wykona obcego kodu
+- StartupTimer mierzy etapy startu (importy, budowa okna, wczytanie
+  kontaktów, pierwsze wolne przejście pętli zdarzeń) i wypisuje je na
+  stderr razem z budżetem czasu importów (IMPORT_BUDGET_MS)
+
+Budżet importów sprawdza też:
+    python startup.py                 # import contact_manager (python -X importtime)
+    python startup.py contacts.csv    # oraz wczytanie książki z CSV i z migawki
+
+Pomiar (Python 3.11, bez ekranu; python startup.py, dataset.py):
+- import contact_manager: ok. 73 ms -> ok. 45 ms (http.client z email i ssl
+  oraz concurrent.futures z multiprocessing są importowane dopiero
+  przy pierwszym użyciu, także bez trybu szybkiego startu)
+- moduły poleceń okna (import, eksport, duplikaty, historia zmian,
+  synchronizacja, diagnostyka) oraz sqlite3, urllib.parse i cProfile są
+  importowane w poleceniach, które ich używają: ok. 33 ms -> ok. 26 ms
+  (pomiar z aktualnymi plikami .pyc - przy PYTHONDONTWRITEBYTECODE=1
+  zmienione moduły są kompilowane przy każdym starcie)
+- 100 000 kontaktów: wczytanie z CSV ok. 2,0 s, z migawki ok. 30 ms
+  (zapis migawki ok. 30 ms, plik ok. 22 MB)
+
+Wykorzystane biblioteki:
+- pickle: zapis i odczyt migawki (z ograniczoną listą klas)
+- os: rozmiar i czas modyfikacji plików, zapis przez plik tymczasowy
+- time: pomiar etapów startu
+- subprocess, statistics: pomiar czasu importów w osobnym procesie
+- argparse, shutil, tempfile: parametry i kopia książki do pomiaru
+- background_storage: stan zapisu (migawka nie jest zapisywana po błędzie)
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+
+from background_storage import FAILED
+
+# Zmienna środowiskowa włączająca tryb szybkiego startu
+FAST_START_ENV = 'CONTACTS_FAST_START'
+# Rozszerzenie pliku migawki (zapisywanego obok książki)
+SNAPSHOT_SUFFIX = '.snapshot'
+# Wersja formatu migawki - zmiana klas modelu wymaga nowej wersji
+# (2: klucze indeksu wyszukiwania z prefiksami do 8 znaków)
+SNAPSHOT_VERSION = 2
+# Budżet czasu importu contact_manager (ms, python -X importtime); przed
+# opóźnieniem importów ok. 73 ms, po nim ok. 26 ms
+IMPORT_BUDGET_MS = 55
+# Klasy, które mogą wystąpić w migawce
+_SNAPSHOT_CLASSES = {
+    ('contact_table', 'ContactTable'),
+    ('contact_table', '_CodedColumn'),
+    ('contact_table', '_TextColumn'),
+    ('search_index', 'SearchIndex'),
+    ('array', 'array'),
+    ('array', '_array_reconstructor'),
+}
+
+
+def fast_start_from_environment(enabled=False, environ=None):
+    """
+    Sprawdza, czy włączono szybki start flagą lub zmienną środowiskową.
+    Args:
+        enabled: Flaga --fast-start
+        environ: Zmienne środowiskowe (domyślnie os.environ)
+    Returns:
+        bool: Czy używać trybu szybkiego startu
+    """
+    environ = os.environ if environ is None else environ
+    return enabled or environ.get(FAST_START_ENV, '') not in ('', '0')
+
+
+def snapshot_path(path):
+    """Zwraca ścieżkę pliku migawki dla książki"""
+    return path + SNAPSHOT_SUFFIX
+
+
+def snapshot_key(storage):
+    """
+    Zwraca klucz migawki: rozmiar i czas modyfikacji pliku CSV i dziennika.
+    Args:
+        storage: Backend zapisu książki (także opakowany w BackgroundStorage)
+    Returns:
+        tuple: Klucz lub None, gdy książka nie ma dziennika (baza SQLite,
+               książka na serwerze) i nie może mieć migawki
+    """
+    storage = getattr(storage, 'storage', storage)
+    journal_path = getattr(storage, 'journal_path', None)
+    if journal_path is None:
+        return None
+    return (SNAPSHOT_VERSION, _file_stamp(storage.path), _file_stamp(journal_path))
+
+
+def _file_stamp(path):
+    """Zwraca (rozmiar, czas modyfikacji w ns) pliku lub None, gdy pliku nie ma"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Odczyt migawki ograniczony do klas modelu"""
+    def find_class(self, module, name):
+        if (module, name) not in _SNAPSHOT_CLASSES:
+            raise pickle.UnpicklingError(f"Niedozwolona klasa w migawce: {module}.{name}")
+        return super().find_class(module, name)
+
+
+def _read_header(path):
+    """Zwraca nagłówek migawki (klucz i ustawienia) lub None"""
+    try:
+        with open(path, 'rb') as file:
+            header = _SnapshotUnpickler(file).load()
+    except Exception:
+        # Brak pliku lub uszkodzona migawka - pomijana
+        return None
+    return header if isinstance(header, dict) else None
+
+
+def read_settings(path):
+    """
+    Odczytuje ustawienia okna zapisane w migawce książki (także nieaktualnej).
+    Args:
+        path: Ścieżka do książki
+    Returns:
+        dict: Ustawienia (np. {'dark_theme': False}) lub pusty słownik
+    """
+    header = _read_header(snapshot_path(path))
+    settings = header.get('settings') if header is not None else None
+    return settings if isinstance(settings, dict) else {}
+
+
+def load_snapshot(store):
+    """
+    Wczytuje model książki z aktualnej migawki zamiast z pliku.
+    Args:
+        store: Niewczytany ContactStore
+    Returns:
+        bool: False, gdy migawki nie ma, jest nieaktualna lub uszkodzona
+              albo backend nie może jej użyć - wtedy książkę wczytuje się zwykle
+    """
+    key = snapshot_key(store.storage)
+    if key is None:
+        return False
+    try:
+        with open(snapshot_path(store.path), 'rb') as file:
+            header = _SnapshotUnpickler(file).load()
+            if not isinstance(header, dict) or header.get('key') != key:
+                return False
+            state = _SnapshotUnpickler(file).load()
+        entries = state.pop('entries')
+        if len(state['contact_ids']) != len(state['contacts']):
+            return False
+    except Exception:
+        # Migawka jest tylko pamięcią podręczną
+        return False
+    if not store.storage.resume(state['contacts'], entries):
+        return False
+    store.restore(state)
+    store.load_history()
+    return True
+
+
+def save_snapshot(store, settings):
+    """
+    Zapisuje migawkę zamkniętej książki (po store.close(), gdy pliki na
+    dysku zawierają już wszystkie zmiany). Aktualna migawka nie jest
+    zapisywana ponownie; błąd zapisu jest pomijany.
+    Args:
+        store: Zamknięty ContactStore
+        settings: Ustawienia okna (słownik wartości prostych)
+    Returns:
+        bool: Czy migawka została zapisana
+    """
+    key = snapshot_key(store.storage)
+    if key is None or store.lazy or getattr(store.storage, 'status', None) == FAILED:
+        # Model w trybie leniwym nie jest wczytany, a po błędzie zapisu
+        # różni się od plików
+        return False
+    path = snapshot_path(store.path)
+    header = {'key': key, 'settings': dict(settings)}
+    if _read_header(path) == header:
+        return False
+    state = store.state()
+    state['entries'] = store.storage.entries
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    return True
+
+
+class StartupTimer:
+    """
+    Czasy kolejnych etapów startu okna.
+    """
+    def __init__(self, started=None, budget_ms=IMPORT_BUDGET_MS):
+        """
+        Args:
+            started: Chwila rozpoczęcia importów (time.perf_counter();
+                     None - chwila utworzenia)
+            budget_ms: Budżet czasu importów (ms)
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.budget_ms = budget_ms
+        # Pary (etap, czas w ms) w kolejności pomiaru
+        self.phases = []
+        self._last = self.started
+
+    def mark(self, phase, note=None):
+        """
+        Kończy pomiar etapu (czas od końca poprzedniego etapu).
+        Args:
+            phase: Nazwa etapu, np. 'importy'
+            note: Opcjonalny opis pokazywany w nawiasie, np. 'migawka'
+        """
+        now = time.perf_counter()
+        label = f"{phase} ({note})" if note else phase
+        self.phases.append((label, (now - self._last) * 1000))
+        self._last = now
+
+    def total_ms(self):
+        """Zwraca czas od rozpoczęcia importów do końca ostatniego etapu (ms)"""
+        return (self._last - self.started) * 1000
+
+    def over_budget(self):
+        """Czy importy (pierwszy etap) trwały dłużej niż budżet"""
+        return bool(self.phases) and self.phases[0][1] > self.budget_ms
+
+    def report(self):
+        """Zwraca jednowierszowy opis czasów startu"""
+        parts = [f"{label} {milliseconds:.0f} ms" for label, milliseconds in self.phases]
+        if parts:
+            parts[0] += f" (budżet {self.budget_ms} ms)"
+        text = f"Start: {', '.join(parts)}, razem {self.total_ms():.0f} ms"
+        if self.over_budget():
+            text += " - przekroczony budżet importów"
+        return text
+
+
+def measure_imports(module='contact_manager', runs=5):
+    """
+    Mierzy czas importu modułu w nowych procesach (python -X importtime).
+    Args:
+        module: Nazwa modułu z katalogu programu
+        runs: Liczba uruchomień (wynik to mediana)
+    Returns:
+        tuple: (czas importu w ms, lista par (czas w ms, moduł) bezpośrednich
+               importów modułu z ostatniego uruchomienia, od najwolniejszego)
+    """
+    # Tylko do pomiaru - okno programu nie importuje subprocess
+    import statistics
+    import subprocess
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    totals = []
+    children = []
+    for _ in range(runs):
+        child = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                               cwd=directory, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True, check=True)
+        total, children = _parse_importtime(child.stderr, module)
+        totals.append(total)
+    return statistics.median(totals), sorted(children, reverse=True)
+
+
+def _parse_importtime(output, module):
+    """
+    Odczytuje wynik -X importtime.
+    Returns:
+        tuple: (łączny czas importu modułu w ms, lista par (czas w ms, moduł)
+               jego bezpośrednich importów)
+    """
+    children = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            # Wiersz nagłówka
+            continue
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        name = name.strip()
+        milliseconds = int(cumulative) / 1000
+        if depth == 0:
+            if name == module:
+                return milliseconds, children
+            children = []
+        elif depth == 1:
+            children.append((milliseconds, name))
+    raise ValueError(f"Brak modułu {module} w wyniku -X importtime")
+
+
+def measure_book(path):
+    """
+    Mierzy wczytanie książki z pliku CSV i z migawki (na kopii w katalogu
+    tymczasowym - książka i jej migawka nie są zmieniane).
+    Args:
+        path: Ścieżka do pliku CSV
+    Returns:
+        dict: Liczba kontaktów, czasy w ms (csv, snapshot_save, snapshot_load)
+              i rozmiar migawki w bajtach
+    """
+    import shutil
+    import tempfile
+
+    from contact_store import ContactStore
+    from history import History
+
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, os.path.basename(path))
+        for suffix in ('', '.journal'):
+            if os.path.exists(path + suffix):
+                shutil.copyfile(path + suffix, copy + suffix)
+
+        store = ContactStore(copy, history=History(None))
+        start = time.perf_counter()
+        store.load()
+        csv_ms = (time.perf_counter() - start) * 1000
+        store.close()
+        start = time.perf_counter()
+        save_snapshot(store, {})
+        save_ms = (time.perf_counter() - start) * 1000
+
+        restored = ContactStore(copy, history=History(None))
+        start = time.perf_counter()
+        if not load_snapshot(restored):
+            raise RuntimeError("Nie udało się wczytać zapisanej migawki")
+        load_ms = (time.perf_counter() - start) * 1000
+        restored.close()
+        return {
+            'contacts': len(store),
+            'csv_ms': csv_ms,
+            'snapshot_save_ms': save_ms,
+            'snapshot_load_ms': load_ms,
+            'snapshot_bytes': os.path.getsize(snapshot_path(copy)),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pomiar czasu startu menedżera kontaktów")
+    parser.add_argument('book', nargs='?', help="książka CSV do pomiaru wczytania z pliku i z migawki")
+    parser.add_argument('--module', default='contact_manager', help="mierzony moduł (domyślnie %(default)s)")
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_MS,
+                        help="budżet czasu importu w ms (domyślnie %(default)s)")
+    parser.add_argument('--runs', type=int, default=5, help="liczba uruchomień (mediana)")
+    parser.add_argument('--top', type=int, default=8, help="liczba pokazywanych importów")
+    args = parser.parse_args(argv)
+
+    total, children = measure_imports(args.module, args.runs)
+    print(f"Import {args.module}: {total:.1f} ms (mediana z {args.runs}, budżet {args.budget:g} ms)")
+    for milliseconds, name in children[:args.top]:
+        print(f"  {name:<24} {milliseconds:7.1f} ms")
+    if args.book:
+        book = measure_book(args.book)
+        print(f"Książka {args.book} ({book['contacts']} kontaktów):")
+        print(f"  wczytanie z CSV      {book['csv_ms']:9.1f} ms")
+        print(f"  zapis migawki        {book['snapshot_save_ms']:9.1f} ms "
+              f"({book['snapshot_bytes'] / (1024 * 1024):.1f} MB)")
+        print(f"  wczytanie z migawki  {book['snapshot_load_ms']:9.1f} ms")
+    if total > args.budget:
+        print("Przekroczony budżet czasu importu", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,510 @@
+# -*- coding: utf-8 -*-
+"""
+Warstwa przechowywania kontaktów (backendy zapisu/odczytu).
+
+Dostępne backendy:
+- CsvStorage: dotychczasowe zachowanie - każda zmiana przepisuje cały plik CSV
+- JournalStorage: dziennik zapisu z wyprzedzeniem (write-ahead journal);
+  każda operacja dodania/aktualizacji/usunięcia jest dopisywana na koniec
+  pliku 'contacts.csv.journal', a po przekroczeniu progu dziennik jest
+  w tle scalany (kompaktowany) z plikiem CSV
+
+Format dziennika - jedna linia na operację:
+    <crc32 treści w hex> <JSON: [operacja, indeks, kontakt]>\\n
+Linia urwana w połowie (awaria podczas zapisu) lub z błędną sumą kontrolną
+kończy odtwarzanie - wszystko przed nią jest poprawne.
+
+Kompaktowanie:
+1. aktywny dziennik jest przemianowywany na segment
+   'contacts.csv.journal.<nr>.<odcisk CSV>' (odcisk = rozmiar i CRC32 pliku CSV,
+   na który nakładają się operacje segmentu) i zakładany jest nowy, pusty dziennik
+2. wątek w tle zapisuje migawkę kontaktów do pliku tymczasowego
+   i podmienia nim CSV przez os.replace (operacja atomowa)
+3. segmenty są usuwane
+Przy odczycie segment jest odtwarzany tylko wtedy, gdy jego odcisk zgadza się
+z bieżącym CSV - po udanej podmianie pliku segment jest już w nim zawarty,
+więc awaria na dowolnym etapie nie powoduje utraty ani podwójnego zastosowania zmian.
+
+Wykorzystane biblioteki:
+- csv: odczyt/zapis pliku kontaktów
+- json: serializacja operacji w dzienniku
+- zlib: sumy kontrolne CRC32
+- threading: kompaktowanie w tle
+- lazy_csv: odczyt pliku CSV na żądanie (load_lazy)
+"""
+
+import csv
+import glob
+import json
+import os
+import threading
+import zlib
+
+from lazy_csv import LazyCsvRows
+
+
+def apply_operation(contacts, operation):
+    """
+    Nakłada pojedynczą operację na listę kontaktów.
+    Args:
+        contacts: Lista kontaktów (modyfikowana w miejscu)
+        operation: Krotka (operacja, indeks, kontakt), gdzie operacja to
+                   'add', 'update' lub 'delete'
+    Raises:
+        ValueError: Gdy operacja nie pasuje do stanu listy
+    """
+    op, index, contact = operation
+    if op == 'add':
+        if index != len(contacts):
+            raise ValueError(f"Niespójny indeks dodawania: {index}")
+        contacts.append(contact)
+    elif op == 'update':
+        if not 0 <= index < len(contacts):
+            raise ValueError(f"Niepoprawny indeks aktualizacji: {index}")
+        contacts[index] = contact
+    elif op == 'delete':
+        if not 0 <= index < len(contacts):
+            raise ValueError(f"Niepoprawny indeks usuwania: {index}")
+        del contacts[index]
+    else:
+        raise ValueError(f"Nieznana operacja: {op}")
+
+
+def file_fingerprint(path):
+    """
+    Oblicza odcisk pliku (rozmiar i CRC32 zawartości).
+    Args:
+        path: Ścieżka do pliku
+    Returns:
+        str: Odcisk w postaci '<rozmiar>-<crc32>' lub 'none' gdy plik nie istnieje
+    """
+    if not os.path.exists(path):
+        return 'none'
+    crc = 0
+    size = 0
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(1 << 20)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+    return f"{size}-{crc:08x}"
+
+
+def write_csv_atomic(path, contacts):
+    """
+    Zapisuje kontakty do pliku CSV przez plik tymczasowy i os.replace,
+    dzięki czemu przerwany zapis nie uszkodzi istniejącego pliku.
+    Args:
+        path: Ścieżka do pliku CSV
+        contacts: Lista kontaktów do zapisania
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerows(contacts)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(path)
+
+
+def _fsync_directory(path):
+    """Utrwala wpis katalogu po zmianie nazwy pliku (tylko systemy POSIX)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CsvStorage:
+    """
+    Backend zapisujący cały plik CSV przy każdej zmianie.
+    """
+    def __init__(self, path='contacts.csv'):
+        """
+        Args:
+            path: Ścieżka do pliku CSV z kontaktami
+        """
+        self.path = path
+
+    def load(self, on_batch=None, on_operation=None, batch_size=5000, container=None):
+        """
+        Wczytuje kontakty z pliku CSV.
+        Args:
+            on_batch: Opcjonalna funkcja wywoływana dla kolejnych porcji wierszy
+                      z argumentami (lista kontaktów, postęp 0.0-1.0)
+            on_operation: Funkcja wywoływana dla operacji odtwarzanych po
+                          wczytaniu pliku (nieużywana - plik CSV nie ma dziennika)
+            batch_size: Liczba wierszy w porcji
+            container: Opcjonalna pusta kolekcja do wypełnienia kontaktami
+                       (np. ContactTable); domyślnie lista
+        Returns:
+            list: Lista kontaktów (każdy kontakt to lista pól) lub container
+        """
+        contacts = container if container is not None else []
+        if not os.path.exists(self.path):
+            return contacts
+        with open(self.path, 'r', encoding='utf-8') as file:
+            if on_batch is None:
+                contacts.extend(csv.reader(file))
+                return contacts
+            size = max(1, os.fstat(file.fileno()).st_size)
+            batch = []
+            for row in csv.reader(file):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    contacts.extend(batch)
+                    # Pozycja w buforze binarnym wyprzedza parser o jeden blok
+                    on_batch(batch, min(1.0, file.buffer.tell() / size))
+                    batch = []
+            contacts.extend(batch)
+            on_batch(batch, 1.0)
+            return contacts
+
+    def load_lazy(self):
+        """
+        Otwiera plik CSV do odczytu na żądanie (mmap i indeks przesunięć wierszy).
+        Returns:
+            LazyCsvRows: Wiersze pliku lub None, gdy pliku nie ma
+        """
+        if not os.path.exists(self.path):
+            return None
+        return LazyCsvRows(self.path)
+
+    def record(self, contacts, operation):
+        """
+        Utrwala pojedynczą zmianę.
+        Args:
+            contacts: Lista kontaktów po wykonaniu operacji
+            operation: Krotka (operacja, indeks, kontakt)
+        """
+        self.save(contacts)
+
+    def save(self, contacts):
+        """
+        Zapisuje wszystkie kontakty do pliku CSV.
+        Args:
+            contacts: Lista kontaktów
+        """
+        with open(self.path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerows(contacts)
+
+    def close(self):
+        """Zamyka backend (brak otwartych zasobów)"""
+        pass
+
+
+class JournalStorage(CsvStorage):
+    """
+    Backend z dziennikiem operacji dopisywanym na koniec pliku.
+    Pojedyncza zmiana kosztuje zapis jednej linii zamiast całego pliku CSV.
+    """
+    def __init__(self, path='contacts.csv', compact_threshold=1000, durable=True):
+        """
+        Args:
+            path: Ścieżka do pliku CSV z kontaktami
+            compact_threshold: Liczba operacji w dzienniku, po której
+                               uruchamiane jest kompaktowanie w tle
+            durable: Czy wywoływać fsync po każdym wpisie do dziennika
+        """
+        super().__init__(path)
+        self.journal_path = path + '.journal'
+        self.compact_threshold = compact_threshold
+        self.durable = durable
+        # Błąd ostatniego kompaktowania w tle (None jeśli się powiodło)
+        self.last_error = None
+        self._journal = None
+        self._entries = 0
+        self._base_fingerprint = None
+        self._next_segment = 0
+        self._compactor = None
+
+    def load(self, on_batch=None, on_operation=None, batch_size=5000, container=None):
+        """
+        Wczytuje kontakty z pliku CSV i odtwarza na nich dziennik.
+        Args:
+            on_batch: Opcjonalna funkcja wywoływana dla kolejnych porcji wierszy
+                      pliku CSV z argumentami (lista kontaktów, postęp 0.0-1.0)
+            on_operation: Opcjonalna funkcja wywoływana dla każdej poprawnej
+                          operacji z dziennika, w kolejności odtwarzania
+            batch_size: Liczba wierszy w porcji
+            container: Opcjonalna pusta kolekcja do wypełnienia kontaktami
+        Returns:
+            list: Lista kontaktów lub container
+        """
+        self._wait_for_compactor()
+        self._close_journal()
+        contacts = super().load(on_batch, batch_size=batch_size, container=container)
+        self._base_fingerprint = file_fingerprint(self.path)
+
+        # Segmenty pozostałe po przerwanym kompaktowaniu
+        pending = []
+        for number, fingerprint, segment_path in self._segments():
+            self._next_segment = max(self._next_segment, number + 1)
+            if fingerprint != self._base_fingerprint:
+                # Segment został już scalony z plikiem CSV
+                os.remove(segment_path)
+                continue
+            self._replay(segment_path, contacts, False, on_operation)
+            pending.append(segment_path)
+
+        snapshot = contacts.copy() if pending else None
+        self._entries = self._replay(self.journal_path, contacts, True, on_operation)
+        self._journal = open(self.journal_path, 'ab')
+
+        if pending:
+            # Dokończenie przerwanego kompaktowania
+            self._start_compactor(snapshot, pending)
+        elif self._entries >= self.compact_threshold:
+            self.compact(contacts)
+        return contacts
+
+    def load_lazy(self):
+        """
+        Otwiera plik CSV do odczytu na żądanie, jeśli dziennik jest pusty.
+        Odcisk pliku CSV (odczyt całego pliku) jest liczony dopiero przy
+        pierwszym kompaktowaniu.
+        Returns:
+            LazyCsvRows: Wiersze pliku lub None, gdy pliku nie ma albo dziennik
+                         zawiera zmiany (wymagane pełne load z odtworzeniem)
+        """
+        self._wait_for_compactor()
+        self._close_journal()
+        if self._segments() or (os.path.exists(self.journal_path)
+                                and os.path.getsize(self.journal_path) > 0):
+            return None
+        rows = super().load_lazy()
+        if rows is None:
+            return None
+        self._base_fingerprint = None
+        self._entries = 0
+        self._journal = open(self.journal_path, 'ab')
+        return rows
+
+    def resume(self, contacts, entries):
+        """
+        Otwiera dziennik do dopisywania dla kontaktów wczytanych spoza pliku
+        (migawka startowa, startup.py) - jak load, ale bez odczytu pliku CSV
+        i odtwarzania dziennika. Odcisk pliku CSV jest liczony dopiero przy
+        pierwszym kompaktowaniu.
+        Args:
+            contacts: Kontakty z migawki (zgodne z plikiem CSV i dziennikiem)
+            entries: Liczba operacji w dzienniku w chwili zapisu migawki
+        Returns:
+            bool: False, gdy na dysku są segmenty przerwanego kompaktowania
+                  (wymagane pełne load)
+        """
+        self._wait_for_compactor()
+        self._close_journal()
+        if self._segments():
+            return False
+        self._base_fingerprint = None
+        self._entries = entries
+        self._journal = open(self.journal_path, 'ab')
+        if self._entries >= self.compact_threshold:
+            self.compact(contacts)
+        return True
+
+    def read(self):
+        """
+        Odczytuje kontakty razem z dziennikiem bez zmian na dysku (bez
+        otwierania i obcinania dziennika, bez kompaktowania) - np. do
+        przeglądania książki, którą może mieć otwartą inny model.
+        Returns:
+            LazyCsvRows, gdy dziennik jest pusty (zamyka wywołujący), lub lista
+            kontaktów z odtworzonymi operacjami
+        """
+        segments = self._segments()
+        if not segments and not (os.path.exists(self.journal_path)
+                                 and os.path.getsize(self.journal_path) > 0):
+            rows = super().load_lazy()
+            return rows if rows is not None else []
+        contacts = super().load()
+        fingerprint = file_fingerprint(self.path)
+        for _, segment_fingerprint, segment_path in segments:
+            if segment_fingerprint == fingerprint:
+                self._replay(segment_path, contacts, False)
+        self._replay(self.journal_path, contacts, False)
+        return contacts
+
+    def record(self, contacts, operation):
+        """
+        Dopisuje operację do dziennika.
+        Args:
+            contacts: Lista kontaktów po wykonaniu operacji
+            operation: Krotka (operacja, indeks, kontakt)
+        """
+        self.append([operation])
+        if self._entries >= self.compact_threshold:
+            self.compact(contacts)
+
+    def append(self, operations):
+        """
+        Dopisuje kilka operacji do dziennika jednym zapisem i jednym fsync
+        (bez kompaktowania - o migawce decyduje wywołujący).
+        Args:
+            operations: Krotki (operacja, indeks, kontakt) w kolejności wykonania
+        """
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'ab')
+        lines = []
+        for operation in operations:
+            payload = json.dumps(list(operation), ensure_ascii=False,
+                                 separators=(',', ':')).encode('utf-8')
+            lines.append(b'%08x %s\n' % (zlib.crc32(payload), payload))
+        self._journal.write(b''.join(lines))
+        self._journal.flush()
+        if self.durable:
+            os.fsync(self._journal.fileno())
+        self._entries += len(lines)
+
+    @property
+    def entries(self):
+        """Liczba operacji w aktywnym dzienniku (od ostatniego kompaktowania)"""
+        return self._entries
+
+    def save(self, contacts):
+        """
+        Zapisuje wszystkie kontakty do CSV i czyści dziennik (synchronicznie).
+        Args:
+            contacts: Lista kontaktów
+        """
+        self._wait_for_compactor()
+        segments = self._rotate()
+        self._write_snapshot(contacts.copy(), segments)
+        if self.last_error is not None:
+            raise self.last_error
+
+    def compact(self, contacts):
+        """
+        Uruchamia w tle scalanie dziennika z plikiem CSV.
+        Nic nie robi, jeśli poprzednie kompaktowanie jeszcze trwa.
+        Args:
+            contacts: Bieżąca lista kontaktów
+        """
+        if self.compacting:
+            return
+        segments = self._rotate()
+        self._start_compactor(contacts.copy(), segments)
+
+    @property
+    def compacting(self):
+        """Czy kompaktowanie w tle jest w toku"""
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def close(self):
+        """Czeka na zakończenie kompaktowania i zamyka dziennik"""
+        self._wait_for_compactor()
+        self._close_journal()
+
+    def _segments(self):
+        """
+        Zwraca segmenty dziennika posortowane według numeru.
+        Returns:
+            list: Krotki (numer, odcisk CSV, ścieżka)
+        """
+        segments = []
+        for segment_path in glob.glob(glob.escape(self.journal_path) + '.*'):
+            suffix = segment_path[len(self.journal_path) + 1:]
+            number, _, fingerprint = suffix.partition('.')
+            if number.isdigit() and fingerprint:
+                segments.append((int(number), fingerprint, segment_path))
+        segments.sort()
+        return segments
+
+    def _rotate(self):
+        """
+        Zamienia aktywny dziennik w segment oczekujący na scalenie.
+        Returns:
+            list: Ścieżki wszystkich segmentów do usunięcia po scaleniu
+        """
+        self._close_journal()
+        if self._base_fingerprint is None:
+            # Plik otwarty przez load_lazy - odcisk liczony przy pierwszej potrzebie
+            self._base_fingerprint = file_fingerprint(self.path)
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            segment_path = f"{self.journal_path}.{self._next_segment}.{self._base_fingerprint}"
+            self._next_segment += 1
+            os.replace(self.journal_path, segment_path)
+        self._journal = open(self.journal_path, 'ab')
+        self._entries = 0
+        # Segmenty po nieudanym kompaktowaniu są zawarte w migawce
+        return [segment_path for _, _, segment_path in self._segments()]
+
+    def _start_compactor(self, snapshot, segments):
+        """Uruchamia wątek zapisujący migawkę kontaktów"""
+        self._compactor = threading.Thread(
+            target=self._write_snapshot, args=(snapshot, segments),
+            name="journal-compactor"
+        )
+        self._compactor.start()
+
+    def _write_snapshot(self, snapshot, segments):
+        """
+        Zapisuje migawkę do CSV i usuwa scalone segmenty.
+        Wykonywane w wątku w tle - błędy są zapamiętywane w last_error,
+        a segmenty pozostają na dysku do kolejnej próby.
+        """
+        try:
+            write_csv_atomic(self.path, snapshot)
+            self._base_fingerprint = file_fingerprint(self.path)
+            for segment_path in segments:
+                os.remove(segment_path)
+            self.last_error = None
+        except OSError as e:
+            self.last_error = e
+
+    def _replay(self, path, contacts, truncate, on_operation=None):
+        """
+        Odtwarza operacje z pliku dziennika.
+        Args:
+            path: Ścieżka do dziennika lub segmentu
+            contacts: Lista kontaktów (modyfikowana w miejscu)
+            truncate: Czy obciąć uszkodzony koniec pliku
+            on_operation: Opcjonalna funkcja wywoływana dla każdej odtworzonej operacji
+        Returns:
+            int: Liczba odtworzonych operacji
+        """
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        valid_end = 0
+        with open(path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                checksum, _, payload = line[:-1].partition(b' ')
+                try:
+                    if int(checksum, 16) != zlib.crc32(payload):
+                        break
+                    operation = tuple(json.loads(payload.decode('utf-8')))
+                    apply_operation(contacts, operation)
+                except (ValueError, TypeError):
+                    break
+                if on_operation is not None:
+                    on_operation(operation)
+                count += 1
+                valid_end += len(line)
+        if truncate and valid_end < os.path.getsize(path):
+            # Usunięcie urwanego wpisu, aby nowe operacje nie trafiły za śmieci
+            with open(path, 'r+b') as file:
+                file.truncate(valid_end)
+        return count
+
+    def _wait_for_compactor(self):
+        """Czeka na zakończenie wątku kompaktowania"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def _close_journal(self):
+        """Zamyka plik aktywnego dziennika"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
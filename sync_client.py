@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+Klient serwera książki kontaktów (sync_server.py).
+
+RemoteStorage to backend zapisu dla ContactStore (jak JournalStorage
+i SqliteStorage), wybierany przez contact_store.create_storage dla adresów
+'http://host:port'. Okno aplikacji i wiersz poleceń pracują więc na zwykłym
+modelu w pamięci (wyszukiwanie, sortowanie i widok bez zapytań do serwera),
+a zmiany są wysyłane na serwer:
+- record() wysyła dodanie, edycję lub usunięcie od razu, razem z wersją
+  kontaktu znaną klientowi; zmiana odrzucona przez serwer (kontakt
+  zmieniony lub usunięty przez innego użytkownika) zgłasza SyncConflict,
+  a bieżący stan kontaktu przychodzi z kolejną synchronizacją
+- save() wysyła jednym żądaniem kontakty, których nie ma jeszcze na serwerze
+  (np. dopisane przez import), zamiast nadpisywać całą książkę
+- operations() zamienia odpowiedź synchronizacji (zmiany od znanej wersji)
+  na operacje (operacja, indeks, kontakt) dla ContactStore.replay - tabela
+  jest aktualizowana tylko w zmienionych wierszach
+
+Kontakty na serwerze mają własne identyfikatory; RemoteStorage pamięta
+identyfikator serwera dla każdego indeksu modelu i znaną wersję każdego
+kontaktu. Zmiany o wersji nie nowszej niż znana są pomijane, więc
+odpowiedź wysłana przed własną zmianą klienta jej nie cofa.
+
+Wykorzystane biblioteki:
+- http.client: połączenie HTTP/1.1 utrzymywane między żądaniami (importowany
+  w metodach SyncClient - razem z email i ssl wydłużałby start okna także
+  bez książki na serwerze)
+- bisect: indeksy kontaktów modelu sprzed usunięć
+- json: treść żądań i odpowiedzi
+- urllib.parse: adres serwera i parametry zapytań (importowany w metodach
+  SyncClient, jak http.client)
+- background_storage: stany zapisu pokazywane w oknie
+"""
+
+import json
+from bisect import bisect_right
+
+from background_storage import FAILED, IDLE, SAVED
+
+# Czas oczekiwania na odpowiedź serwera (s)
+DEFAULT_TIMEOUT = 10.0
+# Liczba kontaktów wysyłanych w jednym żądaniu przez save()
+UPLOAD_BATCH = 5000
+
+
+def is_server_url(path):
+    """Czy ścieżka książki jest adresem serwera (http:// lub https://)"""
+    return isinstance(path, str) and path.startswith(('http://', 'https://'))
+
+
+class SyncError(Exception):
+    """
+    Serwer odrzucił żądanie albo nie odpowiedział.
+    Atrybut status zawiera kod odpowiedzi HTTP (None - brak połączenia).
+    """
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class SyncConflict(SyncError):
+    """
+    Kontakt został zmieniony lub usunięty przez innego użytkownika.
+    Atrybut contact zawiera bieżący kontakt z serwera ([id, wersja, pola...])
+    lub None, gdy kontakt został usunięty.
+    """
+    def __init__(self, message, status, contact=None):
+        super().__init__(message, status)
+        self.contact = contact
+
+
+class SyncClient:
+    """
+    Połączenie z serwerem książki kontaktów.
+    """
+    def __init__(self, url, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            url: Adres serwera, np. 'http://127.0.0.1:8765'
+            timeout: Czas oczekiwania na odpowiedź (s)
+        """
+        import http.client
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Niepoprawny adres serwera: {url}")
+        self.url = url
+        self.timeout = timeout
+        self._connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                  else http.client.HTTPConnection)
+        self._address = (parts.hostname, parts.port)
+        self._prefix = parts.path.rstrip('/')
+        self._connection = None
+
+    def changes(self, since=0, epoch=None, wait=0):
+        """
+        Pobiera zmiany po wersji since (lub całą książkę).
+        Args:
+            since: Ostatnia wersja znana klientowi (0 - cała książka)
+            epoch: Identyfikator uruchomienia serwera z poprzedniej odpowiedzi
+            wait: Czas oczekiwania na zmiany, gdy ich nie ma (s)
+        Returns:
+            dict: Odpowiedź serwera (epoch, version, full, contacts, deleted)
+        """
+        from urllib.parse import urlencode
+
+        query = {'since': since}
+        if epoch is not None:
+            query['epoch'] = epoch
+        if wait:
+            query['wait'] = wait
+        return self.request('GET', '/contacts?' + urlencode(query))
+
+    def add(self, contacts):
+        """
+        Dodaje kontakty.
+        Args:
+            contacts: Lista kontaktów
+        Returns:
+            list: Pary [id, wersja] w kolejności kontaktów
+        """
+        return self.request('POST', '/contacts', {'contacts': [list(c) for c in contacts]})['contacts']
+
+    def update(self, contact_id, contact, version):
+        """
+        Zmienia kontakt o wersji version.
+        Returns:
+            int: Nowa wersja kontaktu
+        Raises:
+            SyncConflict: Kontakt ma inną wersję lub został usunięty
+        """
+        return self.request('PUT', f'/contacts/{contact_id}',
+                            {'contact': list(contact), 'version': version})['version']
+
+    def delete(self, contact_id, version):
+        """
+        Usuwa kontakt o wersji version.
+        Returns:
+            int: Wersja usunięcia
+        Raises:
+            SyncConflict: Kontakt ma inną wersję lub został już usunięty
+        """
+        return self.request('DELETE', f'/contacts/{contact_id}?version={version}')['version']
+
+    def request(self, method, path, payload=None):
+        """
+        Wysyła żądanie i dekoduje odpowiedź JSON.
+        Args:
+            method: Metoda HTTP
+            path: Ścieżka z parametrami
+            payload: Treść żądania (obiekt JSON) lub None
+        Returns:
+            dict: Odpowiedź serwera
+        Raises:
+            SyncConflict: Kod 404 lub 409 (kontakt usunięty lub zmieniony)
+            SyncError: Inny kod błędu lub brak połączenia
+        """
+        import http.client
+
+        body = None
+        headers = {}
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            headers['Content-Type'] = 'application/json; charset=utf-8'
+        try:
+            status, data = self._send(method, self._prefix + path, body, headers)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self.close()
+            raise SyncError(f"Brak połączenia z serwerem {self.url}: {e}") from e
+        if status >= 400:
+            message = data.get('error', f"błąd serwera {status}") if isinstance(data, dict) else status
+            if status in (404, 409) and isinstance(data, dict) and 'contact' in data:
+                raise SyncConflict(message, status, data['contact'])
+            raise SyncError(message, status)
+        return data
+
+    def close(self):
+        """Zamyka połączenie"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _send(self, method, path, body, headers):
+        """
+        Wysyła żądanie przez utrzymywane połączenie; połączenie zamknięte
+        przez serwer między żądaniami jest otwierane ponownie (jeden raz).
+        """
+        import http.client
+
+        reused = self._connection is not None
+        try:
+            return self._exchange(method, path, body, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            if not reused:
+                raise
+            self.close()
+            return self._exchange(method, path, body, headers)
+
+    def _exchange(self, method, path, body, headers):
+        """Jedno żądanie i odpowiedź"""
+        if self._connection is None:
+            self._connection = self._connection_class(*self._address, timeout=self.timeout)
+        self._connection.request(method, path, body, headers)
+        response = self._connection.getresponse()
+        data = json.loads(response.read() or b'null')
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+        return response.status, data
+
+
+class RemoteStorage:
+    """
+    Backend zapisu przekazujący zmiany do serwera książki kontaktów.
+    """
+    def __init__(self, url, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            url: Adres serwera, np. 'http://127.0.0.1:8765'
+            timeout: Czas oczekiwania na odpowiedź (s)
+        """
+        self.path = url
+        self.client = SyncClient(url, timeout)
+        # Stan ostatniego zapisu (jak w BackgroundStorage) - do napisu w oknie
+        self.status = IDLE
+        self.last_error = None
+        # Ostatnia wersja książki i identyfikator uruchomienia serwera
+        self.since = 0
+        self.epoch = None
+        # Identyfikator serwera dla każdego indeksu modelu (None - kontakt
+        # jeszcze niewysłany) i znana wersja kontaktów (także usuniętych)
+        self._ids = []
+        self._versions = {}
+        # Identyfikator serwera -> indeks (budowany na żądanie po usunięciach)
+        self._positions = None
+
+    def load(self, on_batch=None, on_operation=None, batch_size=5000, container=None):
+        """
+        Pobiera całą książkę z serwera.
+        Args:
+            on_batch: Opcjonalna funkcja wywoływana dla kolejnych porcji kontaktów
+                      z argumentami (lista kontaktów, postęp 0.0-1.0)
+            on_operation: Nieużywana - serwer zwraca stan po wszystkich zmianach
+            batch_size: Liczba kontaktów w porcji
+            container: Opcjonalna pusta kolekcja do wypełnienia kontaktami
+        Returns:
+            list: Lista kontaktów lub container
+        Raises:
+            SyncError: Brak połączenia z serwerem
+        """
+        response = self.client.changes()
+        contacts = container if container is not None else []
+        self._ids = [item[0] for item in response['contacts']]
+        self._versions = {item[0]: item[1] for item in response['contacts']}
+        self._positions = None
+        self.since, self.epoch = response['version'], response['epoch']
+        rows = [item[2:] for item in response['contacts']]
+        if on_batch is None:
+            contacts.extend(rows)
+            return contacts
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            contacts.extend(batch)
+            on_batch(batch, min(1.0, (start + len(batch)) / len(rows)))
+        if not rows:
+            on_batch([], 1.0)
+        return contacts
+
+    def load_lazy(self):
+        """Tryb odczytu na żądanie nie dotyczy serwera - zawsze None"""
+        return None
+
+    def record(self, contacts, operation):
+        """
+        Wysyła zmianę na serwer.
+        Args:
+            contacts: Kontakty po wykonaniu operacji
+            operation: Krotka (operacja, indeks, kontakt)
+        Raises:
+            SyncConflict: Kontakt został zmieniony lub usunięty na serwerze
+                          (zmiana zostaje tylko w pamięci do następnej synchronizacji)
+            SyncError: Brak połączenia lub zmiana odrzucona
+        """
+        op, index, contact = operation
+        # Liczba kontaktów przed operacją (dopisane bez zapisu, np. import, nie mają identyfikatora)
+        self._pad(len(contacts) + (-1 if op == 'add' else 1 if op == 'delete' else 0))
+        try:
+            if op == 'add':
+                self._ids.append(None)
+                self._upload([len(self._ids) - 1], contacts)
+            elif op == 'update':
+                contact_id = self._ids[index]
+                if contact_id is None:
+                    self._upload([index], contacts)
+                else:
+                    self._versions[contact_id] = self.client.update(
+                        contact_id, contact, self._versions[contact_id])
+            else:
+                contact_id = self._ids.pop(index)
+                self._positions = None
+                if contact_id is not None:
+                    try:
+                        self._versions[contact_id] = self.client.delete(
+                            contact_id, self._versions[contact_id])
+                    except SyncConflict as e:
+                        if e.contact is not None:
+                            raise
+                        # Kontakt został już usunięty przez innego użytkownika
+        except SyncError as e:
+            self.status, self.last_error = FAILED, e
+            raise
+        self.status = SAVED
+
+    def save(self, contacts):
+        """
+        Wysyła kontakty, których nie ma jeszcze na serwerze (np. po imporcie).
+        Książka na serwerze nie jest zastępowana kopią z pamięci klienta.
+        Args:
+            contacts: Kontakty modelu
+        Raises:
+            SyncError: Brak połączenia lub kontakty odrzucone
+        """
+        self._pad(len(contacts))
+        pending = [index for index, contact_id in enumerate(self._ids) if contact_id is None]
+        try:
+            for start in range(0, len(pending), UPLOAD_BATCH):
+                self._upload(pending[start:start + UPLOAD_BATCH], contacts)
+        except SyncError as e:
+            self.status, self.last_error = FAILED, e
+            raise
+        self.status = SAVED
+
+    def operations(self, contacts, response):
+        """
+        Zamienia odpowiedź synchronizacji na operacje modelu.
+        Operacje trzeba wykonać w kolejności (ContactStore.replay) - indeksy
+        uwzględniają poprzednie usunięcia. Pełna książka (nowe uruchomienie
+        serwera) jest porównywana z modelem, więc zmieniają się tylko
+        różniące się kontakty.
+        Args:
+            contacts: Kontakty modelu
+            response: Odpowiedź SyncClient.changes
+        Returns:
+            list: Krotki (operacja, indeks, kontakt)
+        """
+        self._pad(len(contacts))
+        full = response['full']
+        if full:
+            self._versions = {}
+        known = self._versions
+        received = {item[0]: item for item in response['contacts']
+                    if item[1] > known.get(item[0], -1)}
+        deleted = [(contact_id, version) for contact_id, version in response['deleted']
+                   if version > known.get(contact_id, -1)]
+
+        # Usunięcia od końca - indeksy wcześniejszych kontaktów się nie zmieniają
+        positions = self._position_map()
+        if full:
+            doomed = [index for index, contact_id in enumerate(self._ids)
+                      if contact_id is not None and contact_id not in received]
+        else:
+            doomed = [positions[contact_id] for contact_id, _ in deleted if contact_id in positions]
+        doomed.sort()
+        # Indeks po usunięciach + bisect_right(shifted, indeks) = indeks
+        # w contacts (model przed wykonaniem operacji)
+        shifted = [index - count for count, index in enumerate(doomed)]
+        operations = []
+        for index in reversed(doomed):
+            operations.append(('delete', index, None))
+            del self._ids[index]
+        for contact_id, version in deleted:
+            known[contact_id] = version
+        if doomed:
+            self._positions = None
+            positions = self._position_map()
+
+        for contact_id, item in received.items():
+            known[contact_id] = item[1]
+            contact = list(item[2:])
+            index = positions.get(contact_id)
+            if index is None:
+                operations.append(('add', len(self._ids), contact))
+                positions[contact_id] = len(self._ids)
+                self._ids.append(contact_id)
+            elif list(contacts[index + bisect_right(shifted, index)]) != contact:
+                operations.append(('update', index, contact))
+        self.since, self.epoch = response['version'], response['epoch']
+        return operations
+
+    def close(self):
+        """Zamyka połączenie z serwerem"""
+        self.client.close()
+
+    def _pad(self, count):
+        """Uzupełnia identyfikatory kontaktów dopisanych bez zapisu (None) do count"""
+        if len(self._ids) < count:
+            self._ids.extend([None] * (count - len(self._ids)))
+
+    def _position_map(self):
+        """Zwraca słownik identyfikator serwera -> indeks modelu"""
+        if self._positions is None:
+            self._positions = {contact_id: index for index, contact_id in enumerate(self._ids)
+                               if contact_id is not None}
+        return self._positions
+
+    def _upload(self, indexes, contacts):
+        """Dodaje na serwerze kontakty o podanych indeksach i zapamiętuje ich identyfikatory"""
+        added = self.client.add([contacts[index] for index in indexes])
+        for index, (contact_id, version) in zip(indexes, added):
+            self._ids[index] = contact_id
+            self._versions[contact_id] = version
+            if self._positions is not None:
+                self._positions[contact_id] = index
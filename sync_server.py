@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+"""
+Lokalny serwer książki kontaktów dla wielu użytkowników (HTTP, asyncio).
+
+Dwie osoby otwierające ten sam plik contacts.csv nadpisują nawzajem swoje
+zmiany - każda zapisuje to, co ma w pamięci. Serwer jest jedynym
+właścicielem pliku (ContactStore z zapisem w wątku w tle), a okna aplikacji
+i wiersz poleceń łączą się z nim jako klienci (sync_client.RemoteStorage).
+
+Wersje i blokowanie optymistyczne:
+- serwer ma licznik wersji zwiększany przy każdej zmianie; wersja kontaktu
+  to wartość licznika przy jego ostatniej zmianie (0 - niezmieniony od
+  startu serwera)
+- edycja i usunięcie podają wersję, którą zna klient; gdy kontakt zmienił
+  się w międzyczasie, serwer odrzuca zmianę (409) i zwraca bieżący stan
+  kontaktu - nic nie jest nadpisywane po cichu
+
+Synchronizacja przyrostowa:
+- GET /contacts?since=N zwraca tylko kontakty zmienione i usunięte po
+  wersji N; kontakty są w OrderedDict uporządkowanym według wersji, więc
+  koszt zależy od liczby zmian, a nie od rozmiaru książki
+- pełna książka jest wysyłana przy pierwszym połączeniu, po restarcie
+  serwera (inna 'epoch' - identyfikatory kontaktów są nadawane od nowa)
+  i gdy usunięcia po wersji N wypadły już z ograniczonej listy (TOMBSTONE_LIMIT);
+  zakodowana pełna książka jest zapamiętywana dla bieżącej wersji
+- wait=S (long polling) - gdy nie ma zmian, odpowiedź czeka do S sekund
+  na pierwszą zmianę, więc klienci dostają zmiany od razu bez odpytywania
+
+Wszystkie żądania obsługuje jedna pętla asyncio (bez wątku na klienta):
+operacje na modelu w pamięci są krótkie, a zapis na dysk wykonuje wątek
+BackgroundStorage, więc czekający klienci (long polling) kosztują tylko
+otwarte połączenie. Serwer słucha domyślnie tylko na 127.0.0.1.
+
+Protokół (JSON, kontakt to [id, wersja, imię, nazwisko, nick, telefon, email]):
+- GET /contacts?since=N&epoch=E&wait=S -> {"epoch", "version", "full",
+  "contacts": [...], "deleted": [[id, wersja], ...]}
+- POST /contacts {"contacts": [[pola], ...]} -> 201 {"version", "contacts": [[id, wersja], ...]}
+- PUT /contacts/<id> {"contact": [pola], "version": N} -> {"version"}
+- DELETE /contacts/<id>?version=N -> {"version"}
+Błędy: 400 (niepoprawne dane, "errors": [[pole, opis], ...]), 404 (brak
+kontaktu), 409 (konflikt wersji, "contact": bieżący kontakt).
+
+Wykorzystane biblioteki:
+- asyncio: serwer TCP i oczekiwanie na zmiany (long polling)
+- json: treść żądań i odpowiedzi
+- collections: wersje kontaktów i usunięcia w kolejności zmian (OrderedDict)
+- urllib.parse: ścieżka i parametry żądania
+- uuid: identyfikator uruchomienia serwera (epoch)
+- background_storage, contact_store, history, validation: moduły projektu
+"""
+
+import asyncio
+import json
+import uuid
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from background_storage import BackgroundStorage
+from contact_store import ContactStore, StorageError, create_storage
+from history import History
+from validation import FIELDS, ValidationError, normalize_contact, validate_contact
+
+# Domyślny adres serwera (tylko lokalne połączenia)
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Maksymalny czas oczekiwania na zmiany w jednym żądaniu (s)
+MAX_WAIT = 60
+# Liczba pamiętanych usunięć - starsze wymagają pełnej synchronizacji klienta
+TOMBSTONE_LIMIT = 100000
+# Maksymalny rozmiar treści żądania (import dużej porcji kontaktów)
+MAX_BODY = 64 * 1024 * 1024
+# Opisy kodów odpowiedzi HTTP
+REASONS = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class RequestError(Exception):
+    """
+    Żądanie nie może zostać wykonane - odpowiedź z kodem błędu.
+    """
+    def __init__(self, status, message, **details):
+        """
+        Args:
+            status: Kod odpowiedzi HTTP
+            message: Opis błędu
+            **details: Dodatkowe pola odpowiedzi (np. contact przy konflikcie)
+        """
+        super().__init__(message)
+        self.status = status
+        self.payload = {'error': message, **details}
+
+
+class ContactService:
+    """
+    Książka kontaktów z wersjami kontaktów i listą zmian do synchronizacji
+    (bez warstwy HTTP).
+    """
+    def __init__(self, store, tombstone_limit=TOMBSTONE_LIMIT):
+        """
+        Args:
+            store: Wczytany ContactStore (identyfikatory kontaktów są
+                   identyfikatorami udostępnianymi klientom)
+            tombstone_limit: Liczba pamiętanych usunięć
+        """
+        self.store = store
+        self.tombstone_limit = tombstone_limit
+        # Identyfikator uruchomienia - identyfikatory kontaktów są ważne
+        # tylko w obrębie jednego uruchomienia serwera
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        # Identyfikator -> wersja kontaktów zmienionych od startu, od najstarszej zmiany
+        self._versions = OrderedDict()
+        # Identyfikator -> wersja usuniętych kontaktów, od najstarszego usunięcia
+        self._tombstones = OrderedDict()
+        # Najwyższa wersja usunięcia, które wypadło z listy
+        self.horizon = 0
+        # Zakodowana pełna książka dla wersji (wersja, bajty)
+        self._snapshot = None
+        # Zdarzenie budzące klientów czekających na zmiany (wymieniane po każdej zmianie)
+        self._changed = asyncio.Event()
+
+    def contact_version(self, contact_id):
+        """Zwraca wersję kontaktu (0 - niezmieniony od startu serwera)"""
+        return self._versions.get(contact_id, 0)
+
+    def changes(self, since=0, epoch=None):
+        """
+        Zwraca zmiany po wersji since albo pełną książkę.
+        Args:
+            since: Wersja znana klientowi
+            epoch: Identyfikator uruchomienia serwera znany klientowi
+        Returns:
+            dict lub bytes: Odpowiedź (pełna książka - już zakodowana)
+        """
+        if epoch != self.epoch or since < self.horizon or since > self.version:
+            return self.snapshot()
+        contacts = []
+        for contact_id, version in reversed(self._versions.items()):
+            if version <= since:
+                break
+            contacts.append([contact_id, version, *self.store.get(contact_id)])
+        deleted = []
+        for contact_id, version in reversed(self._tombstones.items()):
+            if version <= since:
+                break
+            deleted.append([contact_id, version])
+        contacts.reverse()
+        deleted.reverse()
+        return {'epoch': self.epoch, 'version': self.version, 'full': False,
+                'contacts': contacts, 'deleted': deleted}
+
+    def snapshot(self):
+        """
+        Zwraca pełną książkę zakodowaną w JSON (zapamiętaną do następnej zmiany,
+        więc wielu klientów łączących się naraz nie koduje jej wielokrotnie).
+        Returns:
+            bytes: Odpowiedź z "full": true
+        """
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            contacts = [[contact_id, self._versions.get(contact_id, 0), *contact]
+                        for contact_id, contact in self.store]
+            payload = {'epoch': self.epoch, 'version': self.version, 'full': True,
+                       'contacts': contacts, 'deleted': []}
+            self._snapshot = (self.version, _encode(payload))
+        return self._snapshot[1]
+
+    async def wait_for_changes(self, since, timeout):
+        """
+        Czeka, aż wersja książki przekroczy since (lub minie timeout).
+        Args:
+            since: Wersja znana klientowi
+            timeout: Maksymalny czas oczekiwania (s)
+        """
+        if self.version != since:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def add(self, contacts):
+        """
+        Dodaje kontakty (wszystkie są sprawdzane przed dodaniem pierwszego).
+        Args:
+            contacts: Lista kontaktów (list pól)
+        Returns:
+            dict: {"version", "contacts": [[id, wersja], ...]}
+        Raises:
+            RequestError: Gdy któryś kontakt jest niepoprawny (400)
+        """
+        checked = []
+        for number, contact in enumerate(contacts):
+            contact = _fields(contact)
+            errors = validate_contact(contact)
+            if errors:
+                raise RequestError(400, f"Niepoprawny kontakt nr {number + 1}: "
+                                        f"{ValidationError(errors)}",
+                                   index=number, errors=_errors(errors))
+            checked.append(contact)
+        added = []
+        for contact in checked:
+            contact_id = self._persist(self.store.add, contact)
+            added.append([contact_id, self._bump(contact_id)])
+        self._notify()
+        return {'version': self.version, 'contacts': added}
+
+    def update(self, contact_id, contact, version):
+        """
+        Zmienia kontakt, jeśli klient zna jego bieżącą wersję.
+        Args:
+            contact_id: Identyfikator kontaktu
+            contact: Nowe pola kontaktu
+            version: Wersja kontaktu znana klientowi
+        Returns:
+            dict: {"version"} - nowa wersja kontaktu
+        Raises:
+            RequestError: Brak kontaktu (404), konflikt wersji (409)
+                          lub niepoprawne dane (400)
+        """
+        self._check_version(contact_id, version)
+        contact = _fields(contact)
+        try:
+            self._persist(self.store.update, contact_id, contact)
+        except ValidationError as e:
+            raise RequestError(400, str(e), errors=_errors(e.errors)) from e
+        version = self._bump(contact_id)
+        self._notify()
+        return {'version': version}
+
+    def delete(self, contact_id, version):
+        """
+        Usuwa kontakt, jeśli klient zna jego bieżącą wersję.
+        Args:
+            contact_id: Identyfikator kontaktu
+            version: Wersja kontaktu znana klientowi
+        Returns:
+            dict: {"version"} - wersja usunięcia
+        Raises:
+            RequestError: Brak kontaktu (404) lub konflikt wersji (409)
+        """
+        self._check_version(contact_id, version)
+        self._persist(self.store.delete, contact_id)
+        self.version += 1
+        self._versions.pop(contact_id, None)
+        self._tombstones[contact_id] = self.version
+        while len(self._tombstones) > self.tombstone_limit:
+            _, self.horizon = self._tombstones.popitem(last=False)
+        self._notify()
+        return {'version': self.version}
+
+    def close(self):
+        """Budzi czekających klientów przed zamknięciem serwera"""
+        self._changed.set()
+
+    def _check_version(self, contact_id, version):
+        """Sprawdza, czy kontakt istnieje i czy klient zna jego bieżącą wersję"""
+        try:
+            contact = self.store.get(contact_id)
+        except KeyError:
+            raise RequestError(404, "Kontakt został usunięty", contact=None) from None
+        current = self.contact_version(contact_id)
+        if version != current:
+            raise RequestError(409, "Kontakt został zmieniony przez innego użytkownika",
+                               contact=[contact_id, current, *contact])
+
+    def _persist(self, operation, *args):
+        """Wykonuje operację modelu; błąd zapisu nie cofa zmiany w pamięci"""
+        try:
+            return operation(*args)
+        except StorageError as e:
+            # Zmiana jest w modelu - klienci muszą ją zobaczyć; BackgroundStorage
+            # ponowi zapis całej książki przy następnej zmianie
+            return e.contact_id
+
+    def _bump(self, contact_id):
+        """Nadaje kontaktowi nową wersję i przenosi go na koniec listy zmian"""
+        self.version += 1
+        self._versions[contact_id] = self.version
+        self._versions.move_to_end(contact_id)
+        return self.version
+
+    def _notify(self):
+        """Budzi klientów czekających na zmiany"""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SyncServer:
+    """
+    Serwer HTTP/1.1 (połączenia keep-alive) udostępniający ContactService.
+    """
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Args:
+            service: ContactService
+            host: Adres nasłuchiwania
+            port: Port (0 - wybrany przez system, dostępny potem w self.port)
+        """
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server = None
+        # Zadania obsługujące otwarte połączenia
+        self._connections = set()
+
+    async def start(self):
+        """Zaczyna przyjmować połączenia"""
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Obsługuje żądania do anulowania zadania"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Zamyka serwer i otwarte połączenia (czeka na zakończenie ich zadań)"""
+        self.service.close()
+        if self._server is not None:
+            self._server.close()
+        tasks = list(self._connections)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _serve_connection(self, reader, writer):
+        """Obsługuje kolejne żądania jednego połączenia"""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                try:
+                    status, payload = 200, await self._dispatch(method, target, body)
+                    if method == 'POST':
+                        status = 201
+                except RequestError as e:
+                    status, payload = e.status, e.payload
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except RequestError as e:
+            # Niepoprawne żądanie - odpowiedź i zamknięcie połączenia
+            writer.write(_response(e.status, e.payload, False))
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Klient rozłączył się albo serwer jest zamykany
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+        Odczytuje żądanie HTTP.
+        Returns:
+            tuple: (metoda, ścieżka, treść, keep-alive) lub None po zamknięciu połączenia
+        Raises:
+            RequestError: Niepoprawne żądanie (400) lub zbyt duża treść (413)
+        """
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            method, target, version = line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError(400, "Niepoprawne żądanie HTTP") from None
+        if length > MAX_BODY:
+            raise RequestError(413, "Zbyt duża treść żądania")
+        body = await reader.readexactly(length) if length else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        return method, target, body, keep_alive
+
+    async def _dispatch(self, method, target, body):
+        """Wykonuje żądanie i zwraca treść odpowiedzi"""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')
+        if parts[0] != 'contacts' or len(parts) > 2:
+            raise RequestError(404, f"Nieznany adres: {url.path}")
+        service = self.service
+        if len(parts) == 1:
+            if method == 'GET':
+                since = _number(query, 'since', 0)
+                epoch = query.get('epoch', [None])[0]
+                wait = min(_number(query, 'wait', 0), MAX_WAIT)
+                payload = service.changes(since, epoch)
+                if wait > 0 and isinstance(payload, dict) and not payload['contacts'] \
+                        and not payload['deleted']:
+                    # Brak zmian - odpowiedź czeka na pierwszą zmianę
+                    await service.wait_for_changes(since, wait)
+                    payload = service.changes(since, epoch)
+                return payload
+            if method == 'POST':
+                contacts = _json(body).get('contacts')
+                if not isinstance(contacts, list):
+                    raise RequestError(400, "Brak listy kontaktów w treści żądania")
+                return service.add(contacts)
+            raise RequestError(405, f"Metoda {method} nie jest obsługiwana")
+        try:
+            contact_id = int(parts[1])
+        except ValueError:
+            raise RequestError(404, f"Nieznany kontakt: {parts[1]}") from None
+        if method == 'PUT':
+            data = _json(body)
+            return service.update(contact_id, data.get('contact'), _version(data.get('version')))
+        if method == 'DELETE':
+            return service.delete(contact_id, _number(query, 'version', None))
+        raise RequestError(405, f"Metoda {method} nie jest obsługiwana")
+
+
+def open_store(path):
+    """
+    Wczytuje książkę udostępnianą przez serwer (zapis w wątku w tle,
+    historia zmian tylko w pamięci - cofanie jest po stronie klientów).
+    Args:
+        path: Ścieżka do pliku kontaktów (CSV lub baza SQLite)
+    Returns:
+        ContactStore: Wczytany model
+    """
+    store = ContactStore(path, storage=BackgroundStorage(create_storage(path)), history=History())
+    store.load()
+    return store
+
+
+async def serve(path, host=DEFAULT_HOST, port=DEFAULT_PORT, on_ready=None):
+    """
+    Udostępnia książkę kontaktów do anulowania zadania (np. Ctrl+C).
+    Args:
+        path: Ścieżka do pliku kontaktów
+        host: Adres nasłuchiwania
+        port: Port
+        on_ready: Opcjonalna funkcja wywoływana z SyncServer po rozpoczęciu nasłuchiwania
+    """
+    store = open_store(path)
+    try:
+        server = SyncServer(ContactService(store), host, port)
+        await server.start()
+        if on_ready is not None:
+            on_ready(server)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+    finally:
+        # Dopisanie zmian czekających w kolejce zapisu
+        store.close()
+
+
+def _fields(contact):
+    """Sprawdza liczbę pól kontaktu z żądania i zwraca je jako listę napisów"""
+    if not isinstance(contact, list) or len(contact) != len(FIELDS):
+        raise RequestError(400, f"Kontakt musi być listą {len(FIELDS)} pól")
+    return normalize_contact(contact)
+
+
+def _errors(errors):
+    """Zamienia błędy walidacji (FieldError) na pary [pole, opis]"""
+    return [[error.field, error.message] for error in errors]
+
+
+def _json(body):
+    """Dekoduje treść żądania (obiekt JSON)"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise RequestError(400, "Treść żądania nie jest poprawnym JSON") from None
+    if not isinstance(data, dict):
+        raise RequestError(400, "Treść żądania musi być obiektem JSON")
+    return data
+
+
+def _version(value):
+    """Sprawdza wersję kontaktu podaną przez klienta"""
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise RequestError(400, "Brak wersji kontaktu")
+    return value
+
+
+def _number(query, name, default):
+    """Zwraca parametr liczbowy zapytania"""
+    values = query.get(name)
+    if not values:
+        if default is None:
+            raise RequestError(400, f"Brak parametru '{name}'")
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise RequestError(400, f"Niepoprawny parametr '{name}'") from None
+
+
+def _encode(payload):
+    """Koduje treść odpowiedzi w JSON (UTF-8)"""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _response(status, payload, keep_alive):
+    """Składa odpowiedź HTTP z treścią JSON (dict lub już zakodowane bajty)"""
+    body = payload if isinstance(payload, bytes) else _encode(payload)
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Testy cofania i ponawiania zmian po ponownym uruchomieniu (plik .history).
+
+Uruchomienie:
+    python -m unittest test_history
+
+Wykorzystane biblioteki:
+- unittest: framework testów
+- tempfile: katalog tymczasowy na pliki książki
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from contact_store import ContactStore
+from storage import write_csv_atomic
+
+CONTACTS = [
+    ['Jan', 'Kowalski', '', '501234567', 'jan@x.pl'],
+    ['Anna', 'Nowak', '', '502222333', 'anna@n.pl'],
+    ['Piotr', 'Zielinski', '', '503333444', 'p@z.pl'],
+]
+
+
+class HistoryRestartTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'contacts.csv')
+        write_csv_atomic(self.path, CONTACTS)
+        self.store = None
+
+    def tearDown(self):
+        if self.store is not None:
+            self.store.close()
+        shutil.rmtree(self.directory)
+
+    def _restart(self):
+        """Zamyka książkę i wczytuje ją od nowa, jak po ponownym uruchomieniu"""
+        if self.store is not None:
+            self.store.close()
+        self.store = ContactStore(self.path)
+        self.store.load()
+        return self.store
+
+    def _contacts(self):
+        # Cofnięcie usunięcia dodaje kontakt na koniec - kolejność bez znaczenia
+        return sorted(list(contact) for contact in self.store.contacts)
+
+    def test_undo_and_redo_survive_restart(self):
+        store = self._restart()
+        store.add(['Ola', 'Lis', '', '504444555', 'ola@l.pl'])
+        added = self._contacts()
+        anna = store.contact_ids[1]
+        store.update(anna, ['Anna', 'Nowakowska', '', '502222333', 'anna@n.pl'])
+        updated = self._contacts()
+        store.delete(store.contact_ids[0])
+        deleted = self._contacts()
+
+        store = self._restart()
+        self.assertEqual(self._contacts(), deleted)
+        self.assertTrue(store.history.can_undo)
+        store.undo()
+        self.assertEqual(self._contacts(), updated)
+
+        # Cofnięcie jest zapamiętane - po restarcie można je ponowić
+        store = self._restart()
+        self.assertEqual(self._contacts(), updated)
+        self.assertTrue(store.history.can_redo)
+        store.undo()
+        store.undo()
+        self.assertEqual(self._contacts(), sorted(CONTACTS))
+        self.assertFalse(store.history.can_undo)
+
+        store = self._restart()
+        self.assertEqual(self._contacts(), sorted(CONTACTS))
+        for expected in (added, updated, deleted):
+            store.redo()
+            self.assertEqual(self._contacts(), expected)
+        self.assertFalse(store.history.can_redo)
+
+    def test_new_change_after_restart_drops_redo(self):
+        store = self._restart()
+        store.add(['Ola', 'Lis', '', '504444555', 'ola@l.pl'])
+        store.undo()
+
+        store = self._restart()
+        self.assertTrue(store.history.can_redo)
+        piotr = store.contact_ids[2]
+        store.update(piotr, ['Piotr', 'Zielinski', 'pz', '503333444', 'p@z.pl'])
+        self.assertFalse(store.history.can_redo)
+
+        store = self._restart()
+        self.assertFalse(store.history.can_redo)
+        store.undo()
+        self.assertEqual(self._contacts(), sorted(CONTACTS))
+
+    def test_history_dropped_when_book_changed_outside(self):
+        store = self._restart()
+        store.add(['Ola', 'Lis', '', '504444555', 'ola@l.pl'])
+        store.save()
+        store.close()
+        self.store = None
+
+        # Plik książki zmieniony innym programem - historia nie pasuje
+        write_csv_atomic(self.path, CONTACTS)
+        store = self._restart()
+        self.assertFalse(store.history.can_undo)
+        self.assertEqual(store.undo(), [])
+        self.assertEqual(self._contacts(), sorted(CONTACTS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Testy odtwarzania dziennika JournalStorage po awarii zapisu.
+
+Uruchomienie:
+    python -m unittest test_storage
+
+Wykorzystane biblioteki:
+- unittest: framework testów
+- tempfile: katalog tymczasowy na pliki książki
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from storage import JournalStorage, file_fingerprint, write_csv_atomic
+
+CONTACTS = [
+    ['Jan', 'Kowalski', '', '501234567', 'jan@x.pl'],
+    ['Anna', 'Nowak', '', '502222333', 'anna@n.pl'],
+]
+ADDED = ['Ola', 'Lis', '', '504444555', 'ola@l.pl']
+UPDATED = ['Anna', 'Nowakowska', '', '502222333', 'anna@n.pl']
+
+
+class JournalRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'contacts.csv')
+        write_csv_atomic(self.path, CONTACTS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _journal(self, operations):
+        """Zapisuje operacje do dziennika i zamyka go bez kompaktowania"""
+        storage = JournalStorage(self.path, durable=False)
+        contacts = storage.load()
+        storage.append(operations)
+        storage.close()
+        return contacts
+
+    def test_replays_journal_after_restart(self):
+        self._journal([('add', 2, ADDED), ('update', 1, UPDATED)])
+
+        storage = JournalStorage(self.path, durable=False)
+        contacts = storage.load()
+        storage.close()
+        self.assertEqual(contacts, [CONTACTS[0], UPDATED, ADDED])
+        self.assertEqual(storage.entries, 2)
+
+    def test_torn_tail_is_dropped_and_truncated(self):
+        self._journal([('add', 2, ADDED)])
+        valid_size = os.path.getsize(self.path + '.journal')
+        with open(self.path + '.journal', 'ab') as file:
+            # Wpis urwany w połowie - brak znaku końca linii
+            file.write(b'0badf00d ["update",1,["Anna"')
+
+        storage = JournalStorage(self.path, durable=False)
+        contacts = storage.load()
+        self.assertEqual(contacts, CONTACTS + [ADDED])
+        self.assertEqual(os.path.getsize(self.path + '.journal'), valid_size)
+
+        # Nowe operacje trafiają za ostatni poprawny wpis
+        contacts.append(UPDATED)
+        storage.record(contacts, ('add', 3, UPDATED))
+        storage.close()
+        storage = JournalStorage(self.path, durable=False)
+        self.assertEqual(storage.load(), CONTACTS + [ADDED, UPDATED])
+        storage.close()
+
+    def test_bad_checksum_stops_replay(self):
+        self._journal([('add', 2, ADDED), ('update', 1, UPDATED)])
+        journal_path = self.path + '.journal'
+        with open(journal_path, 'rb') as file:
+            lines = file.readlines()
+        with open(journal_path, 'wb') as file:
+            file.write(lines[0] + lines[1].replace(b'Nowakowska', b'Nowakowsky'))
+
+        storage = JournalStorage(self.path, durable=False)
+        contacts = storage.load()
+        storage.close()
+        self.assertEqual(contacts, CONTACTS + [ADDED])
+        self.assertEqual(storage.entries, 1)
+
+    def test_segment_replayed_only_for_matching_csv(self):
+        self._journal([('add', 2, ADDED)])
+        # Przerwane kompaktowanie: dziennik przemianowany na segment,
+        # migawka CSV jeszcze niezapisana
+        fingerprint = file_fingerprint(self.path)
+        segment_path = f"{self.path}.journal.0.{fingerprint}"
+        os.replace(self.path + '.journal', segment_path)
+
+        storage = JournalStorage(self.path, durable=False)
+        self.assertEqual(storage.load(), CONTACTS + [ADDED])
+        storage.close()
+        # Dokończone kompaktowanie scala segment z CSV i go usuwa
+        self.assertFalse(os.path.exists(segment_path))
+
+        # Segment ze starym odciskiem jest już zawarty w CSV - nie jest
+        # odtwarzany drugi raz, tylko usuwany
+        stale_path = f"{self.path}.journal.1.{fingerprint}"
+        storage = JournalStorage(self.path, durable=False)
+        storage.load()
+        storage.append([('add', 3, UPDATED)])
+        storage.close()
+        os.replace(self.path + '.journal', stale_path)
+        storage = JournalStorage(self.path, durable=False)
+        self.assertEqual(storage.load(), CONTACTS + [ADDED])
+        storage.close()
+        self.assertFalse(os.path.exists(stale_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Testy konfliktu wersji (409) przy synchronizacji z serwerem książki.
+
+Uruchomienie:
+    python -m unittest test_sync
+
+Wykorzystane biblioteki:
+- unittest: framework testów
+- asyncio, threading: serwer (sync_server.serve) w wątku w tle
+- tempfile: katalog tymczasowy na plik książki
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from contact_store import ContactStore, StorageError
+from storage import write_csv_atomic
+from sync_client import SyncClient, SyncConflict
+from sync_server import serve
+
+UPDATED = ['Anna', 'Nowakowska', '', '502222333', 'anna@n.pl']
+EDITED = ['Anna', 'Lis', '', '502222333', 'anna@n.pl']
+CONTACTS = [
+    ['Jan', 'Kowalski', '', '501234567', 'jan@x.pl'],
+    ['Anna', 'Nowak', '', '502222333', 'anna@n.pl'],
+]
+
+
+class VersionConflictTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, 'contacts.csv')
+        write_csv_atomic(path, CONTACTS)
+
+        ready = threading.Event()
+        self._loop = None
+        self._task = None
+
+        def on_ready(server):
+            self.url = f"http://127.0.0.1:{server.port}"
+            ready.set()
+
+        async def main():
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            try:
+                await serve(path, host='127.0.0.1', port=0, on_ready=on_ready)
+            except asyncio.CancelledError:
+                pass
+
+        self._thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+        self._thread.start()
+        self.assertTrue(ready.wait(10), "serwer nie wystartował")
+
+    def tearDown(self):
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(10)
+        shutil.rmtree(self.directory)
+
+    def test_stale_version_is_rejected(self):
+        client = SyncClient(self.url)
+        try:
+            version = client.update(1, UPDATED, 0)
+            self.assertGreater(version, 0)
+            with self.assertRaises(SyncConflict) as raised:
+                client.update(1, EDITED, 0)
+            self.assertEqual(raised.exception.status, 409)
+            # Odpowiedź zawiera bieżący kontakt: [id, wersja, pola...]
+            self.assertEqual(raised.exception.contact, [1, version, *UPDATED])
+            # Zmiana ze znaną wersją przechodzi
+            client.update(1, EDITED, version)
+        finally:
+            client.close()
+
+    def test_concurrent_edit_raises_storage_error(self):
+        first = ContactStore(self.url)
+        second = ContactStore(self.url)
+        first.load()
+        second.load()
+        try:
+            first.update(first.contact_ids[1], UPDATED)
+            with self.assertRaises(StorageError) as raised:
+                second.update(second.contact_ids[1], EDITED)
+            conflict = raised.exception.__cause__
+            self.assertIsInstance(conflict, SyncConflict)
+            self.assertEqual(conflict.status, 409)
+
+            # Serwer zachował zmianę pierwszego klienta
+            client = SyncClient(self.url)
+            try:
+                contacts = client.changes()['contacts']
+            finally:
+                client.close()
+            self.assertIn([1, conflict.contact[1], *UPDATED], contacts)
+        finally:
+            first.close()
+            second.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
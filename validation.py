@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Walidacja danych kontaktu niezależna od interfejsu graficznego.
+
+Funkcje sprawdzające zwracają opis błędu (FieldError) albo None, zamiast
+wyświetlać okna dialogowe - o sposobie prezentacji błędów decyduje
+wywołujący (okno Tkinter, wiersz poleceń, import wsadowy).
+
+Wzorce i tablice znaków są przygotowywane raz przy imporcie modułu.
+Funkcje wsadowe (check_column, validate_rows, phone_keys, email_keys)
+sprawdzają całe kolumny naraz: pętla po wartościach kolumny z metodami
+związanymi z góry, a błędy są współdzielonymi, niezmiennymi obiektami
+FieldError - dla każdego wiersza zwracana jest lista błędów z kodami.
+Porównanie z wcześniejszą walidacją: bench_validation.py.
+
+Wykorzystane biblioteki:
+- re: do walidacji adresów email za pomocą wyrażeń regularnych
+- collections: lekka struktura opisu błędu (namedtuple)
+- itertools, operator: wybór błędnych wierszy kolumny bez pętli w Pythonie
+"""
+
+import re
+from collections import namedtuple
+from itertools import compress, repeat
+from operator import is_not
+
+# Kolejność pól kontaktu w wierszu CSV i w tabeli
+FIELDS = ('first_name', 'last_name', 'nickname', 'phone', 'email')
+# Kod kraju przyjmowany dla lokalnych (9-cyfrowych) numerów telefonu
+DEFAULT_COUNTRY_CODE = '48'
+
+# Opis błędu walidacji:
+#   field - nazwa pola (jedna z FIELDS)
+#   code - stały kod błędu do przetwarzania programowego
+#   message - komunikat dla użytkownika
+FieldError = namedtuple('FieldError', ['field', 'code', 'message'])
+
+# Wzorzec adresu email (skompilowany raz, zamiast w każdym wywołaniu re.match)
+_EMAIL_MATCH = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$').match
+# Najczęstsze zapisy poprawnego numeru ('501234567', '501 234 567', '+48 501-234-567')
+# - wiersz pasujący do wzorca nie wymaga pełnego sprawdzenia check_phone
+_COMMON_PHONE_MATCH = re.compile(r'(?:\+\d{1,3}[ -]?)?\d{3}[ -]?\d{3}[ -]?\d{3}').fullmatch
+
+# Stałe błędy pól - współdzielone przez wszystkie wiersze walidacji wsadowej
+_NAME_LABELS = {'first_name': "Imię", 'last_name': "Nazwisko"}
+_PHONE_EMPTY = FieldError('phone', 'empty', "Numer telefonu nie może być pusty")
+_PHONE_TOO_SHORT = FieldError('phone', 'too_short',
+                              "Numer telefonu musi zawierać co najmniej 9 cyfr po kodzie kraju")
+_PHONE_BAD_LENGTH = FieldError('phone', 'bad_length',
+                               "Lokalny numer telefonu musi zawierać dokładnie 9 cyfr")
+_PHONE_NOT_DIGITS = FieldError('phone', 'not_digits',
+                               "Numer telefonu może zawierać tylko cyfry "
+                               "(oraz + na początku dla kodu kraju)")
+_EMAIL_EMPTY = FieldError('email', 'empty', "Email nie może być pusty")
+_EMAIL_BAD_FORMAT = FieldError('email', 'bad_format', "Niepoprawny format email")
+
+
+class ValidationError(Exception):
+    """Własna klasa wyjątków do obsługi błędów walidacji danych"""
+    def __init__(self, errors):
+        """
+        Args:
+            errors: Lista błędów (FieldError)
+        """
+        self.errors = list(errors)
+        super().__init__("; ".join(error.message for error in self.errors))
+
+
+def check_name(name, field_name, field='first_name'):
+    """
+    Walidacja imienia lub nazwiska.
+    Args:
+        name: Imię lub nazwisko do sprawdzenia
+        field_name: Nazwa pola (dla komunikatu błędu)
+        field: Nazwa pola kontaktu (dla opisu błędu)
+    Returns:
+        FieldError lub None, jeśli dane są poprawne
+    """
+    if not name:
+        return FieldError(field, 'empty', f"{field_name} nie może być pusty")
+    if not name.replace(" ", "").isalpha():
+        return FieldError(field, 'not_alpha', f"{field_name} może zawierać tylko litery")
+    return None
+
+
+def _phone_digits(phone):
+    """
+    Dzieli numer telefonu na znacznik formatu międzynarodowego i cyfry.
+    Args:
+        phone: Numer telefonu
+    Returns:
+        tuple: (czy numer zaczyna się od '+', cyfry numeru bez separatorów)
+    """
+    # Usunięcie spacji i myślników (dwa replace są szybsze od str.translate)
+    phone = phone.replace(" ", "").replace("-", "")
+    international = phone[:1] == '+'
+    if international:
+        phone = phone[1:]
+    # Typowy numer składa się już z samych cyfr - isdigit() sprawdza go w C,
+    # filtr znak po znaku jest potrzebny tylko dla pozostałych
+    if not phone.isdigit():
+        phone = ''.join(filter(str.isdigit, phone))
+    return international, phone
+
+
+def check_phone(phone):
+    """
+    Walidacja numeru telefonu.
+    Akceptuje dwa formaty:
+    1. Lokalny: dokładnie 9 cyfr
+    2. Międzynarodowy: znak '+' i co najmniej 9 cyfr po kodzie kraju
+
+    Args:
+        phone: Numer telefonu do sprawdzenia
+    Returns:
+        FieldError lub None, jeśli numer jest poprawny
+    """
+    if not phone:
+        return _PHONE_EMPTY
+    if _COMMON_PHONE_MATCH(phone):
+        return None
+    international, phone_digits = _phone_digits(phone)
+    # Numer międzynarodowy: co najmniej 9 cyfr po '+', lokalny: dokładnie 9 cyfr
+    if international:
+        if len(phone_digits) < 9:
+            return _PHONE_TOO_SHORT
+    elif len(phone_digits) != 9:
+        return _PHONE_BAD_LENGTH
+    if not phone_digits.isdigit():
+        return _PHONE_NOT_DIGITS
+    return None
+
+
+def check_email(email):
+    """
+    Walidacja adresu email.
+    Args:
+        email: Adres email do sprawdzenia
+    Returns:
+        FieldError lub None, jeśli adres jest poprawny
+    """
+    if not email:
+        return _EMAIL_EMPTY
+    if not _EMAIL_MATCH(email):
+        return _EMAIL_BAD_FORMAT
+    return None
+
+
+def check_column(field, values):
+    """
+    Walidacja całej kolumny wartości jednego pola.
+    Args:
+        field: Nazwa pola ('first_name', 'last_name', 'phone' lub 'email';
+               pozostałe pola nie są sprawdzane)
+        values: Wartości pola w kolejnych wierszach
+    Returns:
+        list: Dla każdego wiersza FieldError lub None
+    """
+    if field in _NAME_LABELS:
+        label = _NAME_LABELS[field]
+        empty = FieldError(field, 'empty', f"{label} nie może być pusty")
+        not_alpha = FieldError(field, 'not_alpha', f"{label} może zawierać tylko litery")
+        return [empty if not value
+                else None if value.isalpha() or value.replace(" ", "").isalpha()
+                else not_alpha
+                for value in values]
+    if field == 'phone':
+        match = _COMMON_PHONE_MATCH
+        return [None if match(value) else check_phone(value) for value in values]
+    if field == 'email':
+        match = _EMAIL_MATCH
+        return [_EMAIL_EMPTY if not value
+                else None if match(value)
+                else _EMAIL_BAD_FORMAT
+                for value in values]
+    return [None] * len(values)
+
+
+def validate_contact(contact):
+    """
+    Sprawdza wszystkie pola kontaktu.
+    Args:
+        contact: Lista pól [imię, nazwisko, nick, telefon, email]
+    Returns:
+        list: Błędy walidacji (FieldError); pusta lista oznacza poprawny kontakt
+    """
+    if len(contact) != len(FIELDS):
+        return [FieldError('contact', 'field_count',
+                           f"Kontakt musi mieć {len(FIELDS)} pól (ma {len(contact)})")]
+    first_name, last_name, nickname, phone, email = contact
+    errors = [
+        check_name(first_name, "Imię", 'first_name'),
+        check_name(last_name, "Nazwisko", 'last_name'),
+        check_phone(phone),
+        check_email(email),
+    ]
+    return [error for error in errors if error is not None]
+
+
+def validate_rows(contacts):
+    """
+    Wsadowa walidacja wielu kontaktów - kolumna po kolumnie.
+    Wynik jest taki sam jak validate_contact dla każdego wiersza osobno.
+    Args:
+        contacts: Lista kontaktów (list pól)
+    Returns:
+        list: Dla każdego wiersza krotka błędów (FieldError); poprawne wiersze
+              mają wspólną pustą krotkę (bez tworzenia obiektu na wiersz)
+    """
+    count = len(FIELDS)
+    complete = [contact for contact in contacts if len(contact) == count]
+    errors = [()] * len(complete)
+    for field, index in (('first_name', 0), ('last_name', 1), ('phone', 3), ('email', 4)):
+        column = check_column(field, [contact[index] for contact in complete])
+        # Zwykle błędnych jest niewiele wierszy - wybierane są bez pętli w Pythonie
+        for row in compress(range(len(column)), map(is_not, column, repeat(None))):
+            errors[row] += (column[row],)
+    if len(complete) == len(contacts):
+        return errors
+    # Wiersze z niewłaściwą liczbą pól - błąd field_count w ich miejscu
+    rows = iter(errors)
+    return [next(rows) if len(contact) == count else
+            (FieldError('contact', 'field_count',
+                        f"Kontakt musi mieć {count} pól (ma {len(contact)})"),)
+            for contact in contacts]
+
+
+def normalize_contact(contact):
+    """
+    Usuwa zbędne spacje z początku i końca pól kontaktu.
+    Args:
+        contact: Sekwencja pól kontaktu
+    Returns:
+        list: Nowa lista pól
+    """
+    return [str(value).strip() for value in contact]
+
+
+def phone_key(phone):
+    """
+    Zwraca numer telefonu w kanonicznym formacie E.164 do wykrywania duplikatów
+    i wyszukiwania. Numer lokalny otrzymuje domyślny kod kraju, więc
+    '501 234 567' i '+48 501-234-567' dają ten sam klucz '+48501234567'.
+    Args:
+        phone: Numer telefonu
+    Returns:
+        str: '+', kod kraju i cyfry numeru (pusty dla numeru bez cyfr)
+    """
+    international, digits = _phone_digits(phone.strip())
+    if not digits:
+        return ''
+    if international:
+        return '+' + digits
+    return '+' + DEFAULT_COUNTRY_CODE + digits
+
+
+def email_key(email):
+    """
+    Zwraca znormalizowany adres email do wykrywania duplikatów.
+    Args:
+        email: Adres email
+    Returns:
+        str: Adres bez spacji na brzegach, małymi literami
+    """
+    return email.strip().lower()
+
+
+def phone_keys(phones):
+    """
+    Zwraca klucze E.164 dla kolumny numerów telefonu (jak phone_key).
+    Args:
+        phones: Numery telefonu
+    Returns:
+        list: Klucze w kolejności numerów
+    """
+    prefix = '+' + DEFAULT_COUNTRY_CODE
+    # Lokalny numer zapisany samymi cyframi nie wymaga rozbioru przez phone_key
+    return [prefix + phone if len(phone) == 9 and phone.isdigit() else phone_key(phone)
+            for phone in phones]
+
+
+def email_keys(emails):
+    """
+    Zwraca klucze dla kolumny adresów email (jak email_key).
+    Args:
+        emails: Adresy email
+    Returns:
+        list: Klucze w kolejności adresów
+    """
+    return [email.strip().lower() for email in emails]